@@ -1,22 +1,32 @@
-import requests
-from bs4 import BeautifulSoup
 import json
 import time
+from ygo.http_cache import HttpCache
+from ygo.snapshots import SnapshotStore, MENU_NAME
 
-def fetch_ygo_webpage():
+def fetch_ygo_webpage(cache=None):
     """
-    从网页获取游戏王卡包列表
+    从网页获取游戏王卡包列表，页面未变化时使用缓存内容
     """
+    import requests
+    
     url = "https://ocg-card.com/list/"
     
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
     }
     
+    if cache is None:
+        cache = HttpCache()
+    headers.update(cache.conditional_headers(url))
+    
     try:
         print("正在从网站获取数据...")
         response = requests.get(url, headers=headers, timeout=10)
+        if response.status_code == 304:
+            print("页面未变化，使用缓存数据")
+            return cache.body(url).decode('utf-8')
         response.raise_for_status()
+        cache.update(url, response.headers, response.content)
         response.encoding = 'utf-8'
         print("数据获取成功！")
         return response.text
@@ -28,6 +38,8 @@ def parse_ygo_html(html_content):
     """
     解析游戏王HTML内容，分级整理标题结构
     """
+    from bs4 import BeautifulSoup
+    
     soup = BeautifulSoup(html_content, 'html.parser')
     result = []
     
@@ -167,6 +179,12 @@ def main():
         print("无法获取网页数据，请检查网络连接或网站状态")
         return
     
+    # 保存目录页的每个版本，与上一个版本相同时不重复保存
+    snapshots = SnapshotStore()
+    if snapshots.put(MENU_NAME, html_content.encode('utf-8'))[1]:
+        print("目录页已保存到快照库")
+    snapshots.close()
+    
     # 解析HTML
     print("正在解析数据结构...")
     structured_data = parse_ygo_html(html_content)
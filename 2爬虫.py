@@ -1,9 +1,27 @@
 import os
 import json
-import requests
-from bs4 import BeautifulSoup
 import time
 import re
+import asyncio
+import argparse
+import importlib
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from urllib.parse import urlsplit, quote
+from ygo.http_cache import HttpCache
+from ygo.manifest import Manifest
+from ygo import html_store
+from ygo import job_queue
+from ygo import scheduler
+from ygo import profiling
+from ygo import pipeline
+from ygo.snapshots import SnapshotStore, pack_name
+
+BASE_URL = "https://ocg-card.com"
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+# 并发下载时输出统计信息的间隔（秒）
+STATS_INTERVAL = 5.0
 
 def sanitize_filename(filename):
     """
@@ -20,9 +38,9 @@ def sanitize_filename(filename):
         filename = filename[:100]
     return filename
 
-def create_folder_structure(data, base_path="ygo_packages"):
+def create_folder_structure(data, base_path="ygo_packages", verbose=False):
     """
-    根据JSON数据创建文件夹结构
+    根据JSON数据创建文件夹结构，verbose时逐个输出新建的文件夹
     """
     if not os.path.exists(base_path):
         os.makedirs(base_path)
@@ -34,7 +52,8 @@ def create_folder_structure(data, base_path="ygo_packages"):
         
         if not os.path.exists(level1_path):
             os.makedirs(level1_path)
-            print(f"创建文件夹: {level1_path}")
+            if verbose:
+                print(f"创建文件夹: {level1_path}")
         
         # 创建2级文件夹
         for level2_item in level1_item['children']:
@@ -43,24 +62,13 @@ def create_folder_structure(data, base_path="ygo_packages"):
             
             if not os.path.exists(level2_path):
                 os.makedirs(level2_path)
-                print(f"创建文件夹: {level2_path}")
+                if verbose:
+                    print(f"创建文件夹: {level2_path}")
 
-def download_package_html(data, base_path="ygo_packages", delay=1):
+def iter_package_jobs(data, base_path="ygo_packages", base_url=BASE_URL):
     """
-    下载每个卡包的HTML内容
+    按ygo_structure.json的层级遍历所有卡包，生成 (卡包名, URL, 文件名, 文件路径, 3级条目)
     """
-    base_url = "https://ocg-card.com"
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    
-    total_packages = sum(
-        len(level2['children']) 
-        for level1 in data 
-        for level2 in level1['children']
-    )
-    downloaded_count = 0
-    
     for level1_item in data:
         level1_name = sanitize_filename(level1_item['title'])
         level1_path = os.path.join(base_path, level1_name)
@@ -83,45 +91,411 @@ def download_package_html(data, base_path="ygo_packages", delay=1):
                 filename = f"{level3_name}.html"
                 filepath = os.path.join(level2_path, filename)
                 
-                # 如果文件已存在，跳过下载
-                if os.path.exists(filepath):
-                    print(f"文件已存在，跳过: {filename}")
-                    downloaded_count += 1
-                    continue
+                yield level3_name, full_url, filename, filepath, level3_item
+
+def save_package_html(response, filepath):
+    """
+    将卡包页面的原始响应字节压缩保存为 .html.gz，不再解析美化
+    """
+    return html_store.write_html(filepath, response.content)
+
+def fetch_package(get, full_url, filepath, cache=None, refresh=False, timeout=10):
+    """
+    请求单个卡包页面并保存，返回响应（调用方据此取状态码和Retry-After）
+    
+    refresh为True时已存在的文件不再跳过，而是带上缓存的ETag/Last-Modified
+    发送条件请求，页面未变化时服务器返回304，文件保持不变
+    """
+    headers = dict(HEADERS)
+    if cache is not None and refresh and html_store.find_html(filepath):
+        headers.update(cache.conditional_headers(full_url, with_body=False))
+    
+    response = get(full_url, headers=headers, timeout=timeout)
+    
+    if response.status_code == 200:
+        # 连接中途断开时正文可能不完整，不能当作下载成功
+        expected = response.headers.get('Content-Length')
+        if expected and not response.headers.get('Content-Encoding') and int(expected) != len(response.content):
+            raise IOError(f"响应不完整: {len(response.content)}/{expected} 字节")
+        save_package_html(response, filepath)
+        if cache is not None:
+            # 正文已保存在filepath，缓存只记录校验信息
+            cache.update(full_url, response.headers)
+    
+    return response
+
+def needs_refresh(level3_item, refresh, incremental):
+    """
+    增量模式下只重新验证菜单上带new图标的卡包（仍在公布新卡的卡包）
+    """
+    return refresh or (incremental and level3_item.get('is_new', False))
+
+def prepare_queue(queue, jobs):
+    """
+    在任务队列中登记所有卡包；队列里还没有记录、但文件已经存在的卡包（此前下载的）视为已完成
+    """
+    if queue is None:
+        return
+    if queue.recovered:
+        print(f"上次运行中断，{queue.recovered} 个卡包将重新下载")
+    for level3_name, full_url, filename, filepath, level3_item in jobs:
+        if queue.add(full_url) and html_store.find_html(filepath):
+            queue.succeed(full_url)
+
+def already_downloaded(queue, full_url, filepath):
+    """
+    文件存在且（使用任务队列时）队列中记录为已完成；中断时未完成的任务即使留下文件也重新下载
+    """
+    if not html_store.find_html(filepath):
+        return False
+    return queue is None or queue.state(full_url) == job_queue.DONE
+
+def record_failure(queue, full_url, error, status=None, retry_after=None):
+    """
+    记录失败的请求；429以外的4xx状态码重试也不会成功，直接标记为失败；
+    服务器给出Retry-After时至少等待这么久再重试
+    """
+    if queue is not None:
+        permanent = status is not None and 400 <= status < 500 and status != 429
+        queue.fail(full_url, error, permanent, retry_after)
+
+def next_retry_delay(queue, jobs):
+    """
+    距最早一个失败卡包可以重试还有多少秒，没有等待重试的卡包时返回None
+    """
+    if queue is None:
+        return None
+    delay = queue.retry_delay([job[1] for job in jobs])
+    if delay is not None:
+        print(f"\n{delay:.1f} 秒后重试失败的卡包...")
+    return delay
+
+def due_jobs(queue, jobs):
+    """
+    已到重试时间的卡包（留一点余量，避免sleep提前醒来时漏掉）
+    """
+    now = time.time() + 0.05
+    return [job for job in jobs if queue.is_due(job[1], now)]
+
+def record_package(manifest, base_path, filepath, level3_item):
+    if manifest is not None:
+        manifest.update_pack(os.path.relpath(filepath, base_path),
+                             href=level3_item['href'], is_new=level3_item.get('is_new', False))
+
+def record_fetch(timer, filepath, started, response):
+    """
+    在timer（StageTimer）中记录一次请求的耗时和下载的字节数
+    """
+    if timer is not None:
+        size = len(response.content) if response.status_code == 200 else 0
+        timer.add('fetch', time.perf_counter() - started, filepath, size)
+
+def record_snapshot(snapshots, base_path, filepath, response):
+    """
+    将新下载的页面存入快照库（SnapshotStore），与上一个版本相同时不重复保存
+    """
+    if snapshots is not None and response.status_code == 200:
+        snapshots.put(pack_name(base_path, filepath), response.content)
+
+def download_package_html(data, base_path="ygo_packages", delay=1, base_url=BASE_URL, cache=None, refresh=False,
+                          incremental=False, manifest=None, queue=None, timer=None, snapshots=None, verbose=False):
+    """
+    下载每个卡包的HTML内容；传入queue（JobQueue）时记录任务状态，失败的卡包按退避时间重试，
+    传入timer（StageTimer）时记录每个卡包的请求耗时，传入snapshots（SnapshotStore）时保存页面的每个版本；
+    默认只定期输出进度，verbose时逐个卡包输出，失败总是输出
+    """
+    import requests
+    
+    total_packages = sum(
+        len(level2['children']) 
+        for level1 in data 
+        for level2 in level1['children']
+    )
+    downloaded_count = 0
+    progress = profiling.Progress(total_packages, verbose)
+    jobs = list(iter_package_jobs(data, base_path, base_url))
+    prepare_queue(queue, jobs)
+    
+    pending = jobs
+    while pending:
+        for level3_name, full_url, filename, filepath, level3_item in pending:
+            refresh_item = needs_refresh(level3_item, refresh, incremental)
+            
+            # 如果文件已存在，跳过下载
+            if not refresh_item and already_downloaded(queue, full_url, filepath):
+                progress.log(f"文件已存在，跳过: {filename}")
+                downloaded_count += 1
+                progress.advance()
+                record_package(manifest, base_path, filepath, level3_item)
+                continue
+            
+            if queue is not None:
+                queue.start(full_url)
+            try:
+                progress.log(f"正在下载: {level3_name}")
+                progress.log(f"URL: {full_url}")
+                
+                fetch_started = time.perf_counter()
+                response = fetch_package(requests.get, full_url, filepath, cache, refresh_item)
+                record_fetch(timer, filepath, fetch_started, response)
+                record_snapshot(snapshots, base_path, filepath, response)
+                status = response.status_code
                 
-                try:
-                    print(f"正在下载: {level3_name}")
-                    print(f"URL: {full_url}")
-                    
-                    response = requests.get(full_url, headers=headers, timeout=10)
-                    response.encoding = 'utf-8'
-                    
-                    if response.status_code == 200:
-                        # 使用BeautifulSoup美化HTML
-                        soup = BeautifulSoup(response.text, 'html.parser')
-                        pretty_html = soup.prettify()
-                        
-                        with open(filepath, 'w', encoding='utf-8') as f:
-                            f.write(pretty_html)
-                        
-                        downloaded_count += 1
-                        print(f"✓ 成功下载: {filename} ({downloaded_count}/{total_packages})")
+                if status in (200, 304):
+                    downloaded_count += 1
+                    progress.advance()
+                    record_package(manifest, base_path, filepath, level3_item)
+                    if queue is not None:
+                        queue.succeed(full_url)
+                    if status == 200:
+                        progress.log(f"✓ 成功下载: {filename} ({downloaded_count}/{total_packages})")
                     else:
-                        print(f"✗ 下载失败，状态码: {response.status_code} - {filename}")
-                    
-                    # 延迟，避免请求过快
-                    time.sleep(delay)
-                    
-                except requests.exceptions.RequestException as e:
-                    print(f"✗ 请求错误: {e} - {filename}")
-                except Exception as e:
-                    print(f"✗ 未知错误: {e} - {filename}")
+                        progress.log(f"未变化，跳过: {filename}")
+                else:
+                    progress.warn(f"✗ 下载失败，状态码: {status} - {filename}")
+                    record_failure(queue, full_url, f"HTTP {status}", status,
+                                   scheduler.parse_retry_after(response.headers.get('Retry-After')))
+                
+                # 延迟，避免请求过快
+                time.sleep(delay)
+                
+            except requests.exceptions.RequestException as e:
+                progress.warn(f"✗ 请求错误: {e} - {filename}")
+                record_failure(queue, full_url, e)
+            except Exception as e:
+                progress.warn(f"✗ 未知错误: {e} - {filename}")
+                record_failure(queue, full_url, e)
+        
+        # delay是每次请求之间的间隔，重试前的等待另用一个变量
+        retry_wait = next_retry_delay(queue, jobs)
+        if retry_wait is None:
+            break
+        time.sleep(retry_wait)
+        pending = due_jobs(queue, jobs)
     
     return downloaded_count
 
+class HostRateLimiter:
+    """
+    按主机限速：同一主机每秒最多发起 rate 个请求，rate<=0 表示不限速
+    """
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = {}
+    
+    async def wait(self, host):
+        if not self.interval:
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        # 预约该主机的下一个发送时间点，再睡到该时间点
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+def create_session(pool_size):
+    """
+    创建带连接池的Session，连接在所有请求间复用
+    """
+    import requests
+    
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def download_package_html_async(data, base_path="ygo_packages", concurrency=8, rate=4.0, base_url=BASE_URL,
+                                cache=None, refresh=False, incremental=False, manifest=None, queue=None, timer=None,
+                                snapshots=None, verbose=False):
+    """
+    并发下载每个卡包的HTML内容
+    
+    Args:
+        concurrency (int): 同时进行的请求数上限，实际并发数由AdaptiveScheduler按服务器响应在此范围内调整
+        rate (float): 每个主机每秒最多发起的请求数，0表示只由自适应调度控制
+        cache (HttpCache): 保存校验信息的HTTP缓存
+        refresh (bool): 是否对已存在的文件发送条件请求重新验证
+        incremental (bool): 只重新验证菜单上带new图标的卡包
+        manifest (Manifest): 记录卡包链接的清单
+        queue (JobQueue): 持久化的任务队列，失败的卡包按退避时间重试
+        timer (StageTimer): 记录每个卡包的请求耗时和字节数
+        snapshots (SnapshotStore): 保存下载的每个页面版本的快照库
+        verbose (bool): 逐个卡包输出下载结果，默认只定期输出进度和统计，失败总是输出
+    """
+    return asyncio.run(_download_package_html_async(
+        data, base_path, concurrency, rate, base_url, cache, refresh, incremental, manifest, queue, timer, snapshots,
+        verbose=verbose))
+
+async def _download_package_html_async(data, base_path, concurrency, rate, base_url, cache, refresh,
+                                       incremental, manifest, queue, timer, snapshots, on_saved=None, verbose=False,
+                                       on_failed=None):
+    """
+    on_saved: 协程函数，每个卡包页面可用（已下载、未变化或已存在）后以页面路径调用，
+    由下载并解析的流水线传入；下游的队列满时它会等待，已下载但还没交给下游的页面
+    最多2倍于并发上限，超过时暂停下载（背压）
+    on_failed: 与on_saved一同传入，下载失败的卡包以页面路径调用
+    """
+    import requests
+    
+    jobs = list(iter_package_jobs(data, base_path, base_url))
+    prepare_queue(queue, jobs)
+    total_packages = len(jobs)
+    downloaded_count = 0
+    progress = profiling.Progress(total_packages, verbose)
+    
+    loop = asyncio.get_running_loop()
+    adaptive = scheduler.AdaptiveScheduler(maximum=concurrency)
+    limiter = HostRateLimiter(rate)
+    last_report = time.monotonic()
+    session = create_session(concurrency)
+    # requests是阻塞的，放到线程池里执行；线程数与并发上限一致
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    backlog = asyncio.Semaphore(concurrency * 2)
+    
+    async def fetch(level3_name, full_url, filename, filepath, level3_item):
+        if on_saved is None:
+            return await fetch_one(level3_name, full_url, filename, filepath, level3_item)
+        async with backlog:
+            if await fetch_one(level3_name, full_url, filename, filepath, level3_item):
+                await on_saved(filepath)
+            elif on_failed is not None:
+                on_failed(filepath)
+    
+    async def fetch_one(level3_name, full_url, filename, filepath, level3_item):
+        """
+        下载一个卡包，返回页面是否可用
+        """
+        nonlocal downloaded_count, last_report
+        refresh_item = needs_refresh(level3_item, refresh, incremental)
+        
+        # 如果文件已存在，跳过下载
+        if not refresh_item and already_downloaded(queue, full_url, filepath):
+            progress.log(f"文件已存在，跳过: {filename}")
+            downloaded_count += 1
+            progress.advance()
+            record_package(manifest, base_path, filepath, level3_item)
+            return True
+        
+        await adaptive.acquire()
+        await limiter.wait(urlsplit(full_url).netloc)
+        if queue is not None:
+            queue.start(full_url)
+        started = time.monotonic()
+        status = retry_after = None
+        try:
+            progress.log(f"正在下载: {level3_name}")
+            progress.log(f"URL: {full_url}")
+            
+            fetch_started = time.perf_counter()
+            response = await loop.run_in_executor(
+                executor, fetch_package, session.get, full_url, filepath, cache, refresh_item, adaptive.timeout)
+            record_fetch(timer, filepath, fetch_started, response)
+            record_snapshot(snapshots, base_path, filepath, response)
+            status = response.status_code
+            
+            if status in (200, 304):
+                downloaded_count += 1
+                progress.advance()
+                record_package(manifest, base_path, filepath, level3_item)
+                if queue is not None:
+                    queue.succeed(full_url)
+                if status == 200:
+                    progress.log(f"✓ 成功下载: {filename} ({downloaded_count}/{total_packages})")
+                else:
+                    progress.log(f"未变化，跳过: {filename}")
+            else:
+                progress.warn(f"✗ 下载失败，状态码: {status} - {filename}")
+                retry_after = scheduler.parse_retry_after(response.headers.get('Retry-After'))
+                record_failure(queue, full_url, f"HTTP {status}", status, retry_after)
+                
+        except requests.exceptions.RequestException as e:
+            progress.warn(f"✗ 请求错误: {e} - {filename}")
+            record_failure(queue, full_url, e)
+        except Exception as e:
+            progress.warn(f"✗ 未知错误: {e} - {filename}")
+            record_failure(queue, full_url, e)
+        finally:
+            await adaptive.release(started, status, retry_after, error=status is None)
+            if time.monotonic() - last_report >= STATS_INTERVAL:
+                last_report = time.monotonic()
+                print(adaptive.format_stats())
+        return status in (200, 304)
+    
+    try:
+        pending = jobs
+        while pending:
+            await asyncio.gather(*(fetch(*job) for job in pending))
+            delay = next_retry_delay(queue, jobs)
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+            pending = due_jobs(queue, jobs)
+    finally:
+        executor.shutdown(wait=True)
+        session.close()
+        print(adaptive.format_stats())
+    
+    return downloaded_count
+
+def download_and_parse(data, outputs, parse, jobs=2, queue_size=16, base_path="ygo_packages", concurrency=8,
+                       rate=4.0, base_url=BASE_URL, cache=None, refresh=False, incremental=False, manifest=None,
+                       queue=None, timer=None, snapshots=None, verbose=False):
+    """
+    下载并解析的流水线：每个卡包页面可用后立即交给进程池解析，结果由outputs写出，
+    下载、解析、写出同时进行，全量刷新的耗时约为下载与解析中较慢的一个，而不是两者之和
+    
+    Args:
+        outputs (PackOutputs): 3解析卡包.py的写出阶段
+        parse: 可在子进程中运行的函数，页面路径 -> (卡包记录, 错误信息)
+        jobs (int): 解析进程数
+        queue_size (int): 各阶段之间队列的长度
+    
+    其余参数同download_package_html_async；返回 (成功下载的卡包数, 解析的卡包数)
+    """
+    return asyncio.run(_download_and_parse(data, outputs, parse, jobs, queue_size, base_path, concurrency, rate,
+                                           base_url, cache, refresh, incremental, manifest, queue, timer, snapshots,
+                                           verbose))
+
+async def _download_and_parse(data, outputs, parse, jobs, queue_size, base_path, concurrency, rate, base_url,
+                              cache, refresh, incremental, manifest, queue, timer, snapshots, verbose):
+    executor = ProcessPoolExecutor(max_workers=jobs)
+    
+    async def produce(put):
+        async def on_saved(filepath):
+            await put(html_store.find_html(filepath))
+        return await _download_package_html_async(data, base_path, concurrency, rate, base_url, cache, refresh,
+                                                  incremental, manifest, queue, timer, snapshots, on_saved, verbose,
+                                                  outputs.skip)
+    
+    def sink(html_path, result):
+        record, error = result
+        if error is not None:
+            print(f"处理文件 {html_path}  时出错: {error}")
+            outputs.skip(html_path)
+            return
+        outputs.add(html_path, record)
+        if verbose:
+            print(f"已解析: {html_path} (找到 {len(record['cards'])} 张卡牌)")
+    
+    try:
+        downloaded, parsed = await pipeline.run_pipeline(produce, parse, sink, jobs, queue_size, executor)
+    except BaseException:
+        outputs.abort()
+        raise
+    finally:
+        executor.shutdown()
+    outputs.finish()
+    return downloaded, parsed
+
 def create_index_files(data, base_path="ygo_packages"):
     """
     创建索引文件，方便导航
+    
+    链接指向 .html 地址：页面压缩保存为 .html.gz，浏览器直接打开会下载而不是显示，
+    用 --serve 启动的本地服务器按 .html 地址发送压缩页面，由浏览器解压显示
     """
     # 创建主索引文件
     index_content = """<!DOCTYPE html>
@@ -156,8 +530,7 @@ def create_index_files(data, base_path="ygo_packages"):
             
             for level3_item in level2_item['children']:
                 level3_name = sanitize_filename(level3_item['title'])
-                filename = f"{level3_name}.html"
-                relative_path = f"{level1_name}/{level2_name}/{filename}"
+                relative_path = quote(f"{level1_name}/{level2_name}/{level3_name}.html")
                 index_content += f'            <a href="{relative_path}">{level3_item["title"]}</a><br>\n'
             
             index_content += f'        </div>\n'
@@ -174,8 +547,52 @@ def create_index_files(data, base_path="ygo_packages"):
     print(f"索引文件已创建: {index_path}")
 
 def main():
+    parser = argparse.ArgumentParser(description="下载游戏王卡包HTML")
+    parser.add_argument('--sync', action='store_true', help="逐个下载（旧模式，固定延迟0.5秒）")
+    parser.add_argument('--concurrency', type=int, default=8, help="并发请求数上限，实际并发按服务器的延迟和429/503自动增减")
+    parser.add_argument('--rate', type=float, default=4.0, help="每个主机每秒最多请求数，0表示只由自适应调度控制")
+    parser.add_argument('--base-url', default=BASE_URL, help="站点地址，可指向本地替身服务器")
+    parser.add_argument('--refresh', action='store_true', help="对已下载的卡包发送条件请求，只重新下载有变化的页面")
+    parser.add_argument('--incremental', action='store_true', help="只重新验证菜单上带new图标的卡包")
+    parser.add_argument('--compress-existing', action='store_true', help="将已下载的 .html 文件压缩为 .html.gz 后退出")
+    parser.add_argument('--queue', default='ygo_jobs.sqlite', help="任务队列文件，中断后再次运行从原处继续")
+    parser.add_argument('--max-attempts', type=int, default=5, help="每个卡包最多尝试次数，失败后按指数退避重试")
+    parser.add_argument('--report', metavar='JSON', help="将每个卡包的请求耗时、字节数和内存峰值写入JSON报告")
+    parser.add_argument('--pipeline', action='store_true',
+                        help="边下载边解析，同时生成各卡包CSV、卡包信息CSV、ygo.csv和merged_cards.csv")
+    parser.add_argument('--jobs', type=int, default=2, help="--pipeline时的解析进程数")
+    parser.add_argument('--snapshots', default='ygo_snapshots.sqlite', help="保存每个页面版本的快照库")
+    parser.add_argument('--no-snapshots', action='store_true', help="不保存页面快照")
+    parser.add_argument('--delta', metavar='DELTA',
+                        help="只下载 5发现新包.py --diff 找出的卡包（新增、改名、移动、带new图标），已有的页面发送条件请求")
+    parser.add_argument('--verbose', action='store_true', help="逐个卡包输出下载结果，默认只定期输出进度")
+    parser.add_argument('--serve', metavar='PORT', type=int, nargs='?', const=8000,
+                        help="启动本地服务器浏览已下载的卡包（默认端口8000），压缩保存的页面也能直接显示")
+    parser.add_argument('--profile', metavar='FILE',
+                        help="记录函数级性能数据：.html结尾时用pyinstrument，否则保存cProfile的pstats文件")
+    args = parser.parse_args()
+    if args.pipeline and args.sync:
+        parser.error("--pipeline 只能用于并发下载")
+    
+    if args.compress_existing:
+        converted, saved = html_store.compress_existing("ygo_packages")
+        print(f"已压缩 {converted} 个文件，节省 {saved / 1024 / 1024:.1f} MB")
+        return
+    
+    if args.serve is not None:
+        from ygo import html_server
+        server = html_server.make_server("ygo_packages", args.serve)
+        print(f"打开 http://127.0.0.1:{server.server_port}/index.html 浏览卡包，按Ctrl+C停止")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return
+    
     # 读取JSON文件
-    json_file = "ygo_structure.json"
+    json_file = args.delta or "ygo_structure.json"
     
     if not os.path.exists(json_file):
         print(f"错误: 找不到 {json_file} 文件")
@@ -189,11 +606,57 @@ def main():
         print(f"读取JSON文件失败: {e}")
         return
     
+    if args.delta:
+        # 差异文件中的structure格式与ygo_structure.json相同，只包含变化的卡包
+        data = data['structure']
+        args.refresh = True
+        print(f"只下载差异中的 {sum(len(level2['children']) for level1 in data for level2 in level1['children'])} 个卡包")
+    
     print("开始创建文件夹结构...")
-    create_folder_structure(data)
+    create_folder_structure(data, verbose=args.verbose)
     
     print("\n开始下载卡包HTML内容...")
-    downloaded = download_package_html(data, delay=0.5)  # 0.5秒延迟
+    cache = HttpCache()
+    manifest = Manifest()
+    queue = job_queue.JobQueue(args.queue, max_attempts=args.max_attempts)
+    timer = profiling.StageTimer('crawl')
+    snapshots = None if args.no_snapshots else SnapshotStore(args.snapshots)
+    try:
+        with profiling.profiled(args.profile):
+            if args.pipeline:
+                parser_script = importlib.import_module('3解析卡包')
+                # 按页面路径顺序写出，与rebuild的输出顺序相同
+                paths = sorted(job[3] for job in iter_package_jobs(data, "ygo_packages", args.base_url))
+                outputs = parser_script.PackOutputs("ygo_packages", "csv_directory", "ygo.csv", "yugioh_pack_info.csv",
+                                                    merged_file="merged_cards.csv", timer=timer,
+                                                    titles=parser_script.load_pack_titles(), manifest=manifest,
+                                                    paths=paths)
+                downloaded, parsed = download_and_parse(
+                    data, outputs, parser_script.extract_html_file, jobs=args.jobs,
+                    concurrency=args.concurrency, rate=args.rate, base_url=args.base_url,
+                    cache=cache, refresh=args.refresh, incremental=args.incremental, manifest=manifest, queue=queue,
+                    timer=timer, snapshots=snapshots, verbose=args.verbose)
+                print(f"已解析 {parsed} 个卡包")
+            elif args.sync:
+                downloaded = download_package_html(data, delay=0.5, base_url=args.base_url,  # 0.5秒延迟
+                                                   cache=cache, refresh=args.refresh, incremental=args.incremental,
+                                                   manifest=manifest, queue=queue, timer=timer, snapshots=snapshots,
+                                                   verbose=args.verbose)
+            else:
+                downloaded = download_package_html_async(
+                    data, concurrency=args.concurrency, rate=args.rate, base_url=args.base_url,
+                    cache=cache, refresh=args.refresh, incremental=args.incremental, manifest=manifest, queue=queue,
+                    timer=timer, snapshots=snapshots, verbose=args.verbose)
+    finally:
+        # 中断时也保存已下载卡包的清单
+        manifest.save()
+        if snapshots is not None:
+            snapshots.close()
+        if args.report:
+            timer.write(args.report)
+    
+    failures = queue.failures()
+    queue.close()
     
     # 统计信息
     total_packages = sum(
@@ -205,14 +668,20 @@ def main():
     print(f"\n下载完成!")
     print(f"总共卡包数量: {total_packages}")
     print(f"成功下载: {downloaded}")
+    print(profiling.summary(timer.report()))
+    if failures:
+        print(f"最终失败: {len(failures)}")
+        for url, attempts, error in failures:
+            print(f"  ✗ {url} (尝试 {attempts} 次): {error}")
     
-    # 创建索引文件
-    print("\n创建索引文件...")
-    create_index_files(data)
+    # 创建索引文件（差异只包含部分卡包，不覆盖完整的索引）
+    if not args.delta:
+        print("\n创建索引文件...")
+        create_index_files(data)
     
     print(f"\n所有操作完成!")
     print(f"文件保存在: ygo_packages/ 目录")
-    print(f"打开 ygo_packages/index.html 可以查看所有卡包的索引")
+    print(f"运行 python 2爬虫.py --serve 后打开 http://127.0.0.1:8000/index.html 可以查看所有卡包的索引")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
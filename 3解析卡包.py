@@ -1,172 +1,783 @@
 import os
 import csv
-from bs4 import BeautifulSoup
+import json
+import argparse
+import importlib
+import importlib.util
+from itertools import repeat
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
 import re
+import time
+from ygo.manifest import Manifest, page_stamp, pack_key
+from ygo import html_store
+from ygo import extract
+from ygo import export
+from ygo import profiling
+from ygo.menu_diff import flatten_menu
+from ygo.parse_cache import ParseCache, open_cache
 
-def parse_card_info(html_content):
-    """解析HTML内容，提取卡牌信息"""
-    soup = BeautifulSoup(html_content, 'html.parser')
+# 卡名单元格的class
+CARD_NAME_CLASS = re.compile(r'(e-mon|r-mon|f-mon|s-mon|x-mon|l-mon|magic)')
+# main.py（extract.ygo_rows）认作卡名单元格的class
+YGO_NAME_CLASS = re.compile(r'back-|mon|magic|trap')
+
+PARSER_BACKENDS = ('bs4', 'lxml')
+
+# 卡牌表解析规则的版本，改变parse_card_info的输出时加一，使解析缓存中的旧结果失效、
+# 增量模式重新解析所有卡包（2：卡片密码取自卡牌开始行）
+PARSER_VERSION = 2
+# 解析缓存中两种结果的版本：只有卡牌列表，以及卡牌列表、ygo.csv格式的行和卡包信息
+CARDS_CACHE_VERSION = f'cards/{PARSER_VERSION}'
+PACK_CACHE_VERSION = f'pack/{PARSER_VERSION}/{extract.EXTRACT_VERSION}'
+
+def lxml_available():
+    """是否安装了lxml；只查找不导入，lxml在第一次用lxml后端解析时才导入"""
+    return importlib.util.find_spec('lxml') is not None
+
+def default_backend():
+    """安装了lxml时默认使用lxml后端，否则使用BeautifulSoup"""
+    return 'lxml' if lxml_available() else 'bs4'
+
+def _check_backend(backend):
+    """backend为None时返回默认后端，未知或未安装的后端抛出异常"""
+    if backend is None:
+        backend = default_backend()
+    if backend == 'lxml' and not lxml_available():
+        raise ImportError("lxml库未安装，请使用bs4后端或安装lxml: pip install lxml")
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"未知的解析后端: {backend}")
+    return backend
+
+def parse_card_info(html_content, backend=None):
+    """解析HTML内容，提取卡牌信息
+    
+    backend为'bs4'或'lxml'，两者输出完全相同，lxml基于C实现，速度快数倍
+    """
+    if _check_backend(backend) == 'lxml':
+        return _parse_card_info_lxml(html_content)
+    return _parse_card_info_bs4(html_content)
+
+def parse_pack(raw_content, backend=None):
+    """一次解析卡包页面的原始字节，返回 (卡牌列表, ygo.csv格式的字段, 卡包信息)
+    
+    只建立一次文档、遍历一次卡牌表：每张卡同时取出卡包CSV的字段和main.py规则下的原始文本，
+    卡包信息从同一个文档中查找；后两者与extract.ygo_rows和extract.scan_pack_meta的结果相同。
+    lxml后端直接解析字节，不单独解码页面
+    """
+    if _check_backend(backend) == 'lxml':
+        root = _lxml_document(raw_content)
+        ops = _LxmlOps
+    else:
+        from bs4 import BeautifulSoup
+        root = BeautifulSoup(raw_content.decode('utf-8'), 'html.parser')
+        ops = _Bs4Ops
+    if root is None:
+        return [], None, extract.pack_meta(None, None, None, None)
+    
+    card_table = ops.find(root, 'table')
+    walked = []
+    cards = _scan_card_rows(ops.rows(card_table), ops, walked) if card_table is not None else []
+    
+    time_element = ops.find(root, 'time', lambda el: set(ops.tokens(el, 'class')) & extract.TIME_CLASSES)
+    published = ops.find(root, 'meta', lambda el: el.get('property') == 'article:published_time')
+    total_div = ops.find(root, 'div', lambda el: 'total' in ops.tokens(el, 'class'))
+    canonical = ops.find(root, 'link', lambda el: 'canonical' in ops.tokens(el, 'rel'))
+    total_text = ops.text(total_div) if total_div is not None else None
+    meta = extract.pack_meta(ops.text(time_element) if time_element is not None else None,
+                             published.get('content', '') if published is not None else None,
+                             total_text,
+                             canonical.get('href') if canonical is not None else None)
+    
+    dated = ops.find(root, 'time', lambda el: el.get('datetime') is not None)
+    rows = extract.walked_ygo_rows(dated.get('datetime') if dated is not None else None, total_text, walked)
+    return cards, rows, meta
+
+def _scan_card_rows(rows, ops, walked=None):
+    """单趟扫描卡牌表格的所有<tr>，提取全部字段
+    
+    每行只遍历一次其中的<td>并按class分组，状态机：
+    - 遇到含card-number的行开始一张新卡；
+    - 紧接着的一行（无论内容）是属性/等级/种族/攻防/密码所在行；
+    - 之后含card-text的行都是卡牌文本，直到下一张卡开始。
+    传入walked列表时同时追加每张卡的原始文本（extract.walked_ygo_rows的输入）
+    """
     cards = []
+    card_info = None
+    text_parts = None
+    expect_detail = False
+    
+    for row in rows:
+        cells, card_name_td = ops.row_cells(row)
+        if walked is not None:
+            # 在_start_card去掉Ruby之前取原始文本
+            _walk_row(walked, cells, ops)
+        
+        if expect_detail:
+            # 卡牌开始行的下一行：属性等信息
+            expect_detail = False
+            _fill_card_detail(card_info, cells, ops)
+            continue
+        
+        # 当前卡牌的文本行（可能跨越多行）
+        if card_info is not None and 'card-text' in cells:
+            text_parts.append(ops.text(cells['card-text'][0]))
+            continue
+        
+        # 检查是否是卡牌开始行（包含卡牌编号）
+        if 'card-number' in cells:
+            if card_info is not None:
+                _finish_card(cards, card_info, text_parts)
+            card_info = _start_card(cells, card_name_td, ops)
+            text_parts = []
+            expect_detail = True
+    
+    if card_info is not None:
+        _finish_card(cards, card_info, text_parts)
+    
+    return cards
+
+# main.py的卡名去掉<rt>和限制图标紧接着的文本（注音、「制限」等）
+def _ygo_name_drop(tag, classes):
+    return tag == 'rt' or 'limit-icon' in classes
+
+def _walk_row(walked, cells, ops):
+    """按main.py的规则记录一行中的原始文本（不去除空白）
+    
+    main.py在每个「card-number」处把卡牌表切分成段，每段是一张卡，段内第一次出现的类别、
+    密码和罕贵度单元格属于这张卡；没有属性行的卡（如招待状）也单独成段
+    """
+    if 'card-number' in cells:
+        number = ops.raw_strings(cells['card-number'][0])
+        name_td = next((tds[0] for class_name, tds in cells.items() if YGO_NAME_CLASS.search(class_name)), None)
+        walked.append({
+            'number': number[0] if number else '',
+            'name': ''.join(ops.raw_strings(name_td, _ygo_name_drop)) if name_td is not None else '',
+            'category': None,
+            'pass': None,
+            'rare': None,
+        })
+    if not walked:
+        return
+    card = walked[-1]
+    for key, class_name in (('category', 'card-category'), ('pass', 'card-pass')):
+        if card[key] is None and class_name in cells:
+            card[key] = ''.join(ops.raw_strings(cells[class_name][0]))
+    if card['rare'] is None and 'card-rare' in cells:
+        card['rare'] = ops.raw_strings(cells['card-rare'][0])
+
+def _start_card(cells, card_name_td, ops):
+    card_info = {}
+    
+    # 提取卡牌编号
+    card_info['卡牌编码'] = ops.text(cells['card-number'][0])
+    
+    # 提取卡名
+    if card_name_td is not None:
+        # 移除Ruby注音
+        ops.drop_ruby(card_name_td)
+        card_info['卡名'] = ops.text(card_name_td)
+    
+    # 提取卡牌类别
+    if 'card-category' in cells:
+        card_info['卡牌类别'] = ops.text(cells['card-category'][0])
+    
+    # 提取卡片密码
+    if 'card-pass' in cells:
+        card_info['卡片密码'] = ops.text(cells['card-pass'][0])
+    
+    # 提取罕贵度
+    if 'card-rare' in cells:
+        # 提取所有罕贵度类型
+        rare_texts = [ops.text(link) for link in ops.links(cells['card-rare'][0])]
+        card_info['罕贵度'] = ' / '.join(rare_texts)
+    
+    return card_info
+
+def _fill_card_detail(card_info, cells, ops):
+    # 提取属性
+    if 'card-attr' in cells:
+        card_info['属性'] = ops.text(cells['card-attr'][0])
+    
+    # 提取等级/阶数
+    if 'card-star' in cells:
+        card_info['等级'] = ops.text(cells['card-star'][0])
+    elif 'non-stts' in cells and ops.text(cells['non-stts'][0]) == '-':
+        # 对于超量怪兽，等级字段存储阶数
+        card_info['等级'] = '阶数'  # 具体阶数需要在链接信息中获取
+    
+    # 提取种族
+    if 'card-type' in cells:
+        card_info['种族'] = ops.text(cells['card-type'][0])
+    
+    # 提取攻击力
+    force_tds = cells.get('card-force', [])
+    if len(force_tds) >= 1:
+        card_info['攻击力'] = ops.text(force_tds[0])
+    if len(force_tds) >= 2:
+        card_info['防御力'] = ops.text(force_tds[1])
+    
+    # 卡片密码一般在开始行，少数页面在这一行
+    if 'card-pass' in cells and '卡片密码' not in card_info:
+        card_info['卡片密码'] = ops.text(cells['card-pass'][0])
+
+def _finish_card(cards, card_info, text_parts):
+    if text_parts:
+        card_info['卡牌文本'] = ' '.join(text_parts).strip()
+    cards.append(card_info)
+
+def _group_cells(tds, get_classes):
+    """按class把一行中的<td>分组，同时找出卡名单元格"""
+    cells = {}
+    card_name_td = None
+    for td in tds:
+        classes = get_classes(td)
+        if not classes:
+            continue
+        for class_name in dict.fromkeys(classes):
+            cells.setdefault(class_name, []).append(td)
+        if card_name_td is None and CARD_NAME_CLASS.search(' '.join(classes)):
+            card_name_td = td
+    return cells, card_name_td
+
+class _Bs4Ops:
+    """BeautifulSoup(html.parser)后端的节点操作"""
+    @staticmethod
+    def find(root, tag, accept=None):
+        return next((el for el in root.find_all(tag) if accept is None or accept(el)), None)
+    
+    @staticmethod
+    def rows(table):
+        return table.find_all('tr')
+    
+    @staticmethod
+    def tokens(element, name):
+        value = element.get(name) or []
+        return value.split() if isinstance(value, str) else value
+    
+    @staticmethod
+    def raw_strings(element, drop_text=None):
+        """元素中的所有文本节点（含注音，不去除空白）；drop_text(标签, class)为真时不取该元素开头的文本"""
+        from bs4.element import NavigableString, PreformattedString
+        result = []
+        drop = drop_text is not None and drop_text(element.name, element.get('class') or [])
+        for index, child in enumerate(element.contents):
+            if isinstance(child, PreformattedString):
+                # 注释等
+                continue
+            if isinstance(child, NavigableString):
+                if not (drop and index == 0):
+                    result.append(str(child))
+            else:
+                result.extend(_Bs4Ops.raw_strings(child, drop_text))
+        return result
+    
+    @staticmethod
+    def row_cells(row):
+        return _group_cells(row.find_all('td'), lambda td: td.get('class'))
+    
+    @staticmethod
+    def text(element):
+        return element.get_text(strip=True)
+    
+    @staticmethod
+    def links(element):
+        return element.find_all('a')
+    
+    @staticmethod
+    def drop_ruby(element):
+        ruby = element.find('div', class_='card-ruby')
+        if ruby:
+            ruby.decompose()
+
+def _parse_card_info_bs4(html_content):
+    """BeautifulSoup(html.parser)后端"""
+    from bs4 import BeautifulSoup
+    
+    soup = BeautifulSoup(html_content, 'html.parser')
     
     # 查找卡牌列表表格
     card_table = soup.find('table')
     if not card_table:
-        return cards
+        return []
     
-    # 查找所有卡牌行
-    rows = card_table.find_all('tr')
-    i = 0
+    return _scan_card_rows(_Bs4Ops.rows(card_table), _Bs4Ops)
+
+# BeautifulSoup的get_text()不包含这些标签内的文本（如Ruby注音<rt>）
+LXML_SKIP_TEXT_TAGS = {'rt', 'rp', 'script', 'style', 'template'}
+
+def _lxml_strings(element):
+    if element.text:
+        yield element.text
+    for child in element:
+        # 注释等节点的tag不是字符串，只保留其后的文本
+        if isinstance(child.tag, str) and child.tag not in LXML_SKIP_TEXT_TAGS:
+            yield from _lxml_strings(child)
+        if child.tail:
+            yield child.tail
+
+def _lxml_raw_strings(element, drop_text):
+    if element.text and not (drop_text is not None and drop_text(element.tag, element.get('class', '').split())):
+        yield element.text
+    for child in element:
+        if isinstance(child.tag, str):
+            yield from _lxml_raw_strings(child, drop_text)
+        if child.tail:
+            yield child.tail
+
+class _LxmlOps:
+    """lxml后端的节点操作，结果与_Bs4Ops一致"""
+    @staticmethod
+    def find(root, tag, accept=None):
+        return next((el for el in root.iter(tag) if accept is None or accept(el)), None)
     
-    while i < len(rows):
-        row = rows[i]
-        
-        # 检查是否是卡牌开始行（包含卡牌编号）
-        card_number_td = row.find('td', class_='card-number')
-        if card_number_td:
-            card_info = {}
-            
-            # 提取卡牌编号
-            card_info['卡牌编码'] = card_number_td.get_text(strip=True)
-            
-            # 提取卡名
-            card_name_td = row.find('td', class_=re.compile(r'(e-mon|r-mon|f-mon|s-mon|x-mon|l-mon|magic)'))
-            if card_name_td:
-                # 移除Ruby注音
-                ruby = card_name_td.find('div', class_='card-ruby')
-                if ruby:
-                    ruby.decompose()
-                card_info['卡名'] = card_name_td.get_text(strip=True)
-            
-            # 提取卡牌类别
-            category_td = row.find('td', class_='card-category')
-            if category_td:
-                card_info['卡牌类别'] = category_td.get_text(strip=True)
-            
-            # 提取罕贵度
-            rare_td = row.find('td', class_='card-rare')
-            if rare_td:
-                # 提取所有罕贵度类型
-                rare_texts = []
-                for link in rare_td.find_all('a'):
-                    rare_texts.append(link.get_text(strip=True))
-                card_info['罕贵度'] = ' / '.join(rare_texts)
-            
-            # 检查下一行是否有属性等信息
-            if i + 1 < len(rows):
-                next_row = rows[i + 1]
-                
-                # 提取属性
-                attr_td = next_row.find('td', class_='card-attr')
-                if attr_td:
-                    card_info['属性'] = attr_td.get_text(strip=True)
-                
-                # 提取等级/阶数
-                star_td = next_row.find('td', class_='card-star')
-                if star_td:
-                    card_info['等级'] = star_td.get_text(strip=True)
-                else:
-                    # 检查是否是超量怪兽（没有等级但有阶数）
-                    non_stts = next_row.find('td', class_='non-stts')
-                    if non_stts and non_stts.get_text(strip=True) == '-':
-                        # 对于超量怪兽，等级字段存储阶数
-                        card_info['等级'] = '阶数'  # 具体阶数需要在链接信息中获取
-                
-                # 提取种族
-                type_td = next_row.find('td', class_='card-type')
-                if type_td:
-                    card_info['种族'] = type_td.get_text(strip=True)
-                
-                # 提取攻击力
-                force_tds = next_row.find_all('td', class_='card-force')
-                if len(force_tds) >= 1:
-                    card_info['攻击力'] = force_tds[0].get_text(strip=True)
-                if len(force_tds) >= 2:
-                    card_info['防御力'] = force_tds[1].get_text(strip=True)
-                
-                # 提取卡片密码
-                pass_td = next_row.find('td', class_='card-pass')
-                if pass_td:
-                    card_info['卡片密码'] = pass_td.get_text(strip=True)
-            
-            # 提取卡牌文本（可能跨越多行）
-            card_text = ""
-            j = i + 2  # 从卡牌信息后的行开始
-            while j < len(rows):
-                text_row = rows[j]
-                text_td = text_row.find('td', class_='card-text')
-                if text_td:
-                    card_text += text_td.get_text(strip=True) + " "
-                    j += 1
-                else:
-                    # 检查是否是新的卡牌开始
-                    if text_row.find('td', class_='card-number'):
-                        break
-                    j += 1
-            
-            if card_text:
-                card_info['卡牌文本'] = card_text.strip()
-            
-            cards.append(card_info)
-            
-            # 跳过已经处理的行
-            i = j
+    @staticmethod
+    def rows(table):
+        return list(table.iter('tr'))
+    
+    @staticmethod
+    def tokens(element, name):
+        return element.get(name, '').split()
+    
+    @staticmethod
+    def raw_strings(element, drop_text=None):
+        return list(_lxml_raw_strings(element, drop_text))
+    
+    @staticmethod
+    def row_cells(row):
+        return _group_cells(row.iter('td'), lambda td: td.get('class', '').split())
+    
+    @staticmethod
+    def text(element):
+        # 与BeautifulSoup的get_text(strip=True)一致：每段文本去除首尾空白后直接拼接
+        return ''.join(text.strip() for text in _lxml_strings(element))
+    
+    @staticmethod
+    def links(element):
+        return element.iter('a')
+    
+    @staticmethod
+    def drop_ruby(element):
+        for div in element.iter('div'):
+            if 'card-ruby' in div.get('class', '').split():
+                _drop_tree(div)
+                break
+
+def _drop_tree(element):
+    """删除元素及其内容，保留其后的文本（同lxml.html的drop_tree）"""
+    parent = element.getparent()
+    if element.tail:
+        previous = element.getprevious()
+        if previous is not None:
+            previous.tail = (previous.tail or '') + element.tail
         else:
-            i += 1
+            parent.text = (parent.text or '') + element.tail
+    parent.remove(element)
+
+def _lxml_document(content):
+    """用lxml建立文档，content为页面字节（按UTF-8解析）或文本；空白（或只有注释）的页面返回None
     
-    return cards
+    使用etree的HTMLParser而不是lxml.html：得到的树相同，但不必为每个元素查找HtmlElement类
+    """
+    from lxml import etree
+    parser = etree.HTMLParser(encoding='utf-8') if isinstance(content, bytes) else etree.HTMLParser()
+    return etree.fromstring(content, parser)
 
-def process_html_directory(html_dir, csv_dir):
-    """处理HTML目录，生成对应的CSV文件"""
+def _parse_card_info_lxml(html_content):
+    """lxml后端"""
+    root = _lxml_document(html_content)
+    if root is None:
+        # 空白（或只有注释）的页面，bs4后端对它返回空列表
+        return []
+    
+    # 查找卡牌列表表格
+    card_table = _LxmlOps.find(root, 'table')
+    if card_table is None:
+        return []
+    
+    return _scan_card_rows(_LxmlOps.rows(card_table), _LxmlOps)
+
+CSV_FIELDNAMES = ['卡牌编码', '卡名', '卡牌类别', '属性', '等级', '种族', 
+                  '攻击力', '防御力', '罕贵度', '卡片密码', '卡牌文本']
+
+def list_html_files(html_dir):
+    """按路径排序列出目录下所有卡包HTML，保证输出顺序与文件系统无关；同一卡包的 .html 和 .html.gz 只取一个"""
+    return html_store.unique_html_files(sorted(
+        os.path.join(root, file)
+        for root, dirs, files in os.walk(html_dir)
+        for file in files
+        if html_store.is_html_file(file)
+    ))
+
+def write_pack_csv(csv_path, cards):
+    """写出一个卡包的CSV文件"""
+    # 确保CSV文件的目录存在
+    os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+    
+    with open(csv_path, 'w', encoding='utf-8', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=CSV_FIELDNAMES)
+        
+        writer.writeheader()
+        for card in cards:
+            writer.writerow(card)
+
+def parse_html_file(html_path, backend=None, cache_path=None):
+    """读取并解析单个HTML文件，返回 (卡牌列表, 内容哈希, 更新日期, 错误信息, 页面字节数, 各阶段耗时, 是否命中缓存)
+    
+    在子进程中运行时异常不能中断整个进程池，所以错误以字符串返回；
+    各阶段耗时为 {'read': 秒, 'decode': 秒, 'parse': 秒}；
+    传入cache_path时先查找解析缓存，未命中的结果由调用者写入
+    """
+    try:
+        started = time.perf_counter()
+        raw_content = html_store.read_html_bytes(html_path)
+        read_done = time.perf_counter()
+        content_hash, update_date = page_stamp(raw_content)
+        # 命中缓存时不必解码页面
+        cache = open_cache(cache_path, CARDS_CACHE_VERSION)
+        cards = cache.get(content_hash) if cache is not None else None
+        cached = cards is not None
+        decode_seconds = 0.0
+        if not cached:
+            decode_started = time.perf_counter()
+            html_content = raw_content.decode('utf-8')
+            decode_seconds = time.perf_counter() - decode_started
+            cards = parse_card_info(html_content, backend)
+        timings = {
+            'read': read_done - started,
+            'decode': decode_seconds,
+            'parse': time.perf_counter() - read_done - decode_seconds,
+        }
+        return cards, content_hash, update_date, None, len(raw_content), timings, cached
+    except Exception as e:
+        return None, None, None, str(e), 0, {}, False
+
+def process_html_directory(html_dir, csv_dir, manifest=None, backend=None, jobs=1, timer=None, verbose=False,
+                           cache_path=None):
+    """处理HTML目录，生成对应的CSV文件，返回记录了各阶段耗时的StageTimer
+    
+    传入manifest时跳过自上次解析后未变化的卡包；jobs大于1时用多进程并行解析，
+    结果仍按文件路径顺序写出。默认只定期输出进度，verbose时逐个文件输出；
+    传入cache_path时内容未变的页面直接使用解析缓存中的卡牌列表
+    """
+    if timer is None:
+        timer = profiling.StageTimer('parse')
     
     # 确保输出目录存在
     os.makedirs(csv_dir, exist_ok=True)
     
-    # 遍历HTML目录
-    for root, dirs, files in os.walk(html_dir):
-        for file in files:
-            if file.endswith('.html'):
-                html_path = os.path.join(root, file)
-                
-                # 计算对应的CSV路径
-                relative_path = os.path.relpath(html_path, html_dir)
-                csv_path = os.path.join(csv_dir, os.path.splitext(relative_path)[0] + '.csv')
-                
-                # 确保CSV文件的目录存在
-                os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+    tasks = []
+    for html_path in list_html_files(html_dir):
+        # 计算对应的CSV路径（压缩与未压缩的页面使用同一个键）
+        relative_path = html_store.logical_path(os.path.relpath(html_path, html_dir))
+        csv_path = os.path.join(csv_dir, html_store.strip_html_suffix(relative_path) + '.csv')
+        
+        if manifest is not None:
+            try:
+                with timer.stage('check', html_path):
+                    unchanged = manifest.pack_unchanged(relative_path, html_path, csv_path, PARSER_VERSION)
+                if unchanged:
+                    if verbose:
+                        print(f"未变化，跳过: {html_path}")
+                    continue
+            except Exception as e:
+                print(f"处理文件 {html_path}  时出错: {str(e)}")
+                continue
+        
+        tasks.append((html_path, relative_path, csv_path))
+    
+    progress = profiling.Progress(len(tasks), verbose)
+    html_paths = [task[0] for task in tasks]
+    cache = ParseCache(cache_path, CARDS_CACHE_VERSION) if cache_path else None
+    cache_hits = 0
+    if jobs > 1 and len(tasks) > 1:
+        executor = ProcessPoolExecutor(max_workers=jobs)
+        # map按提交顺序返回结果，边解析边写出
+        results = executor.map(parse_html_file, html_paths, repeat(backend), repeat(cache_path), chunksize=4)
+    else:
+        executor = None
+        results = map(parse_html_file, html_paths, repeat(backend), repeat(cache_path))
+    
+    try:
+        for (html_path, relative_path, csv_path), result in zip(tasks, results):
+            cards, content_hash, update_date, error, size, timings, cached = result
+            progress.advance()
+            if error is not None:
+                progress.warn(f"处理文件 {html_path}  时出错: {error}")
+                continue
+            timer.add_stages(html_path, timings, size)
+            if cache is not None:
+                if cached:
+                    cache.touch(content_hash)
+                    cache_hits += 1
+                else:
+                    cache.put(content_hash, cards)
+            
+            try:
+                if manifest is not None:
+                    manifest.record_parse(relative_path, html_path, content_hash, update_date, len(cards),
+                                          PARSER_VERSION)
                 
-                try:
-                    # 读取HTML文件
-                    with open(html_path, 'r', encoding='utf-8') as f:
-                        html_content = f.read()
-                    
-                    # 解析卡牌信息
-                    cards = parse_card_info(html_content)
+                if cards:
+                    with timer.stage('write', html_path, rows=len(cards)):
+                        write_pack_csv(csv_path, cards)
+                    progress.log(f"成功处理: {html_path} -> {csv_path} (找到 {len(cards)} 张卡牌)")
+                else:
+                    progress.warn(f"警告: 在 {html_path} 中未找到卡牌信息")
                     
-                    if cards:
-                        # 写入CSV文件
-                        with open(csv_path, 'w', encoding='utf-8', newline='') as csvfile:
-                            fieldnames = ['卡牌编码', '卡名', '卡牌类别', '属性', '等级', '种族', 
-                                        '攻击力', '防御力', '罕贵度', '卡片密码', '卡牌文本']
-                            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                            
-                            writer.writeheader()
-                            for card in cards:
-                                writer.writerow(card)
-                        
-                        print(f"成功处理: {html_path} -> {csv_path} (找到 {len(cards)} 张卡牌)")
-                    else:
-                        print(f"警告: 在 {html_path} 中未找到卡牌信息")
-                        
-                except Exception as e:
-                    print(f"处理文件 {html_path}  时出错: {str(e)}")
+            except Exception as e:
+                progress.warn(f"处理文件 {html_path}  时出错: {str(e)}")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if cache is not None:
+            cache.close()
+            print(f"解析缓存命中 {cache_hits}/{len(tasks)} 个卡包")
+    return timer
+
+def extract_html_file(html_path, backend=None, cache_path=None):
+    """读取一次页面得到完整的卡包记录，返回 (卡包记录, 错误信息)；传入cache_path时先查找解析缓存"""
+    try:
+        return extract.extract_pack(html_path, partial(parse_pack, backend=backend),
+                                    open_cache(cache_path, PACK_CACHE_VERSION)), None
+    except Exception as e:
+        return None, str(e)
+
+def load_pack_titles(structure_file="ygo_structure.json"):
+    """2爬虫保存的卡包路径（相对下载目录、不含扩展名）-> ygo_structure.json中的原始 (分类, 系列, 卡包名)
+    
+    2爬虫用sanitize_filename处理过的名称保存页面，ygo.csv中应写原始标题；文件不存在时返回空字典
+    """
+    if not os.path.exists(structure_file):
+        return {}
+    crawler = importlib.import_module('2爬虫')
+    with open(structure_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    titles = {}
+    for pack in flatten_menu(data).values():
+        names = (pack['category'], pack['series'], pack['title'])
+        titles.setdefault('/'.join(crawler.sanitize_filename(name) for name in names), names)
+    return titles
+
+class PackOutputs:
+    """卡包记录的写出阶段，--rebuild与下载流水线共用
+    
+    每收到一个卡包记录立即写出它的CSV；卡包信息CSV、ygo.csv和merged_file（不为None时，格式
+    与4合并.py的完整合并相同）按paths（将要到达的全部页面，即写出顺序）边到达边写出，与记录到达的
+    顺序无关：排在前面的页面还没到时，后到的记录暂存在内存中，轮到时再写出。前面的页面不会
+    到达时（如解析出错）应调用skip，否则其后的记录要等到finish才写出；不在paths中的页面在finish时
+    按路径顺序写在最后。三个文件先写入临时文件，finish时才替换目标文件，abort时删除
+    
+    ygo.csv中的分类、系列、卡包优先取titles（load_pack_titles的结果）中的
+    原始标题，与main.py取自目录页的名称相同；不在titles中的页面取HTML的相对路径（main.py的
+    下载目录中只去掉了卡包名里的「/」）
+    
+    传入cache_path时将未命中缓存的记录的解析结果写入解析缓存（记录应由同一cache_path的
+    extract_html_file得到）；传入manifest时与process_html_directory一样记录每个卡包的解析结果，
+    之后的增量解析据此跳过这些卡包
+    """
+    def __init__(self, html_dir, csv_dir, ygo_csv, pack_info_csv, merged_file=None, timer=None, cache_path=None,
+                 titles=None, manifest=None, paths=()):
+        self.html_dir = html_dir
+        self.titles = titles or {}
+        self.manifest = manifest
+        self.csv_dir = csv_dir
+        self.ygo_csv = ygo_csv
+        self.pack_info_csv = pack_info_csv
+        self.timer = timer if timer is not None else profiling.StageTimer('rebuild')
+        os.makedirs(csv_dir, exist_ok=True)
+        self.cache = ParseCache(cache_path, PACK_CACHE_VERSION) if cache_path else None
+        self.cache_hits = 0
+        
+        # 写出顺序中各页面的键；已到达、还没轮到的 键 -> (卡包信息, ygo.csv格式的行, 卡牌列表（只在需要合并CSV时保留）)
+        self.order = list(dict.fromkeys(self._key(path) for path in paths))
+        self.position = 0
+        self.pending = {}
+        self.skipped = set()
+        self.written = 0
+        self.ygo_rows = 0
+        
+        self.pack_info_file = export.AtomicFile(pack_info_csv, 'utf-8-sig', newline='')
+        self.pack_info_writer = csv.DictWriter(self.pack_info_file.file, fieldnames=extract.PACK_INFO_FIELDS)
+        self.pack_info_writer.writeheader()
+        self.ygo_file = export.AtomicFile(ygo_csv)
+        self.merged_file = merged_file
+        self.merged_rows = 0
+        self.merged = None
+        if merged_file is not None:
+            self.merged = export.AtomicFile(merged_file, 'utf-8-sig', newline='')
+            self.merged_writer = csv.DictWriter(self.merged.file, fieldnames=sorted(CSV_FIELDNAMES), restval='',
+                                                extrasaction='ignore')
+            self.merged_writer.writeheader()
+    
+    def _key(self, html_path):
+        """压缩与未压缩的页面使用同一个键"""
+        return pack_key(html_store.logical_path(os.path.relpath(html_path, self.html_dir)))
+    
+    def add(self, html_path, record):
+        """写出一个卡包记录（extract.extract_pack的结果）"""
+        # 与下载阶段的计时使用同一个键
+        timer_key = html_store.logical_path(html_path)
+        self.timer.add_stages(timer_key, record['timings'], record['size'])
+        relative_path = html_store.strip_html_suffix(os.path.relpath(html_path, self.html_dir))
+        if self.cache is not None:
+            if record['cached']:
+                self.cache.touch(record['content_hash'])
+                self.cache_hits += 1
+            else:
+                self.cache.put(record['content_hash'], (record['cards'], record['ygo_rows'], record['meta']))
+        
+        if record['cards']:
+            with self.timer.stage('write', timer_key, rows=len(record['cards'])):
+                write_pack_csv(os.path.join(self.csv_dir, relative_path + '.csv'), record['cards'])
+        if self.manifest is not None:
+            self.manifest.record_parse(html_store.logical_path(os.path.relpath(html_path, self.html_dir)), html_path,
+                                       record['content_hash'], record['update_date'], len(record['cards']),
+                                       PARSER_VERSION)
+        
+        lines = []
+        if record['ygo_rows']:
+            key = relative_path.replace(os.sep, '/')
+            if key in self.titles:
+                cgr_name, fld_name, pk_name = self.titles[key]
+            else:
+                *dirs, pk_name = key.split('/')
+                cgr_name = dirs[0] if dirs else ''
+                fld_name = '/'.join(dirs[1:])
+            lines = [extract.ygo_line(row, cgr_name, fld_name, pk_name) for row in record['ygo_rows']]
+        cards = record['cards'] if self.merged is not None else None
+        self.pending[self._key(html_path)] = (record['pack_info'], lines, cards)
+        self._release()
+    
+    def skip(self, html_path):
+        """登记不会到达的页面（如解析出错），排在它后面的记录不必再等待"""
+        self.skipped.add(self._key(html_path))
+        self._release()
+    
+    def _release(self):
+        """按写出顺序写出已经轮到的记录"""
+        while self.position < len(self.order):
+            key = self.order[self.position]
+            if key in self.pending:
+                self._write(self.pending.pop(key))
+            elif key not in self.skipped:
+                return
+            self.position += 1
+    
+    def _write(self, entry):
+        pack_info, lines, cards = entry
+        with self.timer.stage('write', rows=len(lines)):
+            self.pack_info_writer.writerow(pack_info)
+            for line in lines:
+                self.ygo_file.file.write(line + '\n')
+            if cards is not None:
+                self.merged_writer.writerows(cards)
+                self.merged_rows += len(cards)
+        self.written += 1
+        self.ygo_rows += len(lines)
+    
+    def finish(self):
+        """写出还在等待的记录（缺少的页面跳过），替换卡包信息CSV、ygo.csv和合并CSV，返回StageTimer"""
+        for key in self.order[self.position:]:
+            if key in self.pending:
+                self._write(self.pending.pop(key))
+        self.position = len(self.order)
+        for key in sorted(self.pending):
+            self._write(self.pending.pop(key))
+        self.pack_info_file.commit()
+        self.ygo_file.commit()
+        if self.merged is not None:
+            self.merged.commit()
+        if self.cache is not None:
+            self.cache.close()
+            print(f"解析缓存命中 {self.cache_hits}/{self.written} 个卡包")
+        print(f"卡包信息已保存到 {self.pack_info_csv} ({self.written} 个卡包), "
+              f"ygo.csv格式已保存到 {self.ygo_csv} ({self.ygo_rows} 行)")
+        if self.merged is not None:
+            print(f"合并文件已保存到 {self.merged_file} ({self.merged_rows} 行)")
+        return self.timer
+    
+    def abort(self):
+        """出错中止时删除写了一半的汇总输出，原有的文件保持不变；已得到的解析结果仍写入解析缓存"""
+        self.pack_info_file.discard()
+        self.ygo_file.discard()
+        if self.merged is not None:
+            self.merged.discard()
+        if self.cache is not None:
+            self.cache.close()
+
+def rebuild_outputs(html_dir, csv_dir, ygo_csv, pack_info_csv, backend=None, jobs=1, timer=None, verbose=False,
+                    cache_path=None, titles=None):
+    """一次解析生成全部输出：各卡包CSV、卡包信息CSV和ygo.csv，返回记录了各阶段耗时的StageTimer
+    
+    每个页面只读取和解析一次（parse_pack），卡牌表只遍历一次；传入cache_path时内容未变的页面不再解析
+    """
+    html_paths = list_html_files(html_dir)
+    outputs = PackOutputs(html_dir, csv_dir, ygo_csv, pack_info_csv, timer=timer, cache_path=cache_path,
+                          titles=titles, paths=html_paths)
+    progress = profiling.Progress(len(html_paths), verbose)
+    
+    if jobs > 1 and len(html_paths) > 1:
+        executor = ProcessPoolExecutor(max_workers=jobs)
+        results = executor.map(extract_html_file, html_paths, repeat(backend), repeat(cache_path), chunksize=4)
+    else:
+        executor = None
+        results = map(extract_html_file, html_paths, repeat(backend), repeat(cache_path))
+    
+    try:
+        for html_path, (record, error) in zip(html_paths, results):
+            progress.advance()
+            if error is not None:
+                progress.warn(f"处理文件 {html_path}  时出错: {error}")
+                outputs.skip(html_path)
+                continue
+            outputs.add(html_path, record)
+            progress.log(f"成功处理: {html_path} (找到 {len(record['cards'])} 张卡牌)")
+    except BaseException:
+        outputs.abort()
+        raise
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    
+    return outputs.finish()
 
 def main():
+    parser = argparse.ArgumentParser(description="解析卡包HTML生成CSV")
+    parser.add_argument('--incremental', action='store_true', help="只解析自上次运行后有变化的卡包")
+    parser.add_argument('--backend', choices=PARSER_BACKENDS, default=None,
+                        help="HTML解析后端，默认安装了lxml时使用lxml")
+    parser.add_argument('--jobs', type=int, default=1, help="并行解析的进程数")
+    parser.add_argument('--rebuild', action='store_true',
+                        help="每个页面只解析一次，同时生成各卡包CSV、卡包信息CSV和ygo.csv")
+    parser.add_argument('--verbose', action='store_true', help="逐个文件输出处理结果，默认只定期输出进度")
+    parser.add_argument('--cache', default='ygo_parse_cache.sqlite', help="解析缓存文件，内容未变的页面不再解析")
+    parser.add_argument('--no-cache', action='store_true', help="不使用解析缓存")
+    parser.add_argument('--report', metavar='JSON', help="将各阶段、各文件的耗时和内存峰值写入JSON报告")
+    parser.add_argument('--profile', metavar='FILE',
+                        help="记录函数级性能数据：.html结尾时用pyinstrument，否则保存cProfile的pstats文件")
+    args = parser.parse_args()
+    
     # 配置目录路径
     html_directory = "ygo_packages"  # 替换为实际的HTML目录路径
     csv_directory = "csv_directory"    # CSV输出目录
+    cache_path = None if args.no_cache else args.cache
+    
+    with profiling.profiled(args.profile):
+        if args.rebuild:
+            timer = rebuild_outputs(html_directory, csv_directory, 'ygo.csv', 'yugioh_pack_info.csv',
+                                    args.backend, args.jobs, verbose=args.verbose, cache_path=cache_path,
+                                    titles=load_pack_titles())
+        else:
+            # 处理所有HTML文件
+            manifest = Manifest() if args.incremental else None
+            timer = process_html_directory(html_directory, csv_directory, manifest, args.backend, args.jobs,
+                                           verbose=args.verbose, cache_path=cache_path)
+            if manifest is not None:
+                manifest.save()
     
-    # 处理所有HTML文件
-    process_html_directory(html_directory, csv_directory)
+    report = timer.write(args.report) if args.report else timer.report()
+    print(profiling.summary(report))
     print("处理完成！")
 
 if __name__ == "__main__":
@@ -1,15 +1,145 @@
 import os
 import csv
 import glob
+import io
+import json
+import time
+import codecs
+import argparse
+from ygo.manifest import Manifest, pack_key
+from ygo.cards import CardTable, CARD_FIELDS, PRINTING_FIELDS
+from ygo import columnar
+from ygo import profiling
 
-def merge_csv_files(csv_directory, output_file):
+# 读取CSV时依次尝试的编码
+CSV_ENCODINGS = ['utf-8-sig', 'utf-8', 'gbk', 'gb2312']
+# 编码嗅探最多读取的字节数
+SNIFF_SIZE = 64 * 1024
+
+class EncodingCache:
+    """
+    持久化的编码缓存：文件路径 -> (mtime, 大小, 编码)，文件未变化时直接使用记录的编码
+    """
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.seen = set()
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            pass
+    
+    def get(self, csv_file):
+        entry = self.entries.get(csv_file)
+        if not entry:
+            return None
+        stat = os.stat(csv_file)
+        if entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            return entry[2]
+        return None
+    
+    def set(self, csv_file, encoding):
+        stat = os.stat(csv_file)
+        self.entries[csv_file] = [stat.st_mtime_ns, stat.st_size, encoding]
+        self.seen.add(csv_file)
+    
+    def save(self):
+        # 只保留本次用到的文件，已删除的CSV不再占用缓存
+        if self.seen:
+            self.entries = {path: self.entries[path] for path in self.seen}
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+def open_encoding_cache(csv_directory):
+    return EncodingCache(os.path.join(csv_directory, '.encoding_cache.json'))
+
+def sniff_encoding(sample, complete):
+    """
+    根据文件开头的样本判断编码：先看BOM，再依次尝试解码样本
+    
+    complete表示样本就是整个文件；否则样本末尾可能截断了多字节字符，按增量方式解码
+    """
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    for encoding in CSV_ENCODINGS:
+        try:
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=complete)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return None
+
+def detect_encoding(csv_file, cache=None):
+    """
+    返回CSV文件的编码：优先使用缓存，否则只读取开头SNIFF_SIZE字节嗅探
+    """
+    encoding = cache.get(csv_file) if cache is not None else None
+    if encoding:
+        return encoding
+    with open(csv_file, 'rb') as f:
+        sample = f.read(SNIFF_SIZE + 1)
+    return sniff_encoding(sample[:SNIFF_SIZE], len(sample) <= SNIFF_SIZE)
+
+def load_csv_text(csv_file, cache=None):
+    """
+    读取整个CSV文件并解码，返回 (文本, 编码)，无法解码时返回 (None, None)
+    
+    文件只读取一次；嗅探的编码解码失败时（样本之后出现了非法字节）在同一份字节上
+    尝试其余编码。换行符与文本模式读取一致地统一为\n
+    """
+    with open(csv_file, 'rb') as f:
+        content = f.read()
+    
+    encoding = cache.get(csv_file) if cache is not None else None
+    if not encoding:
+        encoding = sniff_encoding(content[:SNIFF_SIZE], len(content) <= SNIFF_SIZE)
+    candidates = [encoding] if encoding else []
+    candidates += [e for e in CSV_ENCODINGS if e != encoding]
+    
+    for encoding in candidates:
+        try:
+            text = content.decode(encoding)
+        except UnicodeDecodeError:
+            continue  # 尝试下一种编码
+        if cache is not None:
+            cache.set(csv_file, encoding)
+        return io.StringIO(text, newline=None).read(), encoding
+    return None, None
+
+def read_csv_header(csv_file, cache=None):
+    """
+    读取CSV文件的表头，返回 (编码, 字段名列表)，无法判断编码时返回 (None, None)
+    
+    只解码表头所在的开头部分，数据行留到写出时再读取
+    """
+    encoding = detect_encoding(csv_file, cache)
+    if encoding is None:
+        return None, None
+    try:
+        with open(csv_file, 'r', encoding=encoding) as f:
+            return encoding, next(csv.reader(f), None)
+    except UnicodeDecodeError:
+        # 表头都无法解码时交给load_csv_text在完整内容上重新判断
+        return encoding, None
+
+def merge_csv_files(csv_directory, output_file, verbose=False, timer=None):
     """
     合并csv_directory下所有CSV文件到一个输出文件，确保Excel兼容
     
+    流式处理：第一遍只读取各文件表头得到字段并集，第二遍逐行写出，
+    内存占用与CSV文件数量和行数无关
+    
     Args:
         csv_directory (str): CSV文件所在的根目录
         output_file (str): 合并后的输出文件路径
+        verbose (bool): 逐个文件输出读取结果，默认只输出汇总
+        timer (StageTimer): 记录每个文件的合并耗时和行数
     """
+    if timer is None:
+        timer = profiling.StageTimer('merge')
     
     # 查找所有CSV文件
     csv_files = glob.glob(os.path.join(csv_directory, "**", "*.csv"), recursive=True)
@@ -20,77 +150,85 @@ def merge_csv_files(csv_directory, output_file):
     
     print(f"找到 {len(csv_files)} 个CSV文件")
     
-    # 用于存储所有数据
-    all_data = []
-    # 存储字段名，确保一致性
-    fieldnames = set()
+    cache = open_encoding_cache(csv_directory)
     
-    # 读取所有CSV文件
+    # 第一遍：确定编码，收集字段名
+    readable_files = []
+    fieldnames = set()
     for csv_file in csv_files:
         try:
-            # 尝试多种编码方式读取
-            for encoding in ['utf-8-sig', 'utf-8', 'gbk', 'gb2312']:
-                try:
-                    with open(csv_file, 'r', encoding=encoding) as f:
-                        reader = csv.DictReader(f)
-                        
-                        # 获取字段名
-                        current_fields = reader.fieldnames
-                        if current_fields:
-                            fieldnames.update(current_fields)
-                        
-                        # 读取数据
-                        file_data = list(reader)
-                        all_data.extend(file_data)
-                        
-                        print(f"已读取: {csv_file} ({len(file_data)} 行, 编码: {encoding})")
-                        break  # 成功读取则跳出编码尝试循环
-                except UnicodeDecodeError:
-                    continue  # 尝试下一种编码
-            else:
+            encoding, header = read_csv_header(csv_file, cache)
+            if encoding is None:
                 # 所有编码都失败
                 print(f"警告: 无法读取文件 {csv_file}，尝试了所有编码方式")
-                
+                continue
+            if header:
+                fieldnames.update(header)
+            readable_files.append(csv_file)
         except Exception as e:
             print(f"读取文件 {csv_file} 时出错: {str(e)}")
     
-    if not all_data:
-        print("没有找到有效数据")
-        return
-    
     # 将set转换为list并排序，确保字段顺序一致
     fieldnames = sorted(list(fieldnames))
     
-    # 写入合并后的CSV文件，使用Excel兼容的编码
+    # 第二遍：逐行写入临时文件，成功后再替换输出文件
+    tmp_file = output_file + '.tmp'
+    total_rows = 0
     try:
-        # 方法1: 使用utf-8-sig (带BOM的UTF-8，Excel兼容)
-        with open(output_file, 'w', encoding='utf-8-sig', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
+        # 使用utf-8-sig (带BOM的UTF-8，Excel兼容)
+        with open(tmp_file, 'w', encoding='utf-8-sig', newline='') as f:
+            # 缺失字段写为空字符串，多余的值忽略
+            writer = csv.DictWriter(f, fieldnames=fieldnames, restval='', extrasaction='ignore')
             
             # 写入表头
             writer.writeheader()
             
-            # 写入所有数据
-            for row in all_data:
-                # 确保每一行都有所有字段，缺失字段设为空字符串
-                complete_row = {field: row.get(field, '') for field in fieldnames}
-                writer.writerow(complete_row)
+            for csv_file in readable_files:
+                try:
+                    started = time.perf_counter()
+                    # 整个文件先完成解码再写出，解码失败不会留下半个文件的数据
+                    text, encoding = load_csv_text(csv_file, cache)
+                    if text is None:
+                        print(f"警告: 无法读取文件 {csv_file}，尝试了所有编码方式")
+                        continue
+                    file_rows = 0
+                    for row in csv.DictReader(io.StringIO(text)):
+                        writer.writerow(row)
+                        file_rows += 1
+                    total_rows += file_rows
+                    timer.add('merge', time.perf_counter() - started, csv_file, len(text), file_rows)
+                    if verbose:
+                        print(f"已读取: {csv_file} ({file_rows} 行, 编码: {encoding})")
+                except Exception as e:
+                    print(f"读取文件 {csv_file} 时出错: {str(e)}")
+        
+        cache.save()
+        
+        if not total_rows:
+            os.remove(tmp_file)
+            print("没有找到有效数据")
+            return
         
-        print(f"合并完成！共 {len(all_data)} 行数据已保存到: {output_file}")
+        os.replace(tmp_file, output_file)
+        print(f"合并完成！共 {total_rows} 行数据已保存到: {output_file}")
         print(f"字段列表: {', '.join(fieldnames)}")
         print("文件已使用UTF-8 with BOM编码保存，可在Excel中直接打开")
         
     except Exception as e:
         print(f"写入合并文件时出错: {str(e)}")
 
-def merge_csv_files_simple(csv_directory, output_file):
+def merge_csv_files_simple(csv_directory, output_file, verbose=False, timer=None):
     """
     简化版本的合并函数，直接拼接文件内容，确保Excel兼容
     
     Args:
         csv_directory (str): CSV文件所在的根目录
         output_file (str): 合并后的输出文件路径
+        verbose (bool): 逐个文件输出读取结果，默认只输出汇总
+        timer (StageTimer): 记录每个文件的合并耗时
     """
+    if timer is None:
+        timer = profiling.StageTimer('merge')
     
     csv_files = glob.glob(os.path.join(csv_directory, "**", "*.csv"), recursive=True)
     
@@ -100,49 +238,56 @@ def merge_csv_files_simple(csv_directory, output_file):
     
     print(f"找到 {len(csv_files)} 个CSV文件")
     
+    cache = open_encoding_cache(csv_directory)
     first_file = True
     
     # 使用utf-8-sig编码确保Excel兼容
     with open(output_file, 'w', encoding='utf-8-sig', newline='') as outfile:
         for i, csv_file in enumerate(csv_files):
             try:
-                # 尝试多种编码方式读取
-                for encoding in ['utf-8-sig', 'utf-8', 'gbk', 'gb2312']:
-                    try:
-                        with open(csv_file, 'r', encoding=encoding) as infile:
-                            if first_file:
-                                # 第一个文件，包含表头
-                                outfile.write(infile.read())
-                                first_file = False
-                            else:
-                                # 后续文件，跳过表头
-                                lines = infile.readlines()
-                                if lines:  # 确保文件不为空
-                                    # 跳过第一行（表头），写入其余内容
-                                    outfile.writelines(lines[1:])
-                        
-                        print(f"已合并: {csv_file} (编码: {encoding})")
-                        break  # 成功读取则跳出编码尝试循环
-                    except UnicodeDecodeError:
-                        continue  # 尝试下一种编码
-                else:
+                started = time.perf_counter()
+                # 先完整解码，成功后才写出，不会写入半个文件
+                text, encoding = load_csv_text(csv_file, cache)
+                if text is None:
                     # 所有编码都失败
                     print(f"警告: 无法读取文件 {csv_file}，尝试了所有编码方式")
+                    continue
+                
+                if first_file:
+                    # 第一个文件，包含表头
+                    outfile.write(text)
+                    first_file = False
+                else:
+                    # 后续文件，跳过表头
+                    lines = io.StringIO(text).readlines()
+                    if lines:  # 确保文件不为空
+                        # 跳过第一行（表头），写入其余内容
+                        outfile.writelines(lines[1:])
+                
+                timer.add('merge', time.perf_counter() - started, csv_file, len(text))
+                if verbose:
+                    print(f"已合并: {csv_file} (编码: {encoding})")
                     
             except Exception as e:
                 print(f"处理文件 {csv_file} 时出错: {str(e)}")
     
+    cache.save()
+    
     print(f"简化合并完成！输出文件: {output_file}")
     print("文件已使用UTF-8 with BOM编码保存，可在Excel中直接打开")
 
-def merge_csv_with_pandas(csv_directory, output_file):
+def merge_csv_with_pandas(csv_directory, output_file, verbose=False, timer=None):
     """
-    使用pandas合并CSV文件，确保Excel兼容
+    使用pandas合并CSV文件，确保Excel兼容，同一时间只在内存中保留一个DataFrame
     
     Args:
         csv_directory (str): CSV文件所在的根目录
         output_file (str): 合并后的输出文件路径
+        verbose (bool): 逐个文件输出读取结果，默认只输出汇总
+        timer (StageTimer): 记录每个文件的合并耗时和行数
     """
+    if timer is None:
+        timer = profiling.StageTimer('merge')
     try:
         import pandas as pd
     except ImportError:
@@ -157,43 +302,181 @@ def merge_csv_with_pandas(csv_directory, output_file):
     
     print(f"找到 {len(csv_files)} 个CSV文件")
     
-    # 读取所有CSV文件到DataFrame列表
-    dataframes = []
+    cache = open_encoding_cache(csv_directory)
+    
+    # 第一遍只读表头，按首次出现的顺序确定列（与concat(sort=False)一致）
+    readable_files = []
+    columns = []
     for csv_file in csv_files:
         try:
-            # 尝试多种编码方式
-            for encoding in ['utf-8-sig', 'utf-8', 'gbk', 'gb2312']:
-                try:
-                    df = pd.read_csv(csv_file, encoding=encoding)
-                    dataframes.append(df)
-                    print(f"已读取: {csv_file} ({len(df)} 行, {len(df.columns)} 列, 编码: {encoding})")
-                    break
-                except UnicodeDecodeError:
-                    continue
-            else:
+            encoding, header = read_csv_header(csv_file, cache)
+            if encoding is None:
                 print(f"警告: 无法读取文件 {csv_file}，尝试了所有编码方式")
-                
+                continue
+            for column in header or []:
+                if column not in columns:
+                    columns.append(column)
+            readable_files.append(csv_file)
         except Exception as e:
             print(f"读取文件 {csv_file} 时出错: {str(e)}")
     
-    if not dataframes:
+    # 第二遍每次只读一个DataFrame，对齐列后追加写出
+    tmp_file = output_file + '.tmp'
+    total_rows = 0
+    header_written = False
+    # 使用utf-8-sig确保Excel兼容，文件只打开一次，BOM只写一次
+    with open(tmp_file, 'w', encoding='utf-8-sig', newline='') as f:
+        for csv_file in readable_files:
+            try:
+                started = time.perf_counter()
+                text, encoding = load_csv_text(csv_file, cache)
+                if text is None:
+                    print(f"警告: 无法读取文件 {csv_file}，尝试了所有编码方式")
+                    continue
+                # 全部按字符串读取：逐文件推断类型时，同一列在有空值的文件中会变成浮点数（如1200.0），
+                # 卡片密码的前导零也会丢失
+                df = pd.read_csv(io.StringIO(text), dtype=str, keep_default_na=False)
+                df.reindex(columns=columns).to_csv(f, index=False, header=not header_written)
+                header_written = True
+                total_rows += len(df)
+                timer.add('merge', time.perf_counter() - started, csv_file, len(text), len(df))
+                if verbose:
+                    print(f"已读取: {csv_file} ({len(df)} 行, {len(df.columns)} 列, 编码: {encoding})")
+            except Exception as e:
+                print(f"读取文件 {csv_file} 时出错: {str(e)}")
+    
+    cache.save()
+    
+    if not total_rows:
+        os.remove(tmp_file)
         print("没有找到有效数据")
         return
     
-    # 合并所有DataFrame
-    merged_df = pd.concat(dataframes, ignore_index=True, sort=False)
-    
-    # 保存合并后的CSV，使用utf-8-sig确保Excel兼容
-    merged_df.to_csv(output_file, index=False, encoding='utf-8-sig')
+    os.replace(tmp_file, output_file)
     
-    print(f"Pandas合并完成！共 {len(merged_df)} 行数据已保存到: {output_file}")
-    print(f"字段列表: {', '.join(merged_df.columns.tolist())}")
+    print(f"Pandas合并完成！共 {total_rows} 行数据已保存到: {output_file}")
+    print(f"字段列表: {', '.join(columns)}")
     print("文件已使用UTF-8 with BOM编码保存，可在Excel中直接打开")
 
+def printings_file_for(output_file):
+    """
+    去重合并时收录表的文件名，如 merged_cards_unique.csv -> merged_cards_unique_printings.csv
+    """
+    return os.path.splitext(output_file)[0] + '_printings.csv'
+
+def merge_csv_files_dedup(csv_directory, output_file, verbose=False, timer=None):
+    """
+    去重合并：卡牌信息（含卡牌文本）每张卡只写一次，每次收录另写一行到收录表
+    
+    卡牌按卡包CSV中的卡片密码去重，没有密码的卡牌（如旧版本3解析卡包.py生成的CSV）按卡名去重，
+    同名的不同卡牌会被合并为一张。
+    收录表记录卡牌ID、卡包、卡牌编码、罕贵度，更新日期取自清单中该卡包解析时的页面日期。
+    收录逐行写出，内存中只保留去重后的卡牌
+    
+    Args:
+        csv_directory (str): CSV文件所在的根目录
+        output_file (str): 卡牌表的输出路径，收录表写到同名加_printings的文件
+        verbose (bool): 逐个文件输出读取结果，默认只输出汇总
+        timer (StageTimer): 记录每个文件的合并耗时和行数
+    """
+    if timer is None:
+        timer = profiling.StageTimer('merge')
+    
+    csv_files = sorted(glob.glob(os.path.join(csv_directory, "**", "*.csv"), recursive=True))
+    
+    if not csv_files:
+        print(f"在目录 {csv_directory} 中未找到CSV文件")
+        return
+    
+    print(f"找到 {len(csv_files)} 个CSV文件")
+    
+    cache = open_encoding_cache(csv_directory)
+    manifest = Manifest()
+    table = CardTable()
+    printings_file = printings_file_for(output_file)
+    tmp_cards = output_file + '.tmp'
+    tmp_printings = printings_file + '.tmp'
+    total_rows = 0
+    
+    try:
+        with open(tmp_printings, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['卡牌ID', '卡包'] + PRINTING_FIELDS + ['更新日期'])
+            
+            for csv_file in csv_files:
+                try:
+                    started = time.perf_counter()
+                    text, encoding = load_csv_text(csv_file, cache)
+                    if text is None:
+                        print(f"警告: 无法读取文件 {csv_file}，尝试了所有编码方式")
+                        continue
+                    
+                    # 卡包用CSV的相对路径表示，与清单中HTML的键对应
+                    pack = pack_key(os.path.splitext(os.path.relpath(csv_file, csv_directory))[0])
+                    update_date = manifest.packs.get(pack + '.html', {}).get('update_date') or ''
+                    
+                    file_rows = 0
+                    for row in csv.DictReader(io.StringIO(text)):
+                        card_id = table.add(row, pack)
+                        writer.writerow([card_id, pack] + [row.get(field) or '' for field in PRINTING_FIELDS] + [update_date])
+                        file_rows += 1
+                    total_rows += file_rows
+                    timer.add('merge', time.perf_counter() - started, csv_file, len(text), file_rows)
+                    if verbose:
+                        print(f"已读取: {csv_file} ({file_rows} 行, 编码: {encoding})")
+                except Exception as e:
+                    print(f"读取文件 {csv_file} 时出错: {str(e)}")
+        
+        cache.save()
+        
+        if not total_rows:
+            os.remove(tmp_printings)
+            print("没有找到有效数据")
+            return
+        
+        with open(tmp_cards, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['卡牌ID'] + CARD_FIELDS)
+            for card_id, values in table.rows():
+                writer.writerow((card_id,) + values)
+        
+        os.replace(tmp_cards, output_file)
+        os.replace(tmp_printings, printings_file)
+        print(f"去重合并完成！{len(table)} 张卡牌已保存到: {output_file}")
+        print(f"{total_rows} 条收录已保存到: {printings_file}")
+        print("文件已使用UTF-8 with BOM编码保存，可在Excel中直接打开")
+        
+    except Exception as e:
+        print(f"写入合并文件时出错: {str(e)}")
+
+def export_columnar(output_file, fmt):
+    """
+    将合并后的CSV另存为列式文件（Parquet/Arrow），需要安装pyarrow
+    """
+    try:
+        import pyarrow
+    except ImportError:
+        print("pyarrow库未安装，跳过列式输出，请安装pyarrow: pip install pyarrow")
+        return
+    
+    columnar_file = os.path.splitext(output_file)[0] + columnar.FORMATS[fmt]
+    rows = columnar.csv_to_columnar(output_file, columnar_file, fmt)
+    print(f"列式文件已保存: {columnar_file} ({rows} 行)")
+
 def main():
     """
     主函数，提供多种合并方法供选择
     """
+    parser = argparse.ArgumentParser(description="合并卡包CSV文件")
+    parser.add_argument('--incremental', action='store_true', help="CSV文件自上次合并后没有变化时跳过合并")
+    parser.add_argument('--columnar', choices=list(columnar.FORMATS), default=None,
+                        help="同时输出列式文件（parquet或arrow），需要安装pyarrow")
+    parser.add_argument('--verbose', action='store_true', help="逐个文件输出读取结果，默认只输出汇总")
+    parser.add_argument('--report', metavar='JSON', help="将每个文件的合并耗时和行数写入JSON报告")
+    parser.add_argument('--profile', metavar='FILE',
+                        help="记录函数级性能数据：.html结尾时用pyinstrument，否则保存cProfile的pstats文件")
+    args = parser.parse_args()
+    
     # 配置路径
     csv_directory = "csv_directory"  # 替换为实际的CSV目录路径
     
@@ -201,22 +484,54 @@ def main():
     print("1. 完整合并（处理字段不一致）")
     print("2. 简化合并（快速，假设结构相同）")
     print("3. 使用Pandas合并（需要安装pandas）")
+    print("4. 去重合并（卡牌与收录分开保存，体积更小）")
     
-    choice = input("请输入选择 (1/2/3): ").strip()
+    choice = input("请输入选择 (1/2/3/4): ").strip()
     
     if choice == "1":
         output_file = "merged_cards.csv"
-        merge_csv_files(csv_directory, output_file)
+        merge = merge_csv_files
     elif choice == "2":
         output_file = "merged_cards_simple.csv"
-        merge_csv_files_simple(csv_directory, output_file)
+        merge = merge_csv_files_simple
     elif choice == "3":
         output_file = "merged_cards_pandas.csv"
-        merge_csv_with_pandas(csv_directory, output_file)
+        merge = merge_csv_with_pandas
+    elif choice == "4":
+        output_file = "merged_cards_unique.csv"
+        merge = merge_csv_files_dedup
     else:
         print("无效选择，使用默认方法1")
         output_file = "merged_cards.csv"
-        merge_csv_files(csv_directory, output_file)
+        merge = merge_csv_files
+    
+    timer = profiling.StageTimer('merge')
+    
+    def run_merge():
+        with profiling.profiled(args.profile):
+            merge(csv_directory, output_file, verbose=args.verbose, timer=timer)
+        report = timer.write(args.report) if args.report else timer.report()
+        print(profiling.summary(report))
+    
+    if not args.incremental:
+        run_merge()
+        if args.columnar and os.path.exists(output_file):
+            export_columnar(output_file, args.columnar)
+        return
+    
+    # 增量模式：只有CSV文件增删或内容变化时才重新合并
+    manifest = Manifest()
+    csv_files = sorted(glob.glob(os.path.join(csv_directory, "**", "*.csv"), recursive=True))
+    if os.path.exists(output_file) and manifest.inputs_unchanged(output_file, csv_files):
+        print(f"CSV文件自上次合并后没有变化，跳过: {output_file}")
+        return
+    
+    run_merge()
+    if os.path.exists(output_file):
+        manifest.record_inputs(output_file, csv_files)
+        manifest.save()
+        if args.columnar:
+            export_columnar(output_file, args.columnar)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,20 +1,29 @@
 import os
 import csv
-from bs4 import BeautifulSoup
+import json
+import argparse
+import importlib
 import re
+from ygo import html_store
+from ygo import extract
+from ygo import menu_diff
+from ygo import profiling
+from ygo.manifest import pack_key
+from ygo.snapshots import SnapshotStore, MENU_NAME
 
 def parse_yugioh_pack_html(file_path, filename):
     """
     解析游戏王卡包HTML文件，提取卡包名、发售日期、卡片数量和卡包缩写
     """
+    from bs4 import BeautifulSoup
+    
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            html_content = file.read()
+        html_content = html_store.read_html(file_path)
         
         soup = BeautifulSoup(html_content, 'html.parser')
         
         # 提取卡包名（使用文件名作为卡包名）
-        pack_name = os.path.splitext(filename)[0]
+        pack_name = html_store.strip_html_suffix(filename)
         
         # 提取发售日期
         date_element = soup.find('time', {'class': ['entry-date', 'date', 'published', 'updated']})
@@ -52,7 +61,7 @@ def parse_yugioh_pack_html(file_path, filename):
         
         # 方法2: 如果没有找到，从文件名中提取（假设文件名就是缩写）
         if pack_abbreviation == "未知":
-            pack_abbreviation = os.path.splitext(filename)[0].lower()
+            pack_abbreviation = html_store.strip_html_suffix(filename).lower()
         
         return {
             'pack_name': pack_name,
@@ -66,30 +75,149 @@ def parse_yugioh_pack_html(file_path, filename):
         print(f"解析文件 {file_path} 时出错: {e}")
         return None
 
+def extract_pack_metadata(file_path, filename):
+    """
+    快速提取卡包信息，结果与parse_yugioh_pack_html相同，只读取页面开头到所需字段为止
+    """
+    try:
+        with html_store.open_html(file_path) as f:
+            return extract.scan_pack_info(f, file_path, filename)
+    except Exception as e:
+        print(f"解析文件 {file_path} 时出错: {e}")
+        return None
+
+def load_menu(source):
+    """
+    读取目录结构：ygo_structure.json格式的文件、目录页HTML文件（如menu_202002.html），
+    或快照库中某一日期（如2020-02）的目录页
+    """
+    if source.endswith('.json'):
+        with open(source, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    if os.path.exists(source):
+        html_content = html_store.read_html(source)
+    else:
+        store = SnapshotStore()
+        try:
+            digest = store.as_of(source, MENU_NAME).get(MENU_NAME)
+            content = store.get(digest) if digest else None
+        finally:
+            store.close()
+        if content is None:
+            raise ValueError(f"找不到文件 {source}，快照库中也没有该日期的目录页")
+        html_content = content.decode('utf-8')
+    return importlib.import_module('1下载目录').parse_ygo_html(html_content)
+
+def diff_menu_files(old_source, new_source, delta_file):
+    """
+    比较两个目录，输出差异报告，并把需要重新下载和解析的卡包写入delta_file
+    （2爬虫.py --delta 只下载这些卡包，--apply-delta 只更新这些卡包的信息）
+    """
+    old_data = load_menu(old_source)
+    new_data = load_menu(new_source)
+    diff = menu_diff.diff_menus(old_data, new_data)
+    for line in menu_diff.format_diff(diff):
+        print(line)
+    
+    delta = {
+        'old': old_source,
+        'new': new_source,
+        'diff': diff,
+        'structure': menu_diff.filter_menu(new_data, menu_diff.changed_hrefs(diff)),
+    }
+    with open(delta_file, 'w', encoding='utf-8') as f:
+        json.dump(delta, f, ensure_ascii=False, indent=2)
+    print(f"差异已保存到 {delta_file}")
+
+def apply_delta(delta_file, html_directory, output_csv):
+    """
+    只重新提取差异中卡包的信息，更新已有的卡包信息CSV；删除、改名、移动前的旧路径从CSV中去掉
+    """
+    crawler = importlib.import_module('2爬虫')
+    with open(delta_file, 'r', encoding='utf-8') as f:
+        delta = json.load(f)
+    diff = delta['diff']
+    
+    def pack_path(category, series, title):
+        return pack_key(os.path.join(html_directory, crawler.sanitize_filename(category),
+                                     crawler.sanitize_filename(series), crawler.sanitize_filename(title) + '.html'))
+    
+    stale = {pack_path(pack['category'], pack['series'], pack['title']) for pack in diff['removed']}
+    stale.update(pack_path(pack['category'], pack['series'], pack['old_title']) for pack in diff['renamed'])
+    stale.update(pack_path(pack['old_category'], pack['old_series'], pack['title']) for pack in diff['moved'])
+    targets = [job[3] for job in crawler.iter_package_jobs(delta['structure'], html_directory)]
+    stale.update(pack_key(path) for path in targets)
+    
+    pack_info_list = []
+    if os.path.exists(output_csv):
+        with open(output_csv, 'r', newline='', encoding='utf-8-sig') as csvfile:
+            pack_info_list = [row for row in csv.DictReader(csvfile)
+                              if pack_key(html_store.logical_path(row['file_path'])) not in stale]
+    kept = len(pack_info_list)
+    
+    for path in targets:
+        file_path = html_store.find_html(path)
+        if file_path is None:
+            print(f"未下载，跳过: {path}")
+            continue
+        pack_info = extract_pack_metadata(file_path, os.path.basename(file_path))
+        if pack_info:
+            pack_info_list.append(pack_info)
+    
+    with open(output_csv, 'w', newline='', encoding='utf-8-sig') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=extract.PACK_INFO_FIELDS)
+        writer.writeheader()
+        writer.writerows(pack_info_list)
+    print(f"已更新 {len(pack_info_list) - kept} 个卡包信息，保留 {kept} 个，已保存到 {output_csv}")
+
 def main():
+    parser = argparse.ArgumentParser(description="提取卡包信息；或比较两个目录，只处理变化的卡包")
+    parser.add_argument('--diff', nargs=2, metavar=('OLD', 'NEW'),
+                        help="比较两个目录：ygo_structure.json、目录页HTML（如menu_202002.html）或快照日期（如2020-02）")
+    parser.add_argument('--delta', default='ygo_delta.json', help="--diff的输出文件")
+    parser.add_argument('--apply-delta', metavar='DELTA', help="只更新差异文件中卡包的信息")
+    parser.add_argument('--verbose', action='store_true', help="逐个输出处理的文件")
+    parser.add_argument('--report', metavar='JSON', help="将每个文件的提取耗时写入JSON报告")
+    parser.add_argument('--profile', metavar='FILE',
+                        help="记录函数级性能数据：.html结尾时用pyinstrument，否则保存cProfile的pstats文件")
+    args = parser.parse_args()
+    
     html_directory = 'ygo_packages'  # 修改为你的目录路径
     output_csv = 'yugioh_pack_info.csv'
     
+    if args.diff:
+        diff_menu_files(args.diff[0], args.diff[1], args.delta)
+        return
+    if args.apply_delta:
+        apply_delta(args.apply_delta, html_directory, output_csv)
+        return
+    
     # 存储所有卡包信息
     pack_info_list = []
+    timer = profiling.StageTimer('packinfo')
     
     # 遍历目录
-    for root, dirs, files in os.walk(html_directory):
-        for file in files:
-            if file.endswith('.html'):
-                file_path = os.path.join(root, file)
-                print(f"正在处理: {file_path}")
-                
-                # 解析HTML文件
-                pack_info = parse_yugioh_pack_html(file_path, file)
-                if pack_info:
-                    pack_info_list.append(pack_info)
+    with profiling.profiled(args.profile):
+        for root, dirs, files in os.walk(html_directory):
+            for file in html_store.unique_html_files(files):
+                if html_store.is_html_file(file):
+                    file_path = os.path.join(root, file)
+                    if args.verbose:
+                        print(f"正在处理: {file_path}")
+                    
+                    # 解析HTML文件
+                    with timer.stage('extract', file_path, rows=1):
+                        pack_info = extract_pack_metadata(file_path, file)
+                    if pack_info:
+                        pack_info_list.append(pack_info)
+    report = timer.write(args.report) if args.report else timer.report()
+    print(profiling.summary(report))
     
     # 写入CSV文件
     if pack_info_list:
         with open(output_csv, 'w', newline='', encoding='utf-8-sig') as csvfile:
-            fieldnames = ['pack_name', 'pack_abbreviation', 'release_date', 'card_count', 'file_path']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            writer = csv.DictWriter(csvfile, fieldnames=extract.PACK_INFO_FIELDS)
             
             writer.writeheader()
             for pack_info in pack_info_list:
@@ -0,0 +1,182 @@
+import os
+import csv
+import sqlite3
+import argparse
+from ygo import html_store
+from ygo.cards import CARD_FIELDS, card_key
+
+SCHEMA = """
+CREATE TABLE packs (
+    pack_id INTEGER PRIMARY KEY,
+    pack_path TEXT NOT NULL UNIQUE,
+    pack_name TEXT NOT NULL,
+    pack_abbreviation TEXT,
+    release_date TEXT,
+    card_count TEXT
+);
+CREATE TABLE cards (
+    card_id INTEGER PRIMARY KEY,
+    卡片密码 TEXT,
+    卡名 TEXT NOT NULL,
+    卡牌类别 TEXT,
+    属性 TEXT,
+    等级 TEXT,
+    种族 TEXT,
+    攻击力 TEXT,
+    防御力 TEXT,
+    卡牌文本 TEXT
+);
+CREATE TABLE printings (
+    printing_id INTEGER PRIMARY KEY,
+    card_id INTEGER NOT NULL REFERENCES cards(card_id),
+    pack_id INTEGER NOT NULL REFERENCES packs(pack_id),
+    卡牌编码 TEXT,
+    罕贵度 TEXT
+);
+"""
+
+# 批量插入完成后再建索引，比边插入边维护索引快
+INDEXES = """
+CREATE INDEX idx_cards_passcode ON cards(卡片密码);
+CREATE INDEX idx_cards_name ON cards(卡名);
+CREATE INDEX idx_printings_number ON printings(卡牌编码);
+CREATE INDEX idx_printings_card ON printings(card_id);
+CREATE INDEX idx_printings_pack ON printings(pack_id);
+CREATE INDEX idx_packs_abbreviation ON packs(pack_abbreviation);
+"""
+
+def pack_path_key(relative_path):
+    """
+    卡包的统一键：相对路径去掉后缀，分隔符统一为「/」
+    """
+    relative_path = relative_path.replace(os.sep, '/')
+    if relative_path.endswith('.csv'):
+        return relative_path[:-len('.csv')]
+    return html_store.strip_html_suffix(relative_path)
+
+def load_pack_info(pack_info_csv, html_dir):
+    """
+    读取5发现新包.py输出的卡包信息，返回 {卡包键: 信息}；文件不存在时返回空字典
+    """
+    if not pack_info_csv or not os.path.exists(pack_info_csv):
+        return {}
+
+    pack_info = {}
+    with open(pack_info_csv, 'r', encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f, restval=''):
+            key = pack_path_key(os.path.relpath(row['file_path'], html_dir))
+            pack_info[key] = row
+    return pack_info
+
+def list_pack_csvs(csv_dir):
+    """
+    按路径排序列出3解析卡包.py输出的CSV，返回 [(卡包键, 文件路径)]
+    """
+    return sorted(
+        (pack_path_key(os.path.relpath(os.path.join(root, file), csv_dir)), os.path.join(root, file))
+        for root, dirs, files in os.walk(csv_dir)
+        for file in files
+        if file.endswith('.csv')
+    )
+
+def create_fts(conn):
+    """
+    为卡牌文本建立FTS5全文索引；日文没有空格分词，优先用trigram分词器，
+    不支持时退回默认分词器，FTS5不可用时跳过
+    """
+    for tokenize in ("'trigram'", "'unicode61'"):
+        try:
+            conn.execute(f"CREATE VIRTUAL TABLE cards_fts USING fts5("
+                         f"卡牌文本, content='cards', content_rowid='card_id', tokenize={tokenize})")
+        except sqlite3.OperationalError:
+            continue
+        conn.execute("INSERT INTO cards_fts(cards_fts) VALUES ('rebuild')")
+        return tokenize.strip("'")
+    print("当前SQLite不支持FTS5，跳过卡牌文本的全文索引")
+    return None
+
+def build_database(csv_dir, db_path, pack_info=None):
+    """
+    把各卡包CSV导入SQLite数据库，返回 (卡包数, 卡牌数, 收录数)
+
+    同一张卡在多个卡包中重复出现时只保存一次（以先出现的为准），每次收录记在printings表；
+    卡牌按CSV中的卡片密码区分，没有密码的卡牌（如旧版本3解析卡包.py生成的CSV）按卡名区分；
+    先写入临时文件，全部完成后再替换原数据库
+    """
+    pack_info = pack_info or {}
+    tmp_path = db_path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(SCHEMA)
+        card_ids = {}
+        pack_count = printing_count = 0
+
+        with conn:
+            for key, csv_file in list_pack_csvs(csv_dir):
+                try:
+                    # 列数不足的行（如手工编辑过的CSV）缺少的字段为空字符串，而不是None
+                    with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+                        rows = list(csv.DictReader(f, restval=''))
+                except Exception as e:
+                    print(f"读取文件 {csv_file} 时出错: {str(e)}")
+                    continue
+
+                info = pack_info.get(key, {})
+                pack_name = info.get('pack_name') or key.rsplit('/', 1)[-1]
+                abbreviation = info.get('pack_abbreviation')
+                if not abbreviation and rows and '-' in rows[0].get('卡牌编码', ''):
+                    # 没有卡包信息时取卡牌编码的前缀，与网站地址中的写法一致
+                    abbreviation = rows[0]['卡牌编码'].split('-')[0].lower()
+
+                cursor = conn.execute(
+                    "INSERT INTO packs (pack_path, pack_name, pack_abbreviation, release_date, card_count) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, pack_name, abbreviation, info.get('release_date'), info.get('card_count')))
+                pack_id = cursor.lastrowid
+                pack_count += 1
+
+                for row in rows:
+                    ck = card_key(row, key)
+                    card_id = card_ids.get(ck)
+                    if card_id is None:
+                        cursor = conn.execute(
+                            f"INSERT INTO cards ({', '.join(CARD_FIELDS)}) VALUES ({', '.join('?' * len(CARD_FIELDS))})",
+                            [row.get(field, '') for field in CARD_FIELDS])
+                        card_id = card_ids[ck] = cursor.lastrowid
+
+                    conn.execute(
+                        "INSERT INTO printings (card_id, pack_id, 卡牌编码, 罕贵度) VALUES (?, ?, ?, ?)",
+                        (card_id, pack_id, row.get('卡牌编码', ''), row.get('罕贵度', '')))
+                    printing_count += 1
+
+            conn.executescript(INDEXES)
+            create_fts(conn)
+
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, db_path)
+    return pack_count, len(card_ids), printing_count
+
+def main():
+    parser = argparse.ArgumentParser(description="把解析出的卡牌和卡包信息导出到SQLite数据库")
+    parser.add_argument('--csv-dir', default='csv_directory', help="3解析卡包.py输出的CSV目录")
+    parser.add_argument('--html-dir', default='ygo_packages',
+                        help="卡包HTML目录，用于对应卡包信息中的文件路径")
+    parser.add_argument('--pack-info', default='yugioh_pack_info.csv', help="5发现新包.py输出的卡包信息CSV")
+    parser.add_argument('--db', default='ygo.db', help="输出的数据库文件")
+    args = parser.parse_args()
+
+    pack_info = load_pack_info(args.pack_info, args.html_dir)
+    if not pack_info:
+        print(f"未找到卡包信息 {args.pack_info}，卡包缩写取自卡牌编码")
+
+    packs, cards, printings = build_database(args.csv_dir, args.db, pack_info)
+    print(f"已导出到 {args.db}: {packs} 个卡包, {cards} 张卡牌, {printings} 条收录")
+
+if __name__ == "__main__":
+    main()
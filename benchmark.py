@@ -0,0 +1,764 @@
+"""
+性能测试：在仓库自带的 html/ 语料上测量各实现的速度，并检查不同实现的输出是否一致
+
+用法:
+    python benchmark.py                 运行全部测试，并与基准结果比较
+    python benchmark.py parse --limit 50
+    python benchmark.py --save-baseline 将本次结果保存为新的基准
+    python benchmark.py --memory        同时用tracemalloc测量每项的Python内存峰值（会变慢）
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import importlib
+import tracemalloc
+from ygo import profiling
+from ygo import menu_diff
+from tests.stub_server import ThrottlingStub, corpus_files
+
+HTML_DIR = 'html'
+MENU_FILES = ['menu_202002.html', 'menu_202003.html']
+REFERENCE_YGO_CSV = 'ygo.csv'
+BASELINE_FILE = 'benchmark_baseline.json'
+# 各编号脚本，导入时只定义函数，不应加载重量级依赖
+SCRIPTS = ['1下载目录', '2爬虫', '3解析卡包', '4合并', '5发现新包', '6导出数据库']
+# 只在需要时才导入的依赖
+HEAVY_MODULES = ('requests', 'bs4', 'lxml', 'pandas', 'pyarrow')
+# python -m ygo 的快速查询命令的模块导入耗时上限（秒）
+IMPORT_BUDGET = 0.03
+
+# 本次运行的结果：'测试名/项目' -> 指标
+RESULTS = {}
+# 本次运行中未通过的检查，有任何一项时以非零状态退出
+FAILURES = []
+_current = None
+_last_peak = None
+
+def load_script(name):
+    """
+    导入编号脚本（文件名以数字开头，不能直接import）
+    """
+    return importlib.import_module(name)
+
+def list_html_files(html_dir=HTML_DIR, limit=None, biggest=None):
+    """
+    列出语料文件；biggest指定时只取最大的N个卡包页面
+    """
+    files = corpus_files(step=0 if biggest else 1, biggest=biggest or 0, html_dir=html_dir)
+    return files[:limit] if limit else files
+
+def copy_corpus(files, tmp_dir):
+    """
+    把选中的语料文件按原目录结构复制到临时目录，返回该目录
+    """
+    import shutil
+    html_dir = os.path.join(tmp_dir, 'html')
+    for path in files:
+        target = os.path.join(html_dir, os.path.relpath(path, HTML_DIR))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(path, target)
+    return html_dir
+
+def timed(func, *args):
+    """
+    运行并计时；开启了tracemalloc时同时记录这次调用新增的Python内存峰值，由下一次report输出
+    """
+    global _last_peak
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    result = func(*args)
+    seconds = time.perf_counter() - start
+    # 只计这次调用新分配的内存
+    _last_peak = tracemalloc.get_traced_memory()[1] - before if tracing else None
+    return result, seconds
+
+def fail(message):
+    """
+    输出一项未通过的检查并记入FAILURES
+    """
+    print(f"  ✗ {message}")
+    FAILURES.append(f"{_current}: {message}")
+
+def report(name, seconds, files=None, rows=None):
+    """
+    输出一项结果并记入RESULTS，用于保存基准和比较
+    """
+    global _last_peak
+    result = {'seconds': seconds}
+    line = f"  {name:<28} {seconds:8.3f}s"
+    if files:
+        result['files_per_second'] = files / seconds
+        line += f"  {files / seconds:9.1f} 文件/秒"
+    if rows:
+        result['rows_per_second'] = rows / seconds
+        line += f"  {rows / seconds:10.1f} 行/秒"
+    if _last_peak is not None:
+        result['python_peak'] = _last_peak
+        line += f"  {_last_peak / 1024 / 1024:7.1f} MB"
+        _last_peak = None
+    print(line)
+    RESULTS[f"{_current}/{name}"] = result
+
+def bench_parse(files):
+    """
+    parse_card_info：比较各解析后端，输出必须完全一致
+    """
+    from ygo import html_store
+    parser = load_script('3解析卡包')
+    backends = [b for b in parser.PARSER_BACKENDS if b != 'lxml' or parser.lxml_available()]
+    
+    contents = [html_store.read_html(path) for path in files]
+    totals = {}
+    results = {}
+    for backend in backends:
+        results[backend], totals[backend] = timed(
+            lambda: [parser.parse_card_info(content, backend) for content in contents])
+    
+    reference = results[backends[0]]
+    for backend in backends[1:]:
+        mismatched = [path for path, a, b in zip(files, reference, results[backend]) if a != b]
+        if mismatched:
+            fail(f"{backend} 与 {backends[0]} 输出不一致: {len(mismatched)} 个文件，例如 {mismatched[0]}")
+        else:
+            print(f"  ✓ {backend} 与 {backends[0]} 输出一致")
+    
+    rows = sum(len(cards) for cards in reference)
+    for backend in backends:
+        report(backend, totals[backend], len(files), rows)
+
+def ygo_csv_lines(files):
+    """
+    main.py写入ygo.csv的行；分类、系列、卡包名取自页面相对于HTML_DIR的路径
+    """
+    from ygo import extract, html_store
+    lines = []
+    for path in files:
+        rows = extract.ygo_rows(html_store.read_html(path))
+        if rows is None:
+            continue
+        *dirs, pk_name = html_store.strip_html_suffix(os.path.relpath(path, HTML_DIR)).replace(os.sep, '/').split('/')
+        lines.extend(extract.ygo_line(row, dirs[0] if dirs else '', '/'.join(dirs[1:]), pk_name) for row in rows)
+    return lines
+
+def append_lines(path, lines, encoding='utf-8'):
+    """
+    旧的写法：每行都重新打开一次文件追加，仅用于与export.write_lines对比
+    """
+    count = 0
+    with open(path, 'w', encoding=encoding) as f:
+        f.write('')
+    for line in lines:
+        with open(path, 'a', encoding=encoding) as f:
+            f.write(line + '\n')
+        count += 1
+    return count
+
+def bench_export(files):
+    """
+    ygo.csv导出：比较逐行重新打开追加与单个缓冲句柄原子写入，输出必须完全一致
+    """
+    import tempfile
+    from ygo import export
+    
+    lines = ygo_csv_lines(files)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        outputs = {}
+        for name, writer in [('逐行追加', append_lines), ('缓冲原子写入', export.write_lines)]:
+            path = os.path.join(tmp_dir, name + '.csv')
+            rows, seconds = timed(writer, path, lines)
+            report(name, seconds, len(files), rows)
+            with open(path, 'rb') as f:
+                outputs[name] = f.read()
+    
+    first, second = outputs.values()
+    if first == second:
+        print("  ✓ 两种写法输出一致")
+    else:
+        fail("两种写法输出不一致")
+
+def rarity_texts(files):
+    """
+    语料中出现的所有罕贵度文本：main.py取法得到的文本，以及parse_card_info得到的罕贵度名称
+    """
+    import re
+    from ygo import html_store
+    parser = load_script('3解析卡包')
+    rare_pattern = re.compile('> ?([^<>p]+?)<')
+    
+    texts = []
+    for path in files:
+        page = html_store.read_html(path)
+        # 与main.py相同的取法：card-rare到card-info之间的文本用「|」连接
+        for cd in page.split('<div id="list">')[-1].split('card-number')[1:]:
+            if 'card-rare' in cd:
+                texts.append('|'.join(rare_pattern.findall(cd.split('card-rare')[1].split('card-info')[0])))
+        # parse_card_info得到的罕贵度名称
+        for card in parser.parse_card_info(page):
+            texts.extend(card.get('罕贵度', '').split(' / '))
+    return texts
+
+def normalize_rarity_legacy(text):
+    """
+    旧的逐个str.replace写法，替换顺序不能改变，仅用于与rarity.normalize_rarity的一致性检查和性能对比
+    """
+    text = text.replace('？','')
+    text = text.replace('ノーマルレア','NR')
+    text = text.replace('ノーマル','N')
+    text = text.replace('レア','R')
+    text = text.replace('スーパー','SR')
+    text = text.replace('ゴールド','G')
+    text = text.replace('ウルトラ','UR')
+    text = text.replace('アルティメット','UTR')
+    text = text.replace('パラレル','P')
+    text = text.replace('シークレット','SER')
+    text = text.replace('ホログラフィック','HR')
+    text = text.replace('コレクターズ','CR')
+    text = text.replace('ミレニアム','M')
+    text = text.replace('エクストラ','E')
+    text = text.replace('プレミアム','PP')
+    text = text.replace('プラズマティック','P')
+    return text
+
+def bench_rarity(files):
+    """
+    罕贵度缩写：对语料中出现的每个罕贵度文本，对照表替换与旧的逐个str.replace结果必须一致
+    """
+    from ygo import rarity
+    
+    texts = rarity_texts(files)
+    distinct = sorted(set(texts))
+    mismatched = [text for text in distinct if rarity.normalize_rarity(text) != normalize_rarity_legacy(text)]
+    if mismatched:
+        fail(f"有 {len(mismatched)} 个罕贵度文本结果不一致，例如 {mismatched[0]!r}")
+    else:
+        print(f"  ✓ {len(distinct)} 个不同的罕贵度文本结果一致")
+    
+    for name, func in [('逐个str.replace', normalize_rarity_legacy), ('对照表', rarity.normalize_rarity)]:
+        _, seconds = timed(lambda: [func(text) for text in texts])
+        report(name, seconds, rows=len(texts))
+
+def bench_sqlite(files):
+    """
+    SQLite导出：按卡牌编码、卡名查询，比较遍历CSV与数据库索引查询
+    """
+    import io
+    import csv
+    import sqlite3
+    import tempfile
+    import contextlib
+    parser = load_script('3解析卡包')
+    exporter = load_script('6导出数据库')
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_dir = os.path.join(tmp_dir, 'csv')
+        with contextlib.redirect_stdout(io.StringIO()):
+            parser.process_html_directory(copy_corpus(files, tmp_dir), csv_dir)
+        
+        db_path = os.path.join(tmp_dir, 'ygo.db')
+        (packs, cards, printings), seconds = timed(exporter.build_database, csv_dir, db_path)
+        report('建库', seconds, len(files), printings)
+        
+        rows = []
+        for key, csv_file in exporter.list_pack_csvs(csv_dir):
+            with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+                rows.extend(dict(row, pack=key) for row in csv.DictReader(f))
+        if not rows:
+            print("  没有卡牌数据")
+            return
+        
+        sample = rows[::max(1, len(rows) // 200)]
+        numbers = [row['卡牌编码'] for row in sample if row['卡牌编码']]
+        names = [row['卡名'] for row in sample if row['卡名']]
+        conn = sqlite3.connect(db_path)
+        
+        queries = [
+            ('按卡牌编码', numbers,
+             lambda number: [row for row in rows if row['卡牌编码'] == number],
+             lambda number: conn.execute(
+                 "SELECT * FROM printings WHERE 卡牌编码 = ?", (number,)).fetchall()),
+            ('按卡名查收录卡包', names,
+             lambda name: [row['pack'] for row in rows if row['卡名'] == name],
+             lambda name: conn.execute(
+                 "SELECT packs.pack_path FROM cards JOIN printings USING (card_id) JOIN packs USING (pack_id) "
+                 "WHERE cards.卡名 = ?", (name,)).fetchall()),
+        ]
+        for name, keys, scan, query in queries:
+            for label, func in [('CSV遍历', scan), ('SQLite', query)]:
+                _, seconds = timed(lambda: [func(key) for key in keys])
+                print(f"  {label} {name:<16} {seconds / len(keys) * 1000:8.3f}ms/次")
+        conn.close()
+
+def bench_packinfo(files):
+    """
+    卡包信息：快速提取与BeautifulSoup完整解析比较，输出必须完全一致
+    """
+    discover = load_script('5发现新包')
+    
+    results = {}
+    totals = {}
+    for name, func in [('BeautifulSoup', discover.parse_yugioh_pack_html), ('快速提取', discover.extract_pack_metadata)]:
+        results[name], totals[name] = timed(
+            lambda: [func(path, os.path.basename(path)) for path in files])
+    
+    reference, fast = results.values()
+    mismatched = [path for path, a, b in zip(files, reference, fast) if a != b]
+    if mismatched:
+        fail(f"快速提取与BeautifulSoup输出不一致: {len(mismatched)} 个文件，例如 {mismatched[0]}")
+    else:
+        print("  ✓ 快速提取与BeautifulSoup输出一致")
+    for name in results:
+        report(name, totals[name], len(files))
+
+def bench_rebuild(files):
+    """
+    全量重建：卡包CSV、卡包信息、ygo.csv三个阶段各自读取解析，与每页只解析一次比较
+    """
+    from ygo import extract, html_store
+    parser = load_script('3解析卡包')
+    discover = load_script('5发现新包')
+    
+    def separate():
+        records = []
+        for path in files:
+            cards = parser.parse_html_file(path)[0]
+            pack_info = discover.extract_pack_metadata(path, os.path.basename(path))
+            try:
+                rows = extract.ygo_rows(html_store.read_html(path))
+            except (IndexError, AttributeError, ValueError):
+                rows = None
+            records.append((cards, pack_info, rows))
+        return records
+    
+    def single_pass():
+        records = [parser.extract_html_file(path)[0] for path in files]
+        return [(r['cards'], r['pack_info'], r['ygo_rows']) for r in records]
+    
+    (reference, seconds) = timed(separate)
+    rows = sum(len(cards) for cards, _, _ in reference)
+    report('分阶段', seconds, len(files), rows)
+    (result, seconds) = timed(single_pass)
+    report('单次提取', seconds, len(files), rows)
+    
+    mismatched = [path for path, a, b in zip(files, reference, result) if a != b]
+    if mismatched:
+        fail(f"单次提取与分阶段输出不一致: {len(mismatched)} 个文件，例如 {mismatched[0]}")
+    else:
+        print("  ✓ 单次提取与分阶段输出一致")
+
+def bench_menu(files):
+    """
+    目录页解析：parse_ygo_html解析仓库中的两个菜单页面，diff_menus比较两者
+    """
+    discover = load_script('1下载目录')
+    
+    menus = []
+    for path in MENU_FILES:
+        with open(path, 'r', encoding='utf-8') as f:
+            menus.append(f.read())
+    
+    results, seconds = timed(lambda: [discover.parse_ygo_html(menu) for menu in menus])
+    packs = sum(len(level2['children']) for data in results for level1 in data for level2 in level1['children'])
+    report('parse_ygo_html', seconds, len(menus), packs)
+    
+    diff, seconds = timed(menu_diff.diff_menus, results[0], results[1])
+    report('diff_menus', seconds, rows=len(menu_diff.changed_hrefs(diff)))
+
+def bench_merge(files):
+    """
+    CSV合并：4合并.py的各种合并方法，输出的卡牌数必须一致
+    """
+    import io
+    import csv
+    import tempfile
+    import contextlib
+    parser = load_script('3解析卡包')
+    merger = load_script('4合并')
+    
+    strategies = [
+        ('完整合并', merger.merge_csv_files),
+        ('简化合并', merger.merge_csv_files_simple),
+        ('去重合并', merger.merge_csv_files_dedup),
+    ]
+    try:
+        import pandas
+        strategies.append(('Pandas合并', merger.merge_csv_with_pandas))
+    except ImportError:
+        print("  pandas库未安装，跳过Pandas合并")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_dir = os.path.join(tmp_dir, 'csv')
+        with contextlib.redirect_stdout(io.StringIO()):
+            parser.process_html_directory(copy_corpus(files, tmp_dir), csv_dir)
+        
+        counts = {}
+        for name, merge in strategies:
+            output_file = os.path.join(tmp_dir, name + '.csv')
+            with contextlib.redirect_stdout(io.StringIO()):
+                _, seconds = timed(merge, csv_dir, output_file)
+            # 去重合并的卡牌表每张卡只有一行，收录数在收录表中
+            if merge is merger.merge_csv_files_dedup:
+                output_file = merger.printings_file_for(output_file)
+            with open(output_file, 'r', encoding='utf-8-sig', newline='') as f:
+                counts[name] = sum(1 for _ in csv.reader(f)) - 1
+            report(name, seconds, len(files), counts[name])
+    
+    if len(set(counts.values())) == 1:
+        print(f"  ✓ 各方法输出的卡牌数一致 ({next(iter(counts.values()))} 行)")
+    else:
+        fail(f"各方法输出的卡牌数不一致: {counts}")
+
+def bench_main(files):
+    """
+    main.py导出：从卡包页面提取ygo.csv格式的行并写出，与仓库中的参考ygo.csv比较
+    """
+    import tempfile
+    from ygo import export
+    
+    lines, seconds = timed(ygo_csv_lines, files)
+    report('提取', seconds, len(files), len(lines))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        rows, seconds = timed(export.write_lines, os.path.join(tmp_dir, 'ygo.csv'), lines)
+        report('写出', seconds, len(files), rows)
+    
+    # 分类、系列、卡包名取自目录页，这里取自路径，只比较卡牌字段
+    with open(REFERENCE_YGO_CSV, 'r', encoding='utf-8') as f:
+        reference = set(line.split('\t', 4)[-1] for line in f.read().splitlines())
+    matched = sum(line.split('\t', 4)[-1] in reference for line in lines)
+    print(f"  {matched}/{len(lines)} 行的卡牌字段见于参考 {REFERENCE_YGO_CSV} (共 {len(reference)} 行)")
+
+def bench_crawl(files):
+    """
+    并发下载：对本地限流替身服务器运行自适应调度，页面必须完整下载
+    """
+    import io
+    import tempfile
+    import contextlib
+    from ygo import html_store, job_queue
+    crawler = load_script('2爬虫')
+    
+    pages = [html_store.read_html_bytes(path) for path in files]
+    data = [{'title': 'bench', 'children': [{'title': 'pages', 'children': [
+        {'title': f'p{index}', 'href': f'/list/{index}/'} for index in range(len(pages))]}]}]
+    stub = ThrottlingStub(pages)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        base_path = os.path.join(tmp_dir, 'ygo_packages')
+        os.makedirs(os.path.join(base_path, 'bench', 'pages'))
+        queue = job_queue.JobQueue(os.path.join(tmp_dir, 'jobs.sqlite'), backoff=0.5)
+        output = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(output):
+                downloaded, seconds = timed(lambda: crawler.download_package_html_async(
+                    data, base_path, concurrency=16, rate=0, base_url=stub.base_url, queue=queue))
+        finally:
+            queue.close()
+            stub.close()
+        
+        report('自适应并发', seconds, downloaded)
+        print('  ' + [line for line in output.getvalue().splitlines() if line.startswith('[统计]')][-1])
+        print(f"  替身服务器返回429: {stub.throttled} 次")
+        stored = [html_store.find_html(os.path.join(base_path, 'bench', 'pages', f'p{index}.html'))
+                  for index in range(len(pages))]
+        saved = [html_store.read_html_bytes(path) if path else None for path in stored]
+        if saved == pages:
+            print("  ✓ 所有页面完整下载")
+        else:
+            fail("下载的页面与原页面不一致")
+
+def bench_pipeline(files):
+    """
+    下载并解析：先全部下载再全部解析，与边下载边解析的流水线比较，输出必须完全一致
+    """
+    import io
+    import tempfile
+    import contextlib
+    from ygo import html_store
+    crawler = load_script('2爬虫')
+    parser = load_script('3解析卡包')
+    
+    pages = [html_store.read_html_bytes(path) for path in files]
+    data = [{'title': 'bench', 'children': [{'title': 'pages', 'children': [
+        {'title': f'p{index}', 'href': f'/list/{index}/'} for index in range(len(pages))]}]}]
+    # 并发上限之内不限流，只模拟网络延迟
+    stub = ThrottlingStub(pages, capacity=64, latency=0.02)
+    
+    def run(tmp_dir, pipelined):
+        base_path = os.path.join(tmp_dir, 'ygo_packages')
+        os.makedirs(os.path.join(base_path, 'bench', 'pages'))
+        outputs = [os.path.join(tmp_dir, name) for name in ('csv', 'ygo.csv', 'pack_info.csv')]
+        with contextlib.redirect_stdout(io.StringIO()):
+            if pipelined:
+                crawler.download_and_parse(data, parser.PackOutputs(base_path, *outputs), parser.extract_html_file,
+                                           jobs=2, base_path=base_path, concurrency=8, rate=0,
+                                           base_url=stub.base_url)
+            else:
+                crawler.download_package_html_async(data, base_path, concurrency=8, rate=0, base_url=stub.base_url)
+                parser.rebuild_outputs(base_path, *outputs, jobs=2)
+        contents = []
+        for root, dirs, names in sorted(os.walk(tmp_dir)):
+            for name in sorted(names):
+                if name.endswith('.csv'):
+                    # 卡包信息中的file_path含有临时目录
+                    with open(os.path.join(root, name), 'rb') as f:
+                        contents.append((os.path.relpath(os.path.join(root, name), tmp_dir),
+                                         f.read().replace(tmp_dir.encode('utf-8'), b'')))
+        return contents
+    
+    results = {}
+    try:
+        for name, pipelined in [('先下载后解析', False), ('流水线', True)]:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                results[name], seconds = timed(run, tmp_dir, pipelined)
+            report(name, seconds, len(files))
+    finally:
+        stub.close()
+    
+    sequential, pipelined = results.values()
+    if sequential == pipelined:
+        print("  ✓ 两种方式输出一致")
+    else:
+        fail("两种方式输出不一致")
+
+def bench_snapshots(files):
+    """
+    页面快照库：导入两个月的目录页和卡包页面，比较保存的字节数，取出的页面必须与原文件一致
+    """
+    import tempfile
+    from ygo import html_store, snapshots
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = snapshots.SnapshotStore(os.path.join(tmp_dir, 'snapshots.sqlite'))
+        try:
+            def import_all():
+                for path, date in zip(MENU_FILES, ['2020-02-01', '2020-03-01']):
+                    with open(path, 'rb') as f:
+                        store.put(snapshots.MENU_NAME, f.read(), date)
+                for path in files:
+                    store.put(snapshots.pack_name(HTML_DIR, path), html_store.read_html_bytes(path), '2020-03-01')
+            
+            _, seconds = timed(import_all)
+            report('导入', seconds, len(files) + len(MENU_FILES))
+            stats = store.stats()
+            print(f"  原始 {stats['logical_bytes'] / 1024 / 1024:.1f} MB -> 保存 {stats['stored_bytes'] / 1024 / 1024:.1f} MB"
+                  f" ({stats['chunks']} 个块)")
+            
+            checkout_dir = os.path.join(tmp_dir, 'checkout')
+            count, seconds = timed(store.checkout, '2020-02', checkout_dir)
+            report('取出2020-02', seconds, count)
+            count, seconds = timed(store.checkout, '2020-03', checkout_dir)
+            report('取出2020-03', seconds, count)
+        finally:
+            store.close()
+        
+        expected = [(os.path.join(checkout_dir, snapshots.MENU_NAME), MENU_FILES[-1])]
+        expected += [(os.path.join(checkout_dir, *snapshots.pack_name(HTML_DIR, path).split('/')), path) for path in files]
+        mismatched = [path for restored, path in expected
+                      if html_store.read_html_bytes(restored) != html_store.read_html_bytes(path)]
+        if mismatched:
+            fail(f"取出的页面与原文件不一致: {len(mismatched)} 个，例如 {mismatched[0]}")
+        else:
+            print("  ✓ 取出的页面与原文件一致")
+
+def bench_cache(files):
+    """
+    解析缓存：空缓存与已缓存时的全量重建（--rebuild），输出必须完全一致
+    """
+    import io
+    import tempfile
+    import contextlib
+    from ygo import parse_cache
+    parser = load_script('3解析卡包')
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        html_dir = copy_corpus(files, tmp_dir)
+        cache_path = os.path.join(tmp_dir, 'parse_cache.sqlite')
+        
+        def run(name):
+            outputs = [os.path.join(tmp_dir, name, output) for output in ('csv', 'ygo.csv', 'pack_info.csv')]
+            with contextlib.redirect_stdout(io.StringIO()):
+                parser.rebuild_outputs(html_dir, *outputs, cache_path=cache_path)
+            contents = []
+            for root, dirs, names in sorted(os.walk(os.path.join(tmp_dir, name))):
+                for file in sorted(names):
+                    with open(os.path.join(root, file), 'rb') as f:
+                        contents.append((os.path.relpath(os.path.join(root, file), tmp_dir), f.read()))
+            return contents
+        
+        results = {}
+        for name in ('无缓存', '已缓存'):
+            results[name], seconds = timed(run, name)
+            report(name, seconds, len(files))
+        cache = parse_cache.ParseCache(cache_path)
+        stats = cache.stats()
+        cache.close()
+    
+    print(f"  缓存 {stats['entries']} 个结果, {stats['bytes'] / 1024 / 1024:.1f} MB")
+    cold, warm = ([(path.split(os.sep, 1)[1], content) for path, content in result] for result in results.values())
+    if cold == warm:
+        print("  ✓ 两次输出一致")
+    else:
+        fail("两次输出不一致")
+
+def import_times(args, cwd=None):
+    """
+    用 python -X importtime 运行一条命令，返回 ({顶层模块: 累计导入秒数}, 导入过的所有模块名)
+    """
+    import subprocess
+    result = subprocess.run([sys.executable, '-X', 'importtime', *args], cwd=cwd, capture_output=True, text=True)
+    top_level = {}
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        modules.add(name.strip())
+        if not name[1:].startswith(' '):
+            top_level[name.strip()] = int(cumulative) / 1e6
+    return top_level, modules
+
+def bench_startup(files):
+    """
+    启动开销：快速查询命令和导入各脚本时的模块导入耗时（不含解释器本身），以及是否导入了重量级依赖
+    """
+    interpreter, _ = import_times(['-c', 'pass'])
+    commands = [('python -m ygo list-packs', ['-m', 'ygo', 'list-packs'], IMPORT_BUDGET),
+                ('python -m ygo lookup', ['-m', 'ygo', 'lookup', '89631139'], IMPORT_BUDGET),
+                ('import main', ['-c', 'import main'], None)]
+    commands += [(f'import {script}', ['-c', f"import importlib; importlib.import_module('{script}')"], None)
+                 for script in SCRIPTS]
+    
+    problems = []
+    for name, args, budget in commands:
+        top_level, modules = import_times(args)
+        seconds = sum(cumulative for module, cumulative in top_level.items() if module not in interpreter)
+        report(name, seconds)
+        heavy = sorted(module for module in modules if module.split('.')[0] in HEAVY_MODULES)
+        if heavy:
+            problems.append(f"{name} 导入了重量级依赖: {', '.join(heavy[:5])}")
+        if budget is not None and seconds > budget:
+            problems.append(f"{name} 的导入耗时 {seconds * 1000:.0f} ms 超过预算 {budget * 1000:.0f} ms")
+    for problem in problems:
+        fail(problem)
+    if not problems:
+        print(f"  ✓ 快速查询的导入耗时在 {IMPORT_BUDGET * 1000:.0f} ms 以内，各脚本导入时未加载 {', '.join(HEAVY_MODULES)}")
+
+BENCHMARKS = {
+    'menu': bench_menu,
+    'parse': bench_parse,
+    'export': bench_export,
+    'rarity': bench_rarity,
+    'sqlite': bench_sqlite,
+    'packinfo': bench_packinfo,
+    'rebuild': bench_rebuild,
+    'crawl': bench_crawl,
+    'merge': bench_merge,
+    'main': bench_main,
+    'pipeline': bench_pipeline,
+    'snapshots': bench_snapshots,
+    'cache': bench_cache,
+    'startup': bench_startup,
+}
+
+def corpus_info(files, args):
+    """
+    语料和环境的描述，基准只与相同语料上的结果比较
+    """
+    return {
+        'files': len(files),
+        'bytes': sum(os.path.getsize(path) for path in files),
+        'limit': args.limit,
+        'biggest': args.biggest,
+        'memory': args.memory,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+    }
+
+def compare_baseline(baseline, info, tolerance):
+    """
+    与基准比较吞吐量（没有吞吐量的项比较耗时），返回变慢超过tolerance的项目
+    """
+    if {key: baseline['corpus'].get(key) for key in ('files', 'bytes', 'limit', 'biggest', 'memory')} != \
+            {key: info[key] for key in ('files', 'bytes', 'limit', 'biggest', 'memory')}:
+        print("\n基准结果使用的语料或参数不同，不做比较")
+        return []
+    
+    print(f"\n与基准比较（{baseline['saved_at']}，Python {baseline['corpus']['python']}）:")
+    regressions = []
+    for key, result in RESULTS.items():
+        base = baseline['results'].get(key)
+        if base is None:
+            continue
+        metric = next((name for name in ('rows_per_second', 'files_per_second') if name in result and name in base), None)
+        # 速度比：大于1表示比基准快
+        ratio = result[metric] / base[metric] if metric else base['seconds'] / result['seconds']
+        mark = '✗' if ratio < 1 - tolerance else '✓'
+        if mark == '✗':
+            regressions.append(key)
+        print(f"  {mark} {key:<32} {ratio:6.2f}x")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="在html/语料上运行性能测试")
+    parser.add_argument('names', nargs='*', help=f"要运行的测试（{', '.join(BENCHMARKS)}），默认全部")
+    parser.add_argument('--limit', type=int, default=None, help="只使用前N个HTML文件")
+    parser.add_argument('--biggest', type=int, default=None, help="只使用最大的N个HTML文件")
+    parser.add_argument('--memory', action='store_true', help="用tracemalloc测量每项的Python内存峰值（会变慢）")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help=f"基准结果文件，默认 {BASELINE_FILE}")
+    parser.add_argument('--save-baseline', action='store_true', help="将本次结果保存为基准（与已有结果合并）")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="比基准慢超过该比例时视为性能下降，默认0.25")
+    args = parser.parse_args()
+    for name in args.names:
+        if name not in BENCHMARKS:
+            parser.error(f"未知的测试: {name}")
+    
+    global _current
+    files = list_html_files(limit=args.limit, biggest=args.biggest)
+    info = corpus_info(files, args)
+    print(f"语料: {len(files)} 个HTML文件")
+    if args.memory:
+        tracemalloc.start()
+    for name in args.names or BENCHMARKS:
+        _current = name
+        print(f"\n[{name}] {BENCHMARKS[name].__doc__.strip().splitlines()[0]}")
+        BENCHMARKS[name](files)
+    if args.memory:
+        tracemalloc.stop()
+    
+    peak = profiling.peak_rss()
+    if peak:
+        print(f"\n进程内存峰值: {peak / 1024 / 1024:.1f} MB")
+    
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    
+    regressions = []
+    if args.save_baseline:
+        results = dict(baseline['results']) if baseline and baseline['corpus'] == info else {}
+        results.update(RESULTS)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'saved_at': time.strftime('%Y-%m-%d'), 'corpus': info, 'results': results},
+                      f, ensure_ascii=False, indent=1, sort_keys=True)
+        print(f"\n基准结果已保存到 {args.baseline}")
+    elif baseline is not None:
+        regressions = compare_baseline(baseline, info, args.tolerance)
+        if regressions:
+            print(f"有 {len(regressions)} 项比基准慢超过 {args.tolerance:.0%}")
+    
+    if FAILURES:
+        print(f"\n有 {len(FAILURES)} 项检查未通过:")
+        for failure in FAILURES:
+            print(f"  {failure}")
+    if FAILURES or regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
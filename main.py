@@ -9,33 +9,53 @@ import re
 import os
 import time
 import datetime
-import urllib.request
+import argparse
 from pathlib import Path
+from ygo.http_cache import HttpCache
+from ygo import html_store
+from ygo import columnar
+from ygo import export
+from ygo import extract
+from ygo import profiling
+from ygo.manifest import content_hash
+from ygo.parse_cache import ParseCache
 
 url = 'http://ocg-card.com'
-update_dt = datetime.date.today().strftime('%Y%m')
-save_html = Path('./menu_%s.html' % update_dt)
-
-if not save_html.exists():
-    
-    page = urllib.request.urlopen(url+'/list/').read()
-    save_html.write_bytes(page).encode('utf-8')
-else:
-    page = save_html.read_bytes().decode('utf-8')
-
 
 mark_star = 'page-template-default page'
 mark_end = 'no-icon ad-content-bott'
-body = page.split(mark_star)[1].split(mark_end)[0]
 
-save_pack = Path('./pack')
+base_html = Path('./html')
+base_pack = Path('./pack')
+
+csv_path = './ygo.csv'
+
+
+def load_menu(update_dt):
+    """
+    读取当月的目录页menu_YYYYMM.html，不存在时下载并保存，返回目录部分的HTML
+    """
+    save_html = Path('./menu_%s.html' % update_dt)
+    
+    if not save_html.exists():
+        
+        page = HttpCache().urlopen(url+'/list/')
+        save_html.write_bytes(page)
+        page = page.decode('utf-8')
+    else:
+        page = save_html.read_bytes().decode('utf-8')
+    
+    return page.split(mark_star)[1].split(mark_end)[0]
+
 
 def create_dir(path):
     if not path.exists():
         path.mkdir()
         
         
-def update_html():
+def update_html(body):
+    import urllib.request
+    
     html = Path('./html')
     
     for cgr in body.split('list-category">')[1:]:
@@ -56,157 +76,110 @@ def update_html():
                 pk_url, pk_name = pk
                 pack_url = url + pk_url
                 pack_html = fld_dir / (pk_name.replace('/', '') + '.html')
-                if not pack_html.exists():
+                if not html_store.find_html(pack_html):
                     print(pack_url)
                     page = urllib.request.urlopen(pack_url, timeout=60).read()
-                    n = pack_html.write_bytes(page)
-                    print('下载完成：', pk_name, n)
+                    html_store.write_html(pack_html, page)
+                    print('下载完成：', pk_name, len(page))
                     #time.sleep(30)
                 print(' │   └─', pk_name)
 
-#update_html()
-
+def iter_ygo_lines(body, parse_cache, timer=None, verbose=False):
+    """
+    遍历目录中的全部卡包，逐张卡生成ygo.csv的一行；内容未变的页面直接使用parse_cache中上次提取的结果
 
-base_html = Path('./html')
-base_pack = Path('./pack')
-
-create_dir(base_pack)
-
-csv_path = './ygo.csv'
-
-with open(csv_path, 'w', encoding='utf-8') as f:
-    f.write('')
-                        
-                        
-for cgr in body.split('list-category">')[1:]:
-    cgr_name = cgr.split('<')[0]
-    create_dir(base_html / cgr_name)
-    create_dir(base_pack / cgr_name)
+    传入timer（StageTimer）时记录每个卡包读取和提取的耗时，verbose时逐个输出卡包路径
+    """
+    if timer is None:
+        timer = profiling.StageTimer('main')
+    for cgr in body.split('list-category">')[1:]:
+        cgr_name = cgr.split('<')[0]
+        create_dir(base_html / cgr_name)
+        create_dir(base_pack / cgr_name)
     
-    for fld in cgr.split('listfolder-list mark"></a>')[1:]:
-        fld_name = fld.split('<')[0]
-        create_dir(base_html / cgr_name / fld_name)
-        create_dir(base_pack / cgr_name / fld_name)
+        for fld in cgr.split('listfolder-list mark"></a>')[1:]:
+            fld_name = fld.split('<')[0]
+            create_dir(base_html / cgr_name / fld_name)
+            create_dir(base_pack / cgr_name / fld_name)
         
-        for pk in re.findall(r'href="(.+?)">(.+?)</a>', fld):
-            pk_url, pk_name = pk
-            
-            
-            html_path = base_html/cgr_name/fld_name/(pk_name.replace('/', '') + '.html')
-            page = html_path.read_bytes().decode('utf-8')
-            pack_path = base_pack/cgr_name/fld_name/(pk_name.replace('/', '') + '.csv')
+            for pk in re.findall(r'href="(.+?)">(.+?)</a>', fld):
+                pk_url, pk_name = pk
             
             
-#            pk_name = '20th ANNIVERSARY デュエルセット（オベリスクの巨神兵）'
-#            html_path = base_html/'商品同梱'/'デュエルセット'/(pk_name.replace('/', '') + '.html')
-#            page = html_path.read_bytes().decode('utf-8')
-#            pack_path = base_html/'商品同梱'/'デュエルセット'/(pk_name.replace('/', '') + '.csv')
+                html_path = base_html/cgr_name/fld_name/(pk_name.replace('/', '') + '.html')
+                html_path = html_store.find_html(html_path) or html_path
+                started = time.perf_counter()
+                raw = html_store.read_html_bytes(html_path)
+                timer.add('read', time.perf_counter() - started, str(html_path), len(raw))
+                pack_path = base_pack/cgr_name/fld_name/(pk_name.replace('/', '') + '.csv')
             
             
-            ##if not pack_path.exists():
-            if 1:  
-                print(pack_path)
-                mark_star = '<header class="article-header entry-header">'
-                mark_end = '<div class="ad">'
-                body = page.split(mark_star)[1].split(mark_end)[0]
+#                pk_name = '20th ANNIVERSARY デュエルセット（オベリスクの巨神兵）'
+#                html_path = base_html/'商品同梱'/'デュエルセット'/(pk_name.replace('/', '') + '.html')
+#                page = html_path.read_bytes().decode('utf-8')
+#                pack_path = base_html/'商品同梱'/'デュエルセット'/(pk_name.replace('/', '') + '.csv')
             
-                hd, lt = body.split('<div id="list">')
             
-                pack_update_dt = re.search('datetime="(.{10})', hd).group(1)
-                card_num = int(re.search('全([0-9]+)枚', hd).group(1))
-                
-                cds = lt.split('card-number')[1:]
-                
-                if card_num != len(cds):
-                    '《{}》卡包全{}枚，已公布{}枚。'.format(pk_name, card_num, len(cds))
-                    continue
-                
-                if pack_path.exists():
-                    os.remove(pack_path)
-                    
-                for cd in lt.split('card-number')[1:]:
-                    card_number = re.search('>(.+?)<', cd).group(1)
-                    m = re.search(r'(back-|mon|magic|trap).+?>(.+?)</td>', cd)
-                
-                    card_name_raw = m.group(2)
-                    card_name_raw = re.sub('<rt>.+?<.+?>', '', card_name_raw)
-                    card_name_raw = re.sub('limit-icon.+?<', '', card_name_raw)
-                    card_name = re.sub('<.+?>', '', card_name_raw)
-                    m = re.search(r'card-category.+?>(.+?)</td>', cd)
-                    if m:
-                        card_category = m.group(1)
-                    else:
-                        continue
-                    
-                    m = re.search(r'card-pass.+?>(.+?)</td>', cd)
-                    if m:
-                        card_pass = m.group(1)
+                ##if not pack_path.exists():
+                if 1:  
+                    if verbose:
+                        print(pack_path)
+                    started = time.perf_counter()
+                    page_hash = content_hash(raw)
+                    cached = parse_cache.get(page_hash)
+                    if cached is not None:
+                        rows, = cached
                     else:
+                        rows = extract.ygo_rows(raw.decode('utf-8'))
+                        # 结果可能为None，放在元组中与未命中区分
+                        parse_cache.put(page_hash, (rows,))
+                    timer.add('extract', time.perf_counter() - started, str(html_path), rows=len(rows or ()))
+                    if rows is None:
+                        # 卡包的卡牌尚未全部公布
                         continue
-                    card_text_raw = re.search(r'card-text.+?>(.*?)</td>', cd).group(1)
-                    card_text = re.sub('<.*?>', '', card_text_raw)
-                    
-                    card_rare = '|'.join(re.findall('> ?([^<>p]+?)<', cd.split('card-rare')[1].split('card-info')[0]))
-                    card_rare = card_rare.replace('？','')
-                    card_rare = card_rare.replace('ノーマルレア','NR')
-                    card_rare = card_rare.replace('ノーマル','N')
-                    card_rare = card_rare.replace('レア','R')
-                    card_rare = card_rare.replace('スーパー','SR')
-                    card_rare = card_rare.replace('ゴールド','G')
-                    card_rare = card_rare.replace('ウルトラ','UR')
-                    card_rare = card_rare.replace('アルティメット','UTR')
-                    card_rare = card_rare.replace('パラレル','P')
-                    card_rare = card_rare.replace('シークレット','SER')
-                    card_rare = card_rare.replace('ホログラフィック','HR')
-                    card_rare = card_rare.replace('コレクターズ','CR')
-                    card_rare = card_rare.replace('ミレニアム','M')
-                    card_rare = card_rare.replace('エクストラ','E')
-                    card_rare = card_rare.replace('プレミアム','PP')
-                    card_rare = card_rare.replace('プラズマティック','P')
-                    
-                    
-                    
-                    if m.group(1) == 'mon':
-                        card_attr = re.search(r'card-attr.+?>(.+?)</td>', cd).group(1)
-                        card_type = re.search(r'card-type.+?>(.+?)</td>', cd).group(1)
-                        card_star = re.search(r'(card-star|non-stts).+?>(.+?)</td>', cd).group(2)
-                        card_force = re.findall(r'card-force.+?>(.+?)</td>', cd)
-                        if len(card_force) == 2:
-                            card_atk, card_def = card_force
-                        else:
-                            card_atk = card_force[0]
-                            card_def = '-'
-                    else:
-                        card_attr, card_type, card_star, card_atk, card_def = ['']*5
                 
-                    if 'リンク' in  card_category:
-                        card_link = re.search(r'card-link">LINK-([0-9]+)', cd).group(1)
-                        card_arrow = re.search(r'card-link.+?：(.+?)<', cd).group(1).replace(' ','')
-                    elif 'ペンデュラム' in  card_category:
-                        if card_name != 'EMクリボーダー':
-                            card_pscale = re.search(r'card-p-scale.+?>(.+?)</td>', cd).group(1)
-                            card_ptext = card_text
-                            card_text_raw = re.search(r'card-text.+?>(.*?)</td>', cd.split('card-text',1)[1]).group(1)
-                            card_text = re.sub('<.*?>', '', card_text_raw)
-                    else:
-                        card_link, card_arrow, card_pscale, card_ptext = ['']*4
-                    if card_number == 'ETCO-JP008':
-                        cd2 = cd
-                    line = '\t'.join([pack_update_dt.replace('-', ''), 
-                                     cgr_name, fld_name, pk_name,
-                                     card_number, card_name, card_pass, 
-                                     card_category, card_rare])
-                    with open(csv_path, 'a', encoding='utf-8') as f:
-                        f.write(line+'\n')
-
-
-
-
-
-
-
+                    if pack_path.exists():
+                        os.remove(pack_path)
+                    
+                    for row in rows:
+                        yield extract.ygo_line(row, cgr_name, fld_name, pk_name)
 
 
 
+def main():
+    parser = argparse.ArgumentParser(description="从卡包页面导出ygo.csv")
+    parser.add_argument('--verbose', action='store_true', help="逐个输出卡包路径")
+    parser.add_argument('--report', metavar='JSON', help="将各卡包读取、提取的耗时写入JSON报告")
+    parser.add_argument('--profile', metavar='FILE',
+                        help="记录函数级性能数据：.html结尾时用pyinstrument，否则保存cProfile的pstats文件")
+    args = parser.parse_args()
+    
+    update_dt = datetime.date.today().strftime('%Y%m')
+    body = load_menu(update_dt)
+    
+    #update_html(body)
+    
+    create_dir(base_pack)
+    
+    parse_cache = ParseCache('ygo_parse_cache.sqlite', 'ygo_rows/%d' % extract.EXTRACT_VERSION)
+    timer = profiling.StageTimer('main')
+    
+    # 所有行经同一个缓冲句柄写入临时文件，全部成功后再替换ygo.csv
+    with profiling.profiled(args.profile):
+        n = export.write_lines(csv_path, iter_ygo_lines(body, parse_cache, timer, args.verbose))
+    parse_cache.close()
+    print('已保存：', csv_path, n)
+    report = timer.write(args.report) if args.report else timer.report()
+    print(profiling.summary(report))
+    
+    
+    # 同时输出列式文件，供分析时按列快速读取
+    try:
+        n = columnar.ygo_csv_to_columnar(csv_path, './ygo.parquet')
+        print('列式文件已保存：', './ygo.parquet', n)
+    except ImportError:
+        print('pyarrow库未安装，跳过列式输出，请安装pyarrow: pip install pyarrow')
 
 
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+测试的公共设置：仓库根目录加入sys.path，编号脚本用load_script导入
+"""
+import os
+import sys
+import time
+import importlib
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+HTML_DIR = os.path.join(ROOT, 'html')
+
+def load_script(name):
+    """导入编号脚本，如 load_script('2爬虫')"""
+    return importlib.import_module(name)
+
+class FakeClock:
+    """代替time.time和time.sleep：sleep不真正等待，只推进时间并记录每次的秒数"""
+    def __init__(self, start=1000.0):
+        self.now = start
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(time, 'time', clock.time)
+    monkeypatch.setattr(time, 'sleep', clock.sleep)
+    return clock
+
+def copy_packs(relative_paths, target_dir):
+    """把仓库html/中的几个卡包页面按原目录结构复制到target_dir，返回target_dir"""
+    import shutil
+    for relative_path in relative_paths:
+        target = os.path.join(target_dir, relative_path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(os.path.join(HTML_DIR, relative_path), target)
+    return target_dir
+
+def stub_menu(count):
+    """ThrottlingStub的 /list/<序号>/ 对应的目录结构，卡包名为p<序号>"""
+    return [{'title': 'stub', 'children': [{'title': 'pages', 'children': [
+        {'title': f'p{index}', 'href': f'/list/{index}/'} for index in range(count)]}]}]
+
+def saved_pages(base_path, count):
+    """下载目录中p0..p<count-1>的页面字节，缺少的页面为None"""
+    from ygo import html_store
+    paths = [html_store.find_html(os.path.join(base_path, 'stub', 'pages', f'p{index}.html')) for index in range(count)]
+    return [html_store.read_html_bytes(path) if path else None for path in paths]
@@ -0,0 +1,76 @@
+"""
+测试与benchmark.py共用的语料和本地替身服务器：语料页面列表（corpus_files），
+以及模拟限流的下载服务器（ThrottlingStub）
+"""
+import os
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HTML_DIR = os.path.join(ROOT, 'html')
+
+def corpus_files(step=1, biggest=0, html_dir=HTML_DIR):
+    """
+    html/语料中的页面（同一页面的.html与.html.gz只取一个），step大于1时每step个取一个，
+    再加上最大的biggest个页面（按大小从大到小）；step为0时只取最大的biggest个
+    """
+    from ygo import html_store
+    files = html_store.unique_html_files(sorted(
+        os.path.join(root, file)
+        for root, dirs, files in os.walk(html_dir)
+        for file in files
+        if html_store.is_html_file(file)
+    ))
+    sample = files[::step] if step else []
+    for path in sorted(files, key=os.path.getsize, reverse=True)[:biggest]:
+        if path not in sample:
+            sample.append(path)
+    return sample
+
+class ThrottlingStub:
+    """
+    本地限流替身服务器：/list/<序号>/ 返回语料中的页面，延迟随同时处理的请求数增加，
+    超过capacity个并发请求时返回429和Retry-After；peak记录同时处理的请求数的最大值
+    """
+    def __init__(self, pages, capacity=4, latency=0.02, retry_after=1):
+        import threading
+        from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+        stub = self
+        self.pages = pages
+        self.in_flight = 0
+        self.peak = 0
+        self.throttled = 0
+        self.lock = threading.Lock()
+        
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+            
+            def do_GET(self):
+                with stub.lock:
+                    stub.in_flight += 1
+                    load = stub.in_flight
+                    stub.peak = max(stub.peak, load)
+                try:
+                    if load > capacity:
+                        stub.throttled += 1
+                        self.send_response(429)
+                        self.send_header('Retry-After', str(retry_after))
+                        self.end_headers()
+                        return
+                    time.sleep(latency * load)
+                    body = stub.pages[int(self.path.strip('/').split('/')[-1])]
+                    self.send_response(200)
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    with stub.lock:
+                        stub.in_flight -= 1
+        
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+    
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,54 @@
+"""
+2爬虫 并发下载：连接池中的请求同时进行，所有页面完整保存，已下载的页面不再请求
+"""
+import os
+
+import pytest
+
+from conftest import load_script, stub_menu, saved_pages
+from stub_server import ThrottlingStub, corpus_files
+from ygo import html_store
+
+pytest.importorskip('requests')
+
+PAGES = [html_store.read_html_bytes(path) for path in corpus_files(step=20)]
+
+def test_concurrent_download_saves_every_page(tmp_path):
+    crawler = load_script('2爬虫')
+    base_path = str(tmp_path / 'ygo_packages')
+    os.makedirs(os.path.join(base_path, 'stub', 'pages'))
+    # 不限流，只模拟随并发增加的延迟
+    stub = ThrottlingStub(PAGES, capacity=64, latency=0.02)
+    try:
+        downloaded = crawler.download_package_html_async(stub_menu(len(PAGES)), base_path, concurrency=8, rate=0,
+                                                         base_url=stub.base_url)
+        peak = stub.peak
+        # 再次运行时文件已存在，跳过下载
+        stub.pages = []
+        again = crawler.download_package_html_async(stub_menu(len(PAGES)), base_path, concurrency=8, rate=0,
+                                                    base_url=stub.base_url)
+    finally:
+        stub.close()
+    
+    assert downloaded == again == len(PAGES)
+    assert peak > 1
+    assert stub.throttled == 0
+    assert saved_pages(base_path, len(PAGES)) == PAGES
+
+@pytest.mark.parametrize('verbose', [False, True])
+def test_per_page_output_only_when_verbose(tmp_path, capsys, verbose):
+    crawler = load_script('2爬虫')
+    base_path = str(tmp_path / 'ygo_packages')
+    crawler.create_folder_structure(stub_menu(len(PAGES)), base_path, verbose=verbose)
+    stub = ThrottlingStub(PAGES, capacity=64, latency=0.0)
+    try:
+        crawler.download_package_html_async(stub_menu(len(PAGES)), base_path, concurrency=8, rate=0,
+                                            base_url=stub.base_url, verbose=verbose)
+    finally:
+        stub.close()
+    
+    output = capsys.readouterr().out
+    assert ('正在下载' in output) == verbose
+    assert ('创建文件夹' in output) == verbose
+    if not verbose:
+        assert f"进度: {len(PAGES)}/{len(PAGES)} (100%)" in output
@@ -0,0 +1,42 @@
+"""
+2爬虫.py逐个下载模式的请求间隔与失败重试
+"""
+import pytest
+import requests
+
+from conftest import load_script
+from ygo import job_queue
+
+class FakeResponse:
+    def __init__(self, status_code, content=b''):
+        self.status_code = status_code
+        self.content = content
+        self.headers = {}
+
+def menu(*titles):
+    return [{'title': 'A', 'children': [{'title': 'B', 'children': [
+        {'title': title, 'href': f'/list/{title}/'} for title in titles]}]}]
+
+def test_sync_download_sleeps_delay_between_requests_and_backoff_between_passes(tmp_path, monkeypatch, fake_clock):
+    crawler = load_script('2爬虫')
+    monkeypatch.chdir(tmp_path)
+    data = menu('p0', 'p1', 'p2')
+    crawler.create_folder_structure(data)
+
+    # p1前两次返回503，第三次成功
+    calls = []
+    def fake_get(url, headers=None, timeout=None):
+        calls.append(url)
+        if url.endswith('/p1/') and calls.count(url) <= 2:
+            return FakeResponse(503)
+        return FakeResponse(200, b'<html>ok</html>')
+    monkeypatch.setattr(requests, 'get', fake_get)
+
+    queue = job_queue.JobQueue(str(tmp_path / 'q.sqlite'), max_attempts=5, backoff=2.0)
+    downloaded = crawler.download_package_html(data, delay=0.5, base_url='http://stub', queue=queue)
+    queue.close()
+
+    assert downloaded == 3
+    # 第一轮：每次请求后等待0.5秒；p1在t=0.5时失败，t=2.5可重试，本轮结束于t=1.5，再等1秒
+    # 第二轮：p1再次失败，4秒后可重试，请求后已过去0.5秒，再等3.5秒；第三轮成功
+    assert fake_clock.sleeps == pytest.approx([0.5, 0.5, 0.5, 1.0, 0.5, 3.5, 0.5])
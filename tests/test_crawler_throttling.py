@@ -0,0 +1,35 @@
+"""
+2爬虫 并发下载：对本地限流替身服务器（stub_server.ThrottlingStub）下载，429按Retry-After退避重试，
+页面必须完整下载（benchmark.py crawl 的检查）
+"""
+import os
+
+import pytest
+
+from conftest import load_script, stub_menu, saved_pages
+from stub_server import ThrottlingStub, corpus_files
+from ygo import html_store, job_queue
+
+pytest.importorskip('requests')
+
+PAGES = [html_store.read_html_bytes(path) for path in corpus_files(step=10)]
+
+def test_throttled_downloads_are_retried_until_complete(tmp_path):
+    crawler = load_script('2爬虫')
+    base_path = str(tmp_path / 'ygo_packages')
+    os.makedirs(os.path.join(base_path, 'stub', 'pages'))
+    stub = ThrottlingStub(PAGES, capacity=3, latency=0.01, retry_after=1)
+    queue = job_queue.JobQueue(str(tmp_path / 'jobs.sqlite'), backoff=0.5)
+    try:
+        downloaded = crawler.download_package_html_async(stub_menu(len(PAGES)), base_path, concurrency=16, rate=0,
+                                                         base_url=stub.base_url, queue=queue)
+        failures = queue.failures()
+    finally:
+        queue.close()
+        stub.close()
+    
+    assert stub.throttled > 0
+    assert stub.peak > 3
+    assert failures == []
+    assert downloaded == len(PAGES)
+    assert saved_pages(base_path, len(PAGES)) == PAGES
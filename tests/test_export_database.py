@@ -0,0 +1,60 @@
+"""
+6导出数据库.py：3解析卡包.py的CSV带有卡片密码，按密码可以查到所有收录的卡包
+"""
+import csv
+import sqlite3
+
+from conftest import load_script, copy_packs
+
+PACKS = [
+    '基本パック/第2期/Spell of Mask.html',
+    '基本パック/第2期/Magic Ruler.html',
+    'エントリーパック/デュエリストパック/レジェンドデュエリスト編3.html',
+]
+
+def build(tmp_path):
+    parser = load_script('3解析卡包')
+    exporter = load_script('6导出数据库')
+    html_dir = copy_packs(PACKS, str(tmp_path / 'ygo_packages'))
+    csv_dir = str(tmp_path / 'csv_directory')
+    parser.process_html_directory(html_dir, csv_dir)
+    db_path = str(tmp_path / 'ygo.db')
+    exporter.build_database(csv_dir, db_path)
+    return sqlite3.connect(db_path)
+
+def packs_for_passcode(conn, passcode):
+    return [pack_path for (pack_path,) in conn.execute(
+        "SELECT pack_path FROM cards JOIN printings USING (card_id) JOIN packs USING (pack_id) "
+        "WHERE 卡片密码 = ? ORDER BY pack_path", (passcode,))]
+
+def test_passcode_lookup_returns_every_pack_reprinting_the_card(tmp_path):
+    conn = build(tmp_path)
+    # 青眼の白龍
+    assert packs_for_passcode(conn, '89631139') == [
+        'エントリーパック/デュエリストパック/レジェンドデュエリスト編3',
+        '基本パック/第2期/Spell of Mask',
+    ]
+    # 同一密码的卡只保存一次
+    assert conn.execute("SELECT COUNT(*) FROM cards WHERE 卡片密码 = '89631139'").fetchone()[0] == 1
+    missing = conn.execute("SELECT COUNT(*) FROM cards WHERE 卡片密码 = ''").fetchone()[0]
+    assert missing == 0
+
+def test_stage3_csv_has_the_passcode_column_filled(tmp_path):
+    parser = load_script('3解析卡包')
+    html_dir = copy_packs(PACKS[:1], str(tmp_path / 'ygo_packages'))
+    parser.process_html_directory(html_dir, str(tmp_path / 'csv'))
+    with open(tmp_path / 'csv' / '基本パック' / '第2期' / 'Spell of Mask.csv', encoding='utf-8', newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert rows and all(row['卡片密码'] for row in rows)
+
+def test_short_csv_row_is_exported_with_empty_fields(tmp_path):
+    exporter = load_script('6导出数据库')
+    csv_dir = tmp_path / 'csv'
+    csv_dir.mkdir()
+    # 行尾缺少卡名及之后的列
+    (csv_dir / 'pack.csv').write_text('卡牌编码,罕贵度,卡名,卡片密码\nABC-001,N\n', encoding='utf-8')
+    db_path = str(tmp_path / 'ygo.db')
+    assert exporter.build_database(str(csv_dir), db_path) == (1, 1, 1)
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT 卡名, 卡片密码 FROM cards").fetchall() == [('', '')]
+    conn.close()
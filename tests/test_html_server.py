@@ -0,0 +1,54 @@
+"""
+2爬虫 的索引与 ygo.html_server：索引链接到 .html 地址，服务器把 .html.gz 作为压缩的HTML发送
+"""
+import gzip
+import os
+import re
+import threading
+import urllib.request
+from urllib.parse import quote
+
+import pytest
+
+from conftest import HTML_DIR, load_script
+from ygo import html_server, html_store
+
+MENU = [{'title': '基本パック', 'children': [
+    {'title': '第2期', 'children': [{'title': 'Spell of Mask', 'href': '/list/bp02-4/'}]},
+]}]
+
+@pytest.fixture
+def served(tmp_path):
+    crawler = load_script('2爬虫')
+    base_path = str(tmp_path / 'ygo_packages')
+    page = html_store.read_html_bytes(os.path.join(HTML_DIR, '基本パック/第2期/Spell of Mask.html'))
+    crawler.create_folder_structure(MENU, base_path)
+    html_store.write_html(os.path.join(base_path, '基本パック', '第2期', 'Spell_of_Mask.html'), page)
+    crawler.create_index_files(MENU, base_path)
+    server = html_server.make_server(base_path, 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}", page
+    server.shutdown()
+    server.server_close()
+
+def get(url, **headers):
+    with urllib.request.urlopen(urllib.request.Request(url, headers=headers)) as response:
+        return response.headers, response.read()
+
+def test_index_links_to_html_and_page_is_sent_gzip_encoded(served):
+    base_url, page = served
+    _, index = get(base_url + '/index.html')
+    links = re.findall(r'href="([^"]+)"', index.decode('utf-8'))
+    assert len(links) == 1 and links[0].endswith('.html')
+
+    headers, body = get(f"{base_url}/{links[0]}", **{'Accept-Encoding': 'gzip'})
+    assert headers['Content-Type'] == 'text/html; charset=utf-8'
+    assert headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(body) == page
+
+def test_clients_without_gzip_get_the_plain_page(served):
+    base_url, page = served
+    headers, body = get(base_url + '/' + quote('基本パック/第2期/Spell_of_Mask.html'))
+    assert headers['Content-Encoding'] is None
+    assert body == page
@@ -0,0 +1,35 @@
+"""
+ygo.html_store：重新下载到旧的未压缩页面目录时，每个卡包只保留一个页面文件
+"""
+import csv
+import os
+
+from conftest import HTML_DIR, load_script
+from ygo import html_store
+
+PAGE = os.path.join(HTML_DIR, '基本パック/第2期/Spell of Mask.html')
+
+def test_write_html_removes_the_plain_sibling(tmp_path):
+    plain = tmp_path / 'Spell_of_Mask.html'
+    plain.write_bytes(b'old')
+    target = html_store.write_html(str(plain), html_store.read_html_bytes(PAGE))
+    assert sorted(os.listdir(tmp_path)) == ['Spell_of_Mask.html.gz']
+    assert html_store.find_html(str(plain)) == target
+
+def test_listers_collapse_plain_and_compressed_pairs(tmp_path):
+    parser = load_script('3解析卡包')
+    html_dir = tmp_path / 'ygo_packages' / '基本パック' / '第2期'
+    html_dir.mkdir(parents=True)
+    page = html_store.read_html_bytes(PAGE)
+    # 旧版本留下的未压缩页面与新下载的压缩页面同时存在
+    html_store.write_html(str(html_dir / 'Spell_of_Mask.html'), page)
+    (html_dir / 'Spell_of_Mask.html').write_bytes(page)
+
+    html_files = parser.list_html_files(str(tmp_path / 'ygo_packages'))
+    assert html_files == [str(html_dir / 'Spell_of_Mask.html.gz')]
+
+    pack_info_csv = str(tmp_path / 'pack_info.csv')
+    parser.rebuild_outputs(str(tmp_path / 'ygo_packages'), str(tmp_path / 'csv'), str(tmp_path / 'ygo.csv'),
+                           pack_info_csv)
+    with open(pack_info_csv, encoding='utf-8-sig') as f:
+        assert len(list(csv.DictReader(f))) == 1
@@ -0,0 +1,38 @@
+"""
+4合并.py 去重合并：按3解析卡包.py写入CSV的卡片密码去重，同名不同卡不会被合并
+"""
+import csv
+import shutil
+
+from conftest import load_script, copy_packs
+
+PACKS = [
+    '基本パック/第2期/Spell of Mask.html',
+    'エントリーパック/デュエリストパック/レジェンドデュエリスト編3.html',
+]
+
+def read_rows(path):
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        return list(csv.DictReader(f))
+
+def test_dedup_keys_cards_by_passcode(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    parser = load_script('3解析卡包')
+    merger = load_script('4合并')
+    html_dir = copy_packs(PACKS, str(tmp_path / 'ygo_packages'))
+    parser.process_html_directory(html_dir, 'csv_directory')
+    # 合并时不再读取卡包页面
+    shutil.rmtree(html_dir)
+    merger.merge_csv_files_dedup('csv_directory', 'merged_cards_unique.csv')
+
+    cards = read_rows('merged_cards_unique.csv')
+    printings = read_rows('merged_cards_unique_printings.csv')
+    assert all(card['卡片密码'] for card in cards)
+    assert len({card['卡片密码'] for card in cards}) == len(cards)
+    # 青眼の白龍 两个卡包都有收录，只保存一次
+    blue_eyes = [card['卡牌ID'] for card in cards if card['卡片密码'] == '89631139']
+    assert len(blue_eyes) == 1
+    assert sorted(p['卡包'] for p in printings if p['卡牌ID'] == blue_eyes[0]) == [
+        'エントリーパック/デュエリストパック/レジェンドデュエリスト編3',
+        '基本パック/第2期/Spell of Mask',
+    ]
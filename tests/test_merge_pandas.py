@@ -0,0 +1,40 @@
+"""
+4合并.py Pandas合并：逐文件读取时值保持原样，与完整合并的结果相同
+"""
+import csv
+import os
+
+import pytest
+
+from conftest import load_script
+
+pytest.importorskip('pandas')
+
+FIELDS = ['卡牌编码', '卡名', '等级', '攻击力', '卡片密码']
+
+def write_csv(path, rows):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(FIELDS)
+        writer.writerows(rows)
+
+def read_rows(path):
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        return sorted(tuple(sorted(row.items())) for row in csv.DictReader(f))
+
+def test_values_are_not_reformatted_per_file(tmp_path):
+    merger = load_script('4合并')
+    csv_dir = str(tmp_path / 'csv_directory')
+    write_csv(os.path.join(csv_dir, 'a.csv'), [['AA-001', 'モンスターA', '4', '1200', '00012345']])
+    # 这个文件中等级和攻击力有空值，逐文件推断类型时会读成浮点数
+    write_csv(os.path.join(csv_dir, 'b.csv'), [['BB-001', 'モンスターB', '3', '1000', '89631139'],
+                                               ['BB-002', '魔法C', '', '', '12345678']])
+    merger.merge_csv_with_pandas(csv_dir, str(tmp_path / 'pandas.csv'))
+    merger.merge_csv_files(csv_dir, str(tmp_path / 'full.csv'))
+
+    rows = read_rows(str(tmp_path / 'pandas.csv'))
+    assert rows == read_rows(str(tmp_path / 'full.csv'))
+    values = {value for row in rows for _, value in row}
+    assert {'3', '1000', '00012345'} <= values
+    assert not any(value.endswith('.0') for value in values)
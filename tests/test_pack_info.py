@@ -0,0 +1,45 @@
+"""
+5发现新包.extract_pack_metadata：快速提取与BeautifulSoup完整解析的输出必须完全一致（benchmark.py packinfo 的检查）
+"""
+import os
+
+import pytest
+
+from conftest import HTML_DIR, load_script
+from stub_server import corpus_files
+from ygo import html_store
+
+pytest.importorskip('bs4')
+
+# BeautifulSoup解析全部语料需要半分钟以上，这里取样本
+FILES = corpus_files(step=10, biggest=5)
+
+@pytest.mark.parametrize('path', FILES, ids=lambda path: os.path.relpath(path, HTML_DIR))
+def test_fast_extraction_matches_beautifulsoup(path):
+    discover = load_script('5发现新包')
+    filename = os.path.basename(path)
+    expected = discover.parse_yugioh_pack_html(path, filename)
+    assert expected is not None
+    assert discover.extract_pack_metadata(path, filename) == expected
+
+def test_compressed_page(tmp_path):
+    discover = load_script('5发现新包')
+    source = os.path.join(HTML_DIR, '基本パック/第2期/Spell of Mask.html')
+    path = html_store.write_html(str(tmp_path / 'Spell of Mask.html'), html_store.read_html_bytes(source))
+    filename = os.path.basename(path)
+    expected = discover.parse_yugioh_pack_html(path, filename)
+    assert expected['pack_name'] == 'Spell of Mask'
+    assert discover.extract_pack_metadata(path, filename) == expected
+
+def test_nested_div_in_total(tmp_path):
+    # div.total中嵌套的</div>不能截断卡片数量
+    discover = load_script('5发现新包')
+    source = os.path.join(HTML_DIR, '基本パック/第2期/Spell of Mask.html')
+    content = html_store.read_html_bytes(source).replace('<div class="total">全52枚</div>'.encode(),
+                                                         '<div class="total"><div>全</div>52枚</div>'.encode())
+    path = tmp_path / 'Spell of Mask.html'
+    path.write_bytes(content)
+    filename = os.path.basename(path)
+    expected = discover.parse_yugioh_pack_html(str(path), filename)
+    assert expected['card_count'] == '52'
+    assert discover.extract_pack_metadata(str(path), filename) == expected
@@ -0,0 +1,50 @@
+"""
+3解析卡包.PackOutputs（下载流水线的写出阶段）：输出与记录到达的顺序无关，并记录到清单中
+"""
+import csv
+import os
+
+from conftest import load_script, copy_packs
+from ygo.manifest import Manifest
+
+PACKS = [
+    '基本パック/第2期/Magic Ruler.html',
+    '基本パック/第2期/Spell of Mask.html',
+]
+
+def test_merged_csv_follows_path_order_and_manifest_is_updated(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    parser = load_script('3解析卡包')
+    html_dir = copy_packs(PACKS, 'ygo_packages')
+    html_paths = [os.path.join(html_dir, path) for path in PACKS]
+    manifest = Manifest()
+    outputs = parser.PackOutputs(html_dir, 'csv_directory', 'ygo.csv', 'yugioh_pack_info.csv',
+                                 merged_file='merged_cards.csv', manifest=manifest, paths=html_paths)
+    # 流水线中后下载的卡包可能先解析完：等前面的卡包到达后一起写出，不等到finish
+    records = {path: parser.extract_html_file(path)[0] for path in html_paths}
+    outputs.add(html_paths[1], records[html_paths[1]])
+    assert outputs.written == 0
+    outputs.add(html_paths[0], records[html_paths[0]])
+    assert outputs.written == 2 and not outputs.pending
+    assert not os.path.exists('merged_cards.csv')
+    outputs.finish()
+
+    with open('merged_cards.csv', encoding='utf-8-sig', newline='') as f:
+        numbers = [row['卡牌编码'] for row in csv.DictReader(f)]
+    assert numbers == [card['卡牌编码'] for path in html_paths for card in records[path]['cards']]
+
+    # 之后的增量解析不再重新解析这些卡包
+    timer = parser.process_html_directory(html_dir, 'csv_directory', manifest)
+    assert 'parse' not in timer.report()['stages']
+
+def test_skipped_pack_does_not_hold_back_later_records(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    parser = load_script('3解析卡包')
+    html_dir = copy_packs(PACKS, 'ygo_packages')
+    html_paths = [os.path.join(html_dir, path) for path in PACKS]
+    outputs = parser.PackOutputs(html_dir, 'csv_directory', 'ygo.csv', 'yugioh_pack_info.csv', paths=html_paths)
+    outputs.skip(html_paths[0])
+    outputs.add(html_paths[1], parser.extract_html_file(html_paths[1])[0])
+    assert outputs.written == 1
+    outputs.abort()
+    assert not os.path.exists('ygo.csv') and not os.path.exists('ygo.csv.tmp')
@@ -0,0 +1,49 @@
+"""
+3解析卡包.parse_pack：一次遍历得到的卡牌、ygo.csv字段和卡包信息必须与三种分别的解析完全一致（benchmark.py rebuild 的检查）
+"""
+import io
+import os
+
+import pytest
+
+from conftest import HTML_DIR, load_script
+from stub_server import corpus_files
+from ygo import extract, html_store
+
+pytest.importorskip('bs4')
+pytest.importorskip('lxml')
+
+# 卡名中<rt>内嵌套<ruby>、没有属性行的卡（招待状）、卡牌数与全卡数不符的页面
+SPECIAL_PAGES = [os.path.join(HTML_DIR, relative_path) for relative_path in [
+    'スペシャルパック/特別記念パック/20th ANNIVERSARY PACK 1st.html',
+    'イベント配布/全国大会/遊戯王DMⅡ 決闘者伝説 in TOKYO DOME.html',
+    '構築済みデッキ/特別記念品/決闘王の記憶 – 決闘都市編 –.html',
+]]
+FILES = corpus_files(step=5) + SPECIAL_PAGES
+
+def separate_outputs(parser, raw, backend):
+    page = raw.decode('utf-8')
+    try:
+        rows = extract.ygo_rows(page)
+    except (IndexError, AttributeError, ValueError):
+        rows = None
+    return parser.parse_card_info(page, backend), rows, extract.scan_pack_meta(io.BytesIO(raw))
+
+@pytest.mark.parametrize('path', FILES, ids=lambda path: os.path.relpath(path, HTML_DIR))
+def test_lxml_single_pass_matches_separate_parses(path):
+    parser = load_script('3解析卡包')
+    raw = html_store.read_html_bytes(path)
+    assert parser.parse_pack(raw, 'lxml') == separate_outputs(parser, raw, 'lxml')
+
+# bs4后端较慢，只检查特殊页面
+@pytest.mark.parametrize('path', SPECIAL_PAGES, ids=lambda path: os.path.relpath(path, HTML_DIR))
+def test_bs4_single_pass_matches_separate_parses(path):
+    parser = load_script('3解析卡包')
+    raw = html_store.read_html_bytes(path)
+    assert parser.parse_pack(raw, 'bs4') == separate_outputs(parser, raw, 'bs4')
+
+@pytest.mark.parametrize('backend', ['lxml', 'bs4'])
+def test_empty_page(backend):
+    cards, rows, meta = load_script('3解析卡包').parse_pack(b'', backend)
+    assert (cards, rows) == ([], None)
+    assert meta == extract.scan_pack_meta(io.BytesIO(b''))
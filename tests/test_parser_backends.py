@@ -0,0 +1,35 @@
+"""
+3解析卡包.parse_card_info：lxml后端与bs4后端在语料上的输出必须完全一致（benchmark.py parse 的检查）
+"""
+import os
+
+import pytest
+
+from conftest import HTML_DIR, load_script
+from stub_server import corpus_files
+from ygo import html_store
+
+pytest.importorskip('bs4')
+pytest.importorskip('lxml')
+
+# bs4后端解析全部语料需要约一分钟，这里取样本
+FILES = corpus_files(step=10, biggest=5)
+
+@pytest.mark.parametrize('path', FILES, ids=lambda path: os.path.relpath(path, HTML_DIR))
+def test_lxml_backend_matches_bs4(path):
+    parser = load_script('3解析卡包')
+    content = html_store.read_html(path)
+    assert parser.parse_card_info(content, 'lxml') == parser.parse_card_info(content, 'bs4')
+
+# 下载中断会留下空文件，lxml对空文档抛出ParserError
+@pytest.mark.parametrize('content', ['', ' \r\n', '<!-- 空页面 -->'])
+def test_empty_document_gives_no_cards_on_both_backends(content):
+    parser = load_script('3解析卡包')
+    assert parser.parse_card_info(content, 'lxml') == parser.parse_card_info(content, 'bs4') == []
+
+def test_default_backend_is_lxml_when_installed():
+    assert load_script('3解析卡包').default_backend() == 'lxml'
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        load_script('3解析卡包').parse_card_info('<table></table>', 'html5lib')
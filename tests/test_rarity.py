@@ -0,0 +1,25 @@
+"""
+ygo.rarity：对照表替换与旧的逐个str.replace在语料中每个罕贵度文本上结果一致（benchmark.py rarity 的检查）
+"""
+import pytest
+
+import benchmark
+from stub_server import corpus_files
+from ygo import rarity
+
+TEXTS = sorted(set(benchmark.rarity_texts(corpus_files())))
+
+def test_corpus_has_rarity_texts():
+    assert len(TEXTS) > 50
+
+@pytest.mark.parametrize('text', TEXTS)
+def test_table_matches_legacy_replace(text):
+    assert rarity.normalize_rarity(text) == benchmark.normalize_rarity_legacy(text)
+
+@pytest.mark.parametrize('text, expected', [
+    ('ノーマルレア|スーパーパラレル', 'NR|SRP'),
+    ('ウルトラ？|シークレット', 'UR|SER'),
+    ('', ''),
+])
+def test_known_abbreviations(text, expected):
+    assert rarity.normalize_rarity(text) == expected
@@ -0,0 +1,32 @@
+"""
+3解析卡包.py --rebuild：2爬虫的下载目录中名称经过sanitize_filename处理，ygo.csv中仍应写原始标题
+"""
+import json
+import os
+import shutil
+
+from conftest import HTML_DIR, load_script
+
+STRUCTURE = [{'title': '基本パック', 'children': [
+    {'title': '第2期', 'children': [{'title': 'Spell of Mask', 'href': '/list/bp02-4/', 'is_new': False}]},
+]}]
+
+def test_rebuild_writes_original_titles_to_ygo_csv(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with open('ygo_structure.json', 'w', encoding='utf-8') as f:
+        json.dump(STRUCTURE, f, ensure_ascii=False)
+    os.makedirs('ygo_packages/基本パック/第2期')
+    shutil.copyfile(os.path.join(HTML_DIR, '基本パック/第2期/Spell of Mask.html'),
+                    'ygo_packages/基本パック/第2期/Spell_of_Mask.html')
+
+    parser = load_script('3解析卡包')
+    titles = parser.load_pack_titles()
+    assert titles == {'基本パック/第2期/Spell_of_Mask': ('基本パック', '第2期', 'Spell of Mask')}
+    parser.rebuild_outputs('ygo_packages', 'csv_directory', 'ygo.csv', 'yugioh_pack_info.csv', titles=titles)
+
+    with open('ygo.csv', encoding='utf-8') as f:
+        lines = [line.rstrip('\n').split('\t') for line in f]
+    assert lines
+    assert {tuple(fields[1:4]) for fields in lines} == {('基本パック', '第2期', 'Spell of Mask')}
+    # 文件名中的卡包路径保持下载目录中的写法
+    assert os.path.exists('csv_directory/基本パック/第2期/Spell_of_Mask.csv')
@@ -0,0 +1,42 @@
+"""
+启动开销：导入各脚本和快速查询入口时不加载重量级依赖，快速查询入口的导入耗时在预算以内（在新的解释器中检查）
+"""
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT
+import benchmark
+
+def imported_modules(code):
+    result = subprocess.run([sys.executable, '-c', f"{code}\nimport sys; print('\\n'.join(sys.modules))"],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    return set(result.stdout.split())
+
+def heavy(modules):
+    return sorted(module for module in modules if module.split('.')[0] in benchmark.HEAVY_MODULES)
+
+@pytest.mark.parametrize('script', benchmark.SCRIPTS + ['main'])
+def test_importing_a_script_loads_no_heavy_dependency(script):
+    assert heavy(imported_modules(f"import importlib; importlib.import_module('{script}')")) == []
+
+def test_quick_lookup_loads_no_heavy_dependency():
+    assert heavy(imported_modules("from ygo import __main__, lookup")) == []
+
+def test_parsing_imports_lxml_on_first_use():
+    modules = imported_modules("import importlib\n"
+                               "parser = importlib.import_module('3解析卡包')\n"
+                               "parser.parse_card_info('<table></table>', 'lxml')")
+    assert 'lxml.etree' in modules
+
+@pytest.mark.parametrize('args', [['-c', 'import ygo'],
+                                  ['-m', 'ygo', 'list-packs'],
+                                  ['-m', 'ygo', 'lookup', '89631139']])
+def test_quick_entry_imports_within_budget(args):
+    # 与bench_startup相同：-X importtime的顶层模块累计耗时，减去空解释器本身导入的模块
+    interpreter, _ = benchmark.import_times(['-c', 'pass'], cwd=ROOT)
+    top_level, modules = benchmark.import_times(args, cwd=ROOT)
+    assert 'ygo' in modules
+    seconds = sum(cumulative for module, cumulative in top_level.items() if module not in interpreter)
+    assert seconds <= benchmark.IMPORT_BUDGET, f"导入耗时 {seconds * 1000:.1f} ms"
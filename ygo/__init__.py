@@ -0,0 +1,19 @@
+"""
+游戏王卡包爬虫的公共模块，供各个编号脚本共享
+
+import ygo 不导入任何子模块，ygo.extract 等在第一次访问时才导入；
+快速查询的命令行入口见 python -m ygo --help
+"""
+import importlib
+
+# 可以通过 ygo.<名称> 访问的子模块
+__all__ = ['cards', 'columnar', 'export', 'extract', 'html_server', 'html_store', 'http_cache', 'job_queue',
+           'lookup', 'manifest', 'menu_diff', 'parse_cache', 'pipeline', 'profiling', 'rarity', 'scheduler', 'snapshots']
+
+def __getattr__(name):
+    if name in __all__:
+        return importlib.import_module(f'{__name__}.{name}')
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
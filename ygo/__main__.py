@@ -0,0 +1,37 @@
+"""
+快速查询的命令行入口，只导入查询需要的模块
+
+用法:
+    python -m ygo list-packs --filter 基本パック
+    python -m ygo lookup 89631139
+"""
+import sys
+import argparse
+from ygo import lookup
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m ygo', description="查询main.py导出的ygo.csv")
+    parser.add_argument('--csv', default=lookup.CSV_PATH, help="main.py输出的ygo.csv")
+    commands = parser.add_subparsers(dest='command', required=True)
+    command = commands.add_parser('list-packs', help="列出所有卡包及收录的卡牌数")
+    command.add_argument('--filter', default='', help="只列出路径中含有此文本的卡包")
+    command = commands.add_parser('lookup', help="按卡片密码查找卡牌的所有收录")
+    command.add_argument('passcode', help="卡片密码，如 89631139")
+    args = parser.parse_args(argv)
+
+    if args.command == 'list-packs':
+        packs = [(pack_path, count) for pack_path, count in lookup.list_packs(args.csv)
+                 if args.filter in pack_path]
+        for pack_path, count in packs:
+            print(f"{pack_path}\t{count}")
+        print(f"共 {len(packs)} 个卡包")
+    else:
+        printings = lookup.lookup_passcode(args.passcode, args.csv)
+        if not printings:
+            print(f"未找到卡片密码 {args.passcode}")
+            return 1
+        for printing in printings:
+            print('\t'.join(printing))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+"""
+卡牌与收录的拆分：同一张卡在多个卡包中重复收录时，卡牌信息只保存一次
+"""
+import sys
+
+# 卡牌本身的信息，与收录的卡包无关
+CARD_FIELDS = ['卡片密码', '卡名', '卡牌类别', '属性', '等级', '种族', '攻击力', '防御力', '卡牌文本']
+# 每次收录的信息
+PRINTING_FIELDS = ['卡牌编码', '罕贵度']
+
+def card_key(row, pack_key):
+    """
+    卡牌的唯一键：有卡片密码时用密码，否则用卡名；两者都没有时无法判断是否同一张卡，按收录单独保存
+    """
+    if row.get('卡片密码'):
+        return ('卡片密码', row['卡片密码'])
+    if row.get('卡名'):
+        return ('卡名', row['卡名'])
+    return ('收录', pack_key, row.get('卡牌编码', ''))
+
+class CardTable:
+    """
+    按card_key去重的卡牌表，卡牌ID按首次出现的顺序从1开始分配
+
+    字段值经sys.intern驻留，类别、属性、种族等大量重复的短字符串在内存中只有一份
+    """
+    def __init__(self):
+        self.ids = {}
+        self.cards = []
+
+    def add(self, row, pack_key):
+        """
+        登记一行卡牌数据，返回卡牌ID；已有的卡牌保留首次出现时的信息
+        """
+        key = card_key(row, pack_key)
+        card_id = self.ids.get(key)
+        if card_id is None:
+            self.cards.append(tuple(sys.intern(row.get(field) or '') for field in CARD_FIELDS))
+            card_id = self.ids[key] = len(self.cards)
+        return card_id
+
+    def rows(self):
+        """
+        按卡牌ID顺序返回 (卡牌ID, 字段值元组)
+        """
+        return enumerate(self.cards, 1)
+
+    def __len__(self):
+        return len(self.cards)
@@ -0,0 +1,83 @@
+"""
+列式输出：把CSV结果转换为Parquet或Arrow IPC文件，需要安装pyarrow
+
+低基数的列（卡牌类别、罕贵度、卡包等）使用字典编码；Arrow IPC文件不压缩，
+可以直接内存映射，只读取需要的列
+"""
+import os
+
+# main.py输出的ygo.csv没有表头，各列依次为
+YGO_CSV_COLUMNS = ['更新日期', '分类', '系列', '卡包', '卡牌编码', '卡名', '卡片密码', '卡牌类别', '罕贵度']
+
+# 取值种类很少、适合字典编码的列
+DICTIONARY_COLUMNS = {'更新日期', '分类', '系列', '卡包', '卡牌类别', '罕贵度', '属性', '等级', '种族'}
+
+FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+def csv_to_columnar(csv_file, output_file, fmt='parquet', delimiter=',', column_names=None, quoting=True):
+    """
+    将CSV文件转换为列式文件，返回行数
+    
+    所有列都按字符串读取（卡片密码等前导0不能丢失），DICTIONARY_COLUMNS中的列字典编码
+    
+    Args:
+        fmt (str): 'parquet' 或 'arrow'
+        column_names (list): CSV没有表头时指定列名
+        quoting (bool): 是否识别双引号（ygo.csv没有引号转义，应为False）
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.compute as pc
+    
+    read_options = pa_csv.ReadOptions(column_names=column_names)
+    parse_options = pa_csv.ParseOptions(delimiter=delimiter, quote_char='"' if quoting else False,
+                                        newlines_in_values=quoting)
+    # 先读表头得到列名，再把所有列都指定为字符串
+    names = column_names or _read_header(csv_file, delimiter)
+    convert_options = pa_csv.ConvertOptions(column_types={name: pa.string() for name in names},
+                                            strings_can_be_null=False)
+    table = pa_csv.read_csv(csv_file, read_options=read_options, parse_options=parse_options,
+                            convert_options=convert_options)
+    
+    for i, name in enumerate(table.column_names):
+        if name in DICTIONARY_COLUMNS:
+            table = table.set_column(i, name, pc.dictionary_encode(table.column(i)))
+    
+    tmp_file = output_file + '.tmp'
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        pq.write_table(table, tmp_file)
+    elif fmt == 'arrow':
+        with pa.OSFile(tmp_file, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    else:
+        raise ValueError(f"未知的列式格式: {fmt}")
+    os.replace(tmp_file, output_file)
+    return table.num_rows
+
+def ygo_csv_to_columnar(csv_path, output_file, fmt='parquet'):
+    """
+    转换main.py输出的ygo.csv（制表符分隔，无表头，无引号）
+    """
+    return csv_to_columnar(csv_path, output_file, fmt, delimiter='\t',
+                           column_names=YGO_CSV_COLUMNS, quoting=False)
+
+def load_columnar(path, columns=None):
+    """
+    读取列式文件，返回pyarrow.Table；columns指定时只读取这些列，文件以内存映射方式打开
+    """
+    import pyarrow as pa
+    
+    if path.endswith(FORMATS['arrow']):
+        source = pa.memory_map(path, 'r')
+        table = pa.ipc.open_file(source).read_all()
+        return table.select(columns) if columns else table
+    
+    import pyarrow.parquet as pq
+    return pq.read_table(path, columns=columns, memory_map=True)
+
+def _read_header(csv_file, delimiter):
+    import csv
+    with open(csv_file, 'r', encoding='utf-8-sig', newline='') as f:
+        return next(csv.reader(f, delimiter=delimiter), [])
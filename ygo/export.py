@@ -0,0 +1,43 @@
+"""
+导出文件的写入：所有行经由同一个带缓冲的文件句柄写入临时文件，成功后再改名覆盖目标文件
+"""
+import os
+
+BUFFER_SIZE = 1024 * 1024
+
+class AtomicFile:
+    """
+    逐步写入的导出文件：file是临时文件的带缓冲句柄，commit时改名覆盖目标文件；
+    discard删除临时文件，原有的目标文件保持不变，不会留下写了一半的文件
+    """
+    def __init__(self, path, encoding='utf-8', newline=None):
+        self.path = os.fspath(path)
+        self.tmp_path = self.path + '.tmp'
+        self.file = open(self.tmp_path, 'w', encoding=encoding, newline=newline, buffering=BUFFER_SIZE)
+    
+    def commit(self):
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+    
+    def discard(self):
+        self.file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+def write_lines(path, lines, encoding='utf-8'):
+    """
+    把lines逐行写入path，返回写入的行数
+
+    写入过程中出错时删除临时文件，原有的目标文件保持不变，不会留下写了一半的文件
+    """
+    out = AtomicFile(path, encoding)
+    count = 0
+    try:
+        for line in lines:
+            out.file.write(line + '\n')
+            count += 1
+    except BaseException:
+        out.discard()
+        raise
+    out.commit()
+    return count
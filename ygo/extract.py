@@ -0,0 +1,307 @@
+"""
+卡包页面的一次性提取：每个页面只读取、解析一次，由同一份卡包记录生成
+各卡包CSV、卡包信息CSV和ygo.csv格式的行
+"""
+import os
+import re
+import html
+import time
+from ygo import html_store
+from ygo import rarity
+from ygo.manifest import page_stamp
+
+# 卡包信息CSV的字段
+PACK_INFO_FIELDS = ['pack_name', 'pack_abbreviation', 'release_date', 'card_count', 'file_path']
+
+# ygo_rows和scan_pack_meta的提取规则版本，改变规则时加一，使解析缓存中的旧结果失效
+EXTRACT_VERSION = 2
+
+# 快速提取卡包信息时每次读取的字节数
+META_CHUNK_SIZE = 64 * 1024
+# 跨块查找时保留的重叠长度，保证被块边界截断的标签下次仍能匹配
+META_OVERLAP = 4096
+
+TIME_PATTERN = re.compile(rb'<time\b([^>]*)>(.*?)</time\s*>', re.S | re.I)
+# div.total中可能嵌套<div>，只匹配开始标签，内容由DIV_PATTERN按嵌套深度找到对应的</div>为止
+TOTAL_PATTERN = re.compile(rb'<div\b([^>]*\btotal\b[^>]*)>', re.I)
+DIV_PATTERN = re.compile(rb'<(/?)div\b[^>]*>', re.I)
+CANONICAL_PATTERN = re.compile(rb'<link\b([^>]*\bcanonical\b[^>]*)>', re.I)
+PUBLISHED_META_PATTERN = re.compile(rb'<meta\b([^>]*article:published_time[^>]*)>', re.I)
+ATTR_PATTERN = re.compile(r'''([^\s=/>]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?''')
+TAG_PATTERN = re.compile(r'<[^>]*>')
+TIME_CLASSES = {'entry-date', 'date', 'published', 'updated'}
+
+# ygo.csv格式：页面正文的起止标记，以及逐卡提取用的正则
+PAGE_START = '<header class="article-header entry-header">'
+PAGE_END = '<div class="ad">'
+UPDATE_DATE_PATTERN = re.compile('datetime="(.{10})')
+CARD_NUM_PATTERN = re.compile('全([0-9]+)枚')
+CARD_NUMBER_PATTERN = re.compile('>(.+?)<')
+CARD_NAME_PATTERN = re.compile(r'(back-|mon|magic|trap).+?>(.+?)</td>')
+RUBY_PATTERN = re.compile('<rt>.+?<.+?>')
+LIMIT_ICON_PATTERN = re.compile('limit-icon.+?<')
+NAME_TAG_PATTERN = re.compile('<.+?>')
+CARD_CATEGORY_PATTERN = re.compile(r'card-category.+?>(.+?)</td>')
+CARD_PASS_PATTERN = re.compile(r'card-pass.+?>(.+?)</td>')
+RARE_PATTERN = re.compile('> ?([^<>p]+?)<')
+# RARE_PATTERN对单段文本的等价形式，用于解析后的文本节点
+RARE_TEXT_PATTERN = re.compile(' ?([^<>p]+)')
+
+def _parse_attrs(raw):
+    """
+    解析标签属性，与html.parser一致：属性名小写，值做实体解码，重复的属性以后出现的为准
+    """
+    attrs = {}
+    for name, double, single, bare in ATTR_PATTERN.findall(raw.decode('utf-8', 'replace')):
+        attrs[name.lower()] = html.unescape(double or single or bare)
+    return attrs
+
+def _tag_text(inner):
+    """
+    相当于BeautifulSoup的get_text(strip=True)：各段文本去掉首尾空白后直接拼接
+    """
+    parts = (html.unescape(part).strip() for part in TAG_PATTERN.split(inner.decode('utf-8', 'replace')))
+    return ''.join(part for part in parts if part)
+
+def _element_body(nested, buffer, start, complete):
+    """
+    从开始标签之后的start起，按nested匹配到的同名开始、结束标签计算嵌套深度，返回到对应结束标签为止的内容；
+    缓冲区中还没有对应的结束标签时返回None，页面已读完时与html.parser一样到页面末尾为止
+    """
+    depth = 1
+    for m in nested.finditer(buffer, start):
+        depth += -1 if m.group(1) else 1
+        if depth == 0:
+            return buffer[start:m.start()]
+    return buffer[start:] if complete else None
+
+class _TagFinder:
+    """
+    在不断增长的缓冲区中查找第一个满足条件的标签，记住已经检查过的位置；找到后inner为标签的内容
+    
+    nested不为None时pattern只匹配开始标签，内容按嵌套深度取到对应的结束标签（见_element_body）
+    """
+    def __init__(self, pattern, accept, nested=None):
+        self.pattern = pattern
+        self.accept = accept
+        self.nested = nested
+        self.pos = 0
+        self.match = None
+        self.attrs = None
+        self.inner = None
+    
+    def scan(self, buffer, complete):
+        while self.match is None:
+            m = self.pattern.search(buffer, self.pos)
+            if m is None:
+                if not complete:
+                    self.pos = max(self.pos, len(buffer) - META_OVERLAP)
+                return
+            attrs = _parse_attrs(m.group(1))
+            if not self.accept(attrs):
+                # 嵌套的标签可能在这个候选之内，只跳过它的开头
+                self.pos = m.start() + 1
+            elif self.nested is None:
+                self.match, self.attrs = m, attrs
+                self.inner = m.group(2) if self.pattern.groups > 1 else None
+            else:
+                inner = _element_body(self.nested, buffer, m.end(), complete)
+                if inner is None:
+                    # 结束标签还没读到，下次从这个标签重新开始
+                    self.pos = m.start()
+                    return
+                self.match, self.attrs, self.inner = m, attrs, inner
+
+def _classes(attrs, name='class'):
+    return set(attrs.get(name, '').split())
+
+def scan_pack_meta(stream):
+    """
+    从页面字节流中提取只取决于页面内容的卡包信息：发售日期、卡片数量和canonical链接中的缩写（没有时为None）
+    
+    不建立完整的DOM：按块读取页面开头，用正则查找发售日期、卡片数量和canonical链接，
+    三者都找到后即停止读取
+    """
+    finders = {
+        'time': _TagFinder(TIME_PATTERN, lambda attrs: _classes(attrs) & TIME_CLASSES),
+        'total': _TagFinder(TOTAL_PATTERN, lambda attrs: 'total' in _classes(attrs), DIV_PATTERN),
+        'canonical': _TagFinder(CANONICAL_PATTERN, lambda attrs: 'canonical' in _classes(attrs, 'rel')),
+        'meta': _TagFinder(PUBLISHED_META_PATTERN, lambda attrs: attrs.get('property') == 'article:published_time'),
+    }
+    required = [finders['time'], finders['total'], finders['canonical']]
+    
+    buffer = b''
+    while True:
+        chunk = stream.read(META_CHUNK_SIZE)
+        buffer += chunk
+        complete = not chunk
+        for finder in finders.values():
+            finder.scan(buffer, complete)
+        if complete or all(finder.match for finder in required):
+            break
+    
+    return pack_meta(
+        _tag_text(finders['time'].inner) if finders['time'].match else None,
+        finders['meta'].attrs.get('content', '') if finders['meta'].match else None,
+        _tag_text(finders['total'].inner) if finders['total'].match else None,
+        finders['canonical'].attrs.get('href') if finders['canonical'].match else None)
+
+def pack_meta(date_text, published, total_text, canonical_href):
+    """
+    由页面中找到的元素得到scan_pack_meta的结果，没有找到的元素传入None：
+    <time>的文本、article:published_time的content、div.total的文本和canonical链接的href
+    """
+    # 提取发售日期，没有<time>时使用article:published_time
+    if date_text is not None:
+        date_published = date_text
+    elif published is not None:
+        date_published = published.split('T')[0]
+    else:
+        date_published = "未知"
+    
+    # 提取卡片数量
+    card_count = "未知"
+    if total_text is not None and '全' in total_text and '枚' in total_text:
+        card_count = ''.join(filter(str.isdigit, total_text))
+    
+    # 提取卡包缩写：canonical链接
+    abbreviation = None
+    if canonical_href is not None:
+        match = re.search(r'/list/([^/]+)/?$', canonical_href)
+        if match:
+            abbreviation = match.group(1)
+    
+    return {'release_date': date_published, 'card_count': card_count, 'abbreviation': abbreviation}
+
+def pack_info_row(meta, file_path, filename):
+    """
+    由scan_pack_meta的结果和文件名得到卡包信息CSV的一行
+    """
+    return {
+        # 使用文件名作为卡包名
+        'pack_name': html_store.strip_html_suffix(filename),
+        # 卡包缩写：canonical链接，其次文件名
+        'pack_abbreviation': meta['abbreviation'] or html_store.strip_html_suffix(filename).lower(),
+        'release_date': meta['release_date'],
+        'card_count': meta['card_count'],
+        'file_path': file_path
+    }
+
+def scan_pack_info(stream, file_path, filename):
+    """
+    从页面字节流中提取卡包信息，结果与5发现新包.py的parse_yugioh_pack_html相同
+    """
+    return pack_info_row(scan_pack_meta(stream), file_path, filename)
+
+def ygo_rows(page):
+    """
+    按main.py的规则提取ygo.csv需要的字段，返回 [(更新日期, 卡牌编码, 卡名, 卡片密码, 卡牌类别, 罕贵度)]
+
+    已公布的卡牌数少于全卡数时返回None；缺少类别或密码的卡牌跳过
+    """
+    body = page.split(PAGE_START)[1].split(PAGE_END)[0]
+    hd, lt = body.split('<div id="list">')
+    
+    pack_update_dt = UPDATE_DATE_PATTERN.search(hd).group(1).replace('-', '')
+    card_num = int(CARD_NUM_PATTERN.search(hd).group(1))
+    
+    cds = lt.split('card-number')[1:]
+    if card_num != len(cds):
+        return None
+    
+    rows = []
+    for cd in cds:
+        card_number = CARD_NUMBER_PATTERN.search(cd).group(1)
+        
+        card_name_raw = CARD_NAME_PATTERN.search(cd).group(2)
+        card_name_raw = RUBY_PATTERN.sub('', card_name_raw)
+        card_name_raw = LIMIT_ICON_PATTERN.sub('', card_name_raw)
+        card_name = NAME_TAG_PATTERN.sub('', card_name_raw)
+        
+        m = CARD_CATEGORY_PATTERN.search(cd)
+        if not m:
+            continue
+        card_category = m.group(1)
+        
+        m = CARD_PASS_PATTERN.search(cd)
+        if not m:
+            continue
+        card_pass = m.group(1)
+        
+        card_rare = '|'.join(RARE_PATTERN.findall(cd.split('card-rare')[1].split('card-info')[0]))
+        card_rare = rarity.normalize_rarity(card_rare)
+        
+        rows.append((pack_update_dt, card_number, card_name, card_pass, card_category, card_rare))
+    return rows
+
+def walked_ygo_rows(datetime_value, total_text, walked):
+    """
+    由卡牌表的一次遍历得到与ygo_rows相同的结果，不再对页面做字符串拆分
+
+    datetime_value: 页头<time>的datetime属性；total_text: div.total的文本（没有时为None）；
+    walked: 每张卡的 {'number', 'name', 'category', 'pass', 'rare'}，均为未去除空白的原始文本，
+    卡牌行中没有对应单元格时为None，rare为罕贵度单元格中的各段文本
+    """
+    match = CARD_NUM_PATTERN.search(total_text or '')
+    if not datetime_value or len(datetime_value) < 10 or not match or int(match.group(1)) != len(walked):
+        return None
+    pack_update_dt = datetime_value[:10].replace('-', '')
+    
+    rows = []
+    for card in walked:
+        if card['category'] is None or card['pass'] is None:
+            continue
+        # ygo_rows在缺少罕贵度单元格时整页失败
+        if card['rare'] is None:
+            return None
+        matches = (RARE_TEXT_PATTERN.fullmatch(text) for text in card['rare'])
+        card_rare = rarity.normalize_rarity('|'.join(m.group(1) for m in matches if m))
+        rows.append((pack_update_dt, card['number'], card['name'], card['pass'], card['category'], card_rare))
+    return rows
+
+def ygo_line(row, cgr_name, fld_name, pk_name):
+    """
+    ygo.csv的一行：更新日期、分类、系列、卡包，之后是卡牌字段，以制表符分隔
+    """
+    update_dt, card_number, card_name, card_pass, card_category, card_rare = row
+    return '\t'.join([update_dt, cgr_name, fld_name, pk_name,
+                      card_number, card_name, card_pass, card_category, card_rare])
+
+def extract_pack(html_path, parse_page, cache=None):
+    """
+    读取并解析一次卡包页面，返回卡包记录（字典）：
+
+    pack_info: 卡包信息CSV的一行；content_hash/update_date: 供清单使用；
+    parse_page(页面字节)返回 (cards, ygo_rows, meta)，即卡包CSV的内容、ygo.csv格式的字段
+    （页面结构不符或卡牌未公布完时为None）和scan_pack_meta格式的卡包信息；
+    size/timings: 页面字节数和read/parse两个阶段的耗时（秒）；
+    cached: cards、ygo_rows和meta是否取自cache（ParseCache，只读取，由调用者写入未命中的结果）
+    """
+    started = time.perf_counter()
+    raw = html_store.read_html_bytes(html_path)
+    read_done = time.perf_counter()
+    content_hash, update_date = page_stamp(raw)
+    
+    # 命中缓存时不必解析页面
+    cached = cache.get(content_hash) if cache is not None else None
+    if cached is not None:
+        cards, rows, meta = cached
+    else:
+        cards, rows, meta = parse_page(raw)
+    
+    record = {
+        'html_path': html_path,
+        'pack_info': pack_info_row(meta, html_path, os.path.basename(html_path)),
+        'meta': meta,
+        'content_hash': content_hash,
+        'update_date': update_date,
+        'cards': cards,
+        'ygo_rows': rows,
+        'size': len(raw),
+        'cached': cached is not None,
+    }
+    record['timings'] = {
+        'read': read_done - started,
+        'parse': time.perf_counter() - read_done,
+    }
+    return record
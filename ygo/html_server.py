@@ -0,0 +1,44 @@
+"""
+在本地浏览下载的卡包页面：页面压缩保存为 .html.gz，按 .html 地址请求时发送压缩的原始字节
+并带上 Content-Encoding: gzip，由浏览器解压后显示；不接受gzip的客户端收到解压后的页面
+"""
+import io
+import os
+import gzip
+import functools
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from ygo import html_store
+
+class PackPageHandler(SimpleHTTPRequestHandler):
+    """
+    与SimpleHTTPRequestHandler相同，只是 xxx.html 不存在而 xxx.html.gz 存在时发送后者
+    """
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if path.endswith(html_store.PLAIN_SUFFIX) and not os.path.exists(path):
+            stored = html_store.find_html(path)
+            if stored is not None and stored.endswith(html_store.COMPRESSED_SUFFIX):
+                return self.send_compressed(stored)
+        return super().send_head()
+
+    def send_compressed(self, stored):
+        with open(stored, 'rb') as f:
+            body = f.read()
+        accepts_gzip = 'gzip' in self.headers.get('Accept-Encoding', '')
+        if not accepts_gzip:
+            body = gzip.decompress(body)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        if accepts_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        return io.BytesIO(body)
+
+def make_server(root, port=8000, host='127.0.0.1'):
+    """
+    以root为根目录的HTTP服务器，port为0时自动选择端口（见server.server_port），调用serve_forever开始服务
+    """
+    handler = functools.partial(PackPageHandler, directory=root)
+    return ThreadingHTTPServer((host, port), handler)
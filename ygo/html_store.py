@@ -0,0 +1,100 @@
+import os
+import gzip
+
+# 下载的页面以原始字节gzip压缩保存为 xxx.html.gz，旧的未压缩 xxx.html 仍可读取
+COMPRESSED_SUFFIX = '.html.gz'
+PLAIN_SUFFIX = '.html'
+
+def is_html_file(filename):
+    return filename.endswith(COMPRESSED_SUFFIX) or filename.endswith(PLAIN_SUFFIX)
+
+def strip_html_suffix(filename):
+    """
+    去掉 .html.gz / .html 后缀，得到卡包名
+    """
+    for suffix in (COMPRESSED_SUFFIX, PLAIN_SUFFIX):
+        if filename.endswith(suffix):
+            return filename[:-len(suffix)]
+    return os.path.splitext(filename)[0]
+
+def logical_path(path):
+    """
+    压缩文件对应的 .html 路径，作为清单等处的统一键
+    """
+    return strip_html_suffix(path) + PLAIN_SUFFIX
+
+def find_html(path):
+    """
+    根据 .html 路径查找实际保存的文件，优先压缩版本，都不存在时返回None
+    """
+    base = strip_html_suffix(str(path))
+    for suffix in (COMPRESSED_SUFFIX, PLAIN_SUFFIX):
+        if os.path.exists(base + suffix):
+            return base + suffix
+    return None
+
+def unique_html_files(paths):
+    """
+    同一卡包同时有 .html 和 .html.gz 时只保留find_html选择的压缩版本，其余路径的顺序不变
+    """
+    paths = list(paths)
+    present = set(paths)
+    return [path for path in paths
+            if not (path.endswith(PLAIN_SUFFIX) and strip_html_suffix(path) + COMPRESSED_SUFFIX in present)]
+
+def write_html(path, content):
+    """
+    将页面原始字节压缩写入 path 对应的 .html.gz，先写临时文件再改名，返回实际路径；
+    同名的旧 .html 文件随后删除，目录中每个卡包只保留一个页面文件
+    """
+    base = strip_html_suffix(str(path))
+    target = base + COMPRESSED_SUFFIX
+    tmp_path = target + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(gzip.compress(content, compresslevel=6, mtime=0))
+    os.replace(tmp_path, target)
+    if os.path.exists(base + PLAIN_SUFFIX):
+        os.remove(base + PLAIN_SUFFIX)
+    return target
+
+def read_html_bytes(path):
+    """
+    读取页面原始字节，自动识别是否压缩
+    """
+    path = str(path)
+    with open(path, 'rb') as f:
+        content = f.read()
+    if path.endswith('.gz'):
+        content = gzip.decompress(content)
+    return content
+
+def open_html(path):
+    """
+    以二进制流打开页面，自动识别是否压缩，用于只需读取开头部分的场合
+    """
+    path = str(path)
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+def read_html(path):
+    return read_html_bytes(path).decode('utf-8')
+
+def compress_existing(root):
+    """
+    将目录下已有的未压缩 .html 文件转换为 .html.gz，返回 (转换数量, 节省字节数)
+    """
+    converted = 0
+    saved = 0
+    for dirpath, dirnames, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            # 根目录的index.html是导航页，不是卡包
+            if not filename.endswith(PLAIN_SUFFIX) or path == os.path.join(root, 'index.html'):
+                continue
+            with open(path, 'rb') as f:
+                content = f.read()
+            target = write_html(path, content)
+            saved += len(content) - os.path.getsize(target)
+            converted += 1
+    return converted, saved
@@ -0,0 +1,93 @@
+import os
+import json
+import time
+import hashlib
+
+class HttpCache:
+    """
+    以URL为键的磁盘HTTP缓存，保存ETag/Last-Modified校验信息，
+    刷新时发送条件请求，页面未变化时服务器只返回304
+    """
+    def __init__(self, cache_dir='.http_cache'):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    def _path(self, url, suffix):
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key + suffix)
+    
+    def _load_meta(self, url):
+        try:
+            with open(self._path(url, '.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def conditional_headers(self, url, with_body=True):
+        """
+        返回条件请求头；with_body为True时要求缓存中有正文，否则304时无内容可用
+        """
+        meta = self._load_meta(url)
+        if not meta:
+            return {}
+        if with_body and not os.path.exists(self._path(url, '.body')):
+            return {}
+        
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+    
+    def update(self, url, response_headers, body=None):
+        """
+        记录200响应的校验信息，body不为None时同时保存正文
+        """
+        if body is not None:
+            _write_atomic(self._path(url, '.body'), body)
+        
+        meta = {
+            'url': url,
+            'etag': response_headers.get('ETag'),
+            'last_modified': response_headers.get('Last-Modified'),
+            'fetched_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        _write_atomic(self._path(url, '.json'), json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+    
+    def body(self, url):
+        """
+        读取缓存的正文，没有则返回None
+        """
+        try:
+            with open(self._path(url, '.body'), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+    
+    def urlopen(self, url, headers=None, timeout=10):
+        """
+        使用urllib获取页面正文（bytes），304时返回缓存内容
+        """
+        # urllib.request会连带导入ssl、http.client等，只在真正请求时导入
+        import urllib.request
+        import urllib.error
+        
+        request_headers = dict(headers or {})
+        request_headers.update(self.conditional_headers(url))
+        request = urllib.request.Request(url, headers=request_headers)
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                page = response.read()
+                self.update(url, response.headers, page)
+                return page
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return self.body(url)
+            raise
+
+def _write_atomic(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
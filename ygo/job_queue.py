@@ -0,0 +1,128 @@
+"""
+持久化的下载任务队列（SQLite），记录每个URL的状态和重试次数，中断后可从原处继续
+"""
+import time
+import sqlite3
+
+# 任务状态
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+class JobQueue:
+    """
+    url -> 状态、尝试次数、下次可重试的时间、最后的错误
+
+    打开队列时，上次运行中断时仍处于running的任务恢复为pending；
+    失败的任务按指数退避重新排队，达到max_attempts次后标记为failed
+    """
+    def __init__(self, path='ygo_jobs.sqlite', max_attempts=5, backoff=2.0, max_backoff=300.0):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                url TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt REAL NOT NULL DEFAULT 0,
+                last_error TEXT,
+                updated_at REAL
+            )""")
+        with self.conn:
+            self.recovered = self.conn.execute(
+                "UPDATE jobs SET state = ?, updated_at = ? WHERE state = ?",
+                (PENDING, time.time(), RUNNING)).rowcount
+
+    def close(self):
+        self.conn.close()
+
+    def _set(self, url, state, **fields):
+        fields['state'] = state
+        fields['updated_at'] = time.time()
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        with self.conn:
+            self.conn.execute(f"UPDATE jobs SET {assignments} WHERE url = ?", list(fields.values()) + [url])
+
+    def add(self, url):
+        """
+        登记任务，返回是否为新任务；上次运行中最终失败的任务重新获得全部重试次数
+        """
+        with self.conn:
+            inserted = self.conn.execute(
+                "INSERT OR IGNORE INTO jobs (url, state, updated_at) VALUES (?, ?, ?)",
+                (url, PENDING, time.time())).rowcount
+            if not inserted:
+                self.conn.execute(
+                    "UPDATE jobs SET state = ?, attempts = 0, next_attempt = 0 WHERE url = ? AND state = ?",
+                    (PENDING, url, FAILED))
+        return bool(inserted)
+
+    def state(self, url):
+        row = self.conn.execute("SELECT state FROM jobs WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def start(self, url):
+        """
+        标记为进行中并增加尝试次数；进程在此之后中断，下次打开队列时会恢复为pending
+        """
+        with self.conn:
+            self.conn.execute(
+                "UPDATE jobs SET state = ?, attempts = attempts + 1, updated_at = ? WHERE url = ?",
+                (RUNNING, time.time(), url))
+
+    def succeed(self, url):
+        self._set(url, DONE, last_error=None)
+
+    def fail(self, url, error, permanent=False, retry_after=None):
+        """
+        记录失败：未达到最大次数时按 backoff * 2^(次数-1) 秒后重试，permanent为True时不再重试；
+        retry_after为服务器要求的最短等待秒数
+        """
+        row = self.conn.execute("SELECT attempts FROM jobs WHERE url = ?", (url,)).fetchone()
+        attempts = row[0] if row else 0
+        if permanent or attempts >= self.max_attempts:
+            self._set(url, FAILED, last_error=str(error))
+            return
+        delay = min(self.backoff * 2 ** max(attempts - 1, 0), self.max_backoff)
+        if retry_after:
+            delay = max(delay, retry_after)
+        self._set(url, PENDING, last_error=str(error), next_attempt=time.time() + delay)
+
+    def is_due(self, url, now=None):
+        """
+        是否为等待重试且已到重试时间的任务
+        """
+        row = self.conn.execute(
+            "SELECT 1 FROM jobs WHERE url = ? AND state = ? AND attempts > 0 AND next_attempt <= ?",
+            (url, PENDING, time.time() if now is None else now)).fetchone()
+        return row is not None
+
+    def retry_delay(self, urls):
+        """
+        urls中等待重试的任务最早还要等多少秒，没有等待重试的任务时返回None
+        """
+        delays = [
+            next_attempt - time.time()
+            for url in urls
+            for (next_attempt,) in self.conn.execute(
+                "SELECT next_attempt FROM jobs WHERE url = ? AND state = ? AND attempts > 0", (url, PENDING))
+        ]
+        return max(min(delays), 0.0) if delays else None
+
+    def counts(self):
+        """
+        各状态的任务数
+        """
+        return dict(self.conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state"))
+
+    def failures(self):
+        """
+        最终失败的任务 [(url, 尝试次数, 错误)]
+        """
+        return self.conn.execute(
+            "SELECT url, attempts, last_error FROM jobs WHERE state = ? ORDER BY url", (FAILED,)).fetchall()
@@ -0,0 +1,39 @@
+"""
+不解析HTML的快速查询：从main.py输出的ygo.csv中列出卡包、按卡片密码查找卡牌
+"""
+CSV_PATH = 'ygo.csv'
+
+def _iter_ygo_csv(csv_path):
+    """
+    ygo.csv的每一行：更新日期、分类、系列、卡包、卡牌编码、卡名、卡片密码、卡牌类别、罕贵度
+    """
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            fields = line.rstrip('\r\n').split('\t')
+            if len(fields) == 9:
+                yield fields
+
+def list_packs(csv_path=CSV_PATH):
+    """
+    所有卡包 [(卡包路径「分类/系列/卡包」, 卡牌数)]，按路径排序
+    """
+    counts = {}
+    for fields in _iter_ygo_csv(csv_path):
+        pack_path = '/'.join(fields[1:4])
+        counts[pack_path] = counts.get(pack_path, 0) + 1
+    return sorted(counts.items())
+
+def lookup_passcode(passcode, csv_path=CSV_PATH):
+    """
+    卡片密码对应的所有收录 [(卡牌编码, 卡名, 卡牌类别, 罕贵度, 卡包路径)]，按卡包路径排序
+    """
+    # 先用子串判断，只拆分可能匹配的行
+    needle = f'\t{passcode}\t'
+    printings = []
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if needle in line:
+                fields = line.rstrip('\r\n').split('\t')
+                if len(fields) == 9 and fields[6] == passcode:
+                    printings.append((fields[4], fields[5], fields[7], fields[8], '/'.join(fields[1:4])))
+    return sorted(printings, key=lambda printing: (printing[4], printing[0]))
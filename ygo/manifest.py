@@ -0,0 +1,101 @@
+import os
+import re
+import json
+import hashlib
+from ygo import html_store
+
+DATETIME_PATTERN = re.compile(rb'datetime="(.{10})')
+
+class Manifest:
+    """
+    持久化的卡包清单，供增量模式判断哪些卡包需要重新处理
+    
+    packs: 卡包相对路径 -> {href, is_new, update_date, content_hash, rows, parser, mtime_ns, size}
+    files: 输出名 -> {输入文件: [mtime_ns, size]}，记录上次生成该输出时的输入
+    """
+    def __init__(self, path='ygo_manifest.json'):
+        self.path = path
+        self.packs = {}
+        self.files = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.packs = data.get('packs', {})
+            self.files = data.get('files', {})
+    
+    def save(self):
+        data = {'packs': self.packs, 'files': self.files}
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+    
+    def update_pack(self, key, **fields):
+        self.packs.setdefault(pack_key(key), {}).update(fields)
+    
+    def pack_unchanged(self, key, html_path, output_path, parser_version=None):
+        """
+        判断卡包HTML自上次解析后是否未变化，且解析结果仍然存在、由同一版本的解析规则得到
+        
+        先比较mtime和大小，不同时再比较（解压后）内容的哈希
+        """
+        entry = self.packs.get(pack_key(key))
+        if not entry or 'content_hash' not in entry or entry.get('parser') != parser_version:
+            return False
+        # 没有卡牌的卡包不会生成输出文件
+        if entry.get('rows') and not os.path.exists(output_path):
+            return False
+        
+        stat = os.stat(html_path)
+        if entry.get('mtime_ns') == stat.st_mtime_ns and entry.get('size') == stat.st_size:
+            return True
+        
+        content = html_store.read_html_bytes(html_path)
+        if content_hash(content) == entry['content_hash']:
+            # 内容未变，只是文件被重新写过
+            entry['mtime_ns'] = stat.st_mtime_ns
+            entry['size'] = stat.st_size
+            return True
+        return False
+    
+    def record_parse(self, key, html_path, page_hash, update_date, rows, parser_version=None):
+        stat = os.stat(html_path)
+        self.update_pack(key,
+                         content_hash=page_hash,
+                         update_date=update_date,
+                         rows=rows,
+                         parser=parser_version,
+                         mtime_ns=stat.st_mtime_ns,
+                         size=stat.st_size)
+    
+    def inputs_unchanged(self, output_name, paths):
+        """
+        判断生成output_name的输入文件集合及其mtime/大小是否与上次相同
+        """
+        return self.files.get(output_name) == _stat_files(paths)
+    
+    def record_inputs(self, output_name, paths):
+        self.files[output_name] = _stat_files(paths)
+
+def pack_key(path):
+    """
+    统一使用/作为分隔符，保证不同平台生成的清单一致
+    """
+    return path.replace(os.sep, '/')
+
+def content_hash(content):
+    return hashlib.sha1(content).hexdigest()
+
+def page_stamp(content):
+    """
+    返回页面内容的 (哈希, datetime="..."中的更新日期)
+    """
+    match = DATETIME_PATTERN.search(content)
+    return content_hash(content), match.group(1).decode('ascii') if match else None
+
+def _stat_files(paths):
+    result = {}
+    for path in paths:
+        stat = os.stat(path)
+        result[pack_key(path)] = [stat.st_mtime_ns, stat.st_size]
+    return result
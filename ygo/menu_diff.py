@@ -0,0 +1,103 @@
+"""
+比较两个目录结构（parse_ygo_html的结果），以卡包链接为键找出新增、删除、改名、移动的卡包，
+生成只包含变化部分的目录结构，供下载和解析阶段只处理这些卡包
+"""
+
+def flatten_menu(structured_data):
+    """
+    卡包链接 -> {href, title, category, series, is_new}；同一链接出现多次时保留第一次
+    """
+    packs = {}
+    for level1 in structured_data:
+        for level2 in level1['children']:
+            for level3 in level2['children']:
+                packs.setdefault(level3['href'], {
+                    'href': level3['href'],
+                    'title': level3['title'],
+                    'category': level1['title'],
+                    'series': level2['title'],
+                    'is_new': level3.get('is_new', False),
+                })
+    return packs
+
+def diff_menus(old_data, new_data):
+    """
+    返回 {added, removed, relinked, renamed, moved, flagged}，每项为卡包列表（按链接排序）：
+
+    added/removed: 只在新/旧目录中出现的卡包
+    relinked: 分类、系列、标题都相同，只是链接变了，带old_href（不再算作新增和删除）
+    renamed: 链接相同、标题不同，带old_title
+    moved: 链接相同、所属分类或系列不同，带old_category/old_series
+    flagged: 新目录中带new图标的卡包
+    """
+    old = flatten_menu(old_data)
+    new = flatten_menu(new_data)
+    common = old.keys() & new.keys()
+
+    # 只在一边出现的卡包按位置和标题配对
+    removed = {(pack['category'], pack['series'], pack['title']): pack
+               for href, pack in old.items() if href not in new}
+    relinked = []
+    added = []
+    for href in sorted(new.keys() - old.keys()):
+        before = removed.pop((new[href]['category'], new[href]['series'], new[href]['title']), None)
+        if before is not None:
+            relinked.append(dict(new[href], old_href=before['href']))
+        else:
+            added.append(new[href])
+
+    diff = {
+        'added': added,
+        'removed': sorted(removed.values(), key=lambda pack: pack['href']),
+        'relinked': relinked,
+        'renamed': [],
+        'moved': [],
+        'flagged': [new[href] for href in sorted(new) if new[href]['is_new']],
+    }
+    for href in sorted(common):
+        before, after = old[href], new[href]
+        if before['title'] != after['title']:
+            diff['renamed'].append(dict(after, old_title=before['title']))
+        if (before['category'], before['series']) != (after['category'], after['series']):
+            diff['moved'].append(dict(after, old_category=before['category'], old_series=before['series']))
+    return diff
+
+def changed_hrefs(diff):
+    """
+    需要重新下载和解析的卡包链接：新增、链接变更、改名、移动（保存路径变了）和带new图标的卡包
+    """
+    return {pack['href'] for name in ('added', 'relinked', 'renamed', 'moved', 'flagged') for pack in diff[name]}
+
+def filter_menu(structured_data, hrefs):
+    """
+    只保留hrefs中的卡包，去掉因此变空的分类和系列，格式与parse_ygo_html的结果相同
+    """
+    result = []
+    for level1 in structured_data:
+        children = []
+        for level2 in level1['children']:
+            packs = [level3 for level3 in level2['children'] if level3['href'] in hrefs]
+            if packs:
+                children.append(dict(level2, children=packs))
+        if children:
+            result.append(dict(level1, children=children))
+    return result
+
+def format_diff(diff):
+    """
+    差异报告的文本行
+    """
+    lines = [f"新增 {len(diff['added'])}, 删除 {len(diff['removed'])}, 链接变更 {len(diff['relinked'])}, "
+             f"改名 {len(diff['renamed'])}, 移动 {len(diff['moved'])}, 带new图标 {len(diff['flagged'])}"]
+    for pack in diff['added']:
+        lines.append(f"  + {pack['category']} / {pack['series']} / {pack['title']}  {pack['href']}")
+    for pack in diff['removed']:
+        lines.append(f"  - {pack['category']} / {pack['series']} / {pack['title']}  {pack['href']}")
+    for pack in diff['relinked']:
+        lines.append(f"  = {pack['title']}  {pack['old_href']} -> {pack['href']}")
+    for pack in diff['renamed']:
+        lines.append(f"  ~ {pack['old_title']} -> {pack['title']}  {pack['href']}")
+    for pack in diff['moved']:
+        lines.append(f"  > {pack['old_category']} / {pack['old_series']} -> {pack['category']} / {pack['series']}"
+                     f"  {pack['title']}")
+    return lines
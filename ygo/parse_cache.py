@@ -0,0 +1,124 @@
+"""
+持久化的解析结果缓存：以页面内容的哈希和解析器版本为键，保存解析得到的卡牌记录，
+页面未变化时不必重新解析HTML
+
+值用marshal序列化后zlib压缩（卡牌记录只含字符串、列表、字典和元组），保存在SQLite中；
+总大小超过上限时按最近使用时间淘汰（LRU）
+
+并行解析时，子进程只用get读取缓存，写入（put/touch）都在主进程中进行，数据库只有一个写入者
+"""
+import os
+import time
+import zlib
+import marshal
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    hash TEXT NOT NULL,
+    version TEXT NOT NULL,
+    data BLOB NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (hash, version)
+);
+CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+"""
+
+# 默认缓存上限（压缩后的字节数）
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+class ParseCache:
+    """
+    (页面哈希, 解析器版本) -> 压缩的解析结果、最近使用时间
+
+    version应在解析规则改变时修改，旧版本的结果不再命中，之后按LRU被淘汰；
+    put和touch先记在内存中，flush（或close）时在一个事务中写入并淘汰超出上限的结果
+    """
+    def __init__(self, path='ygo_parse_cache.sqlite', version='', max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.version = version
+        self.max_bytes = max_bytes
+        self._pending = {}
+        self._touched = set()
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def get(self, content_hash):
+        """
+        取出缓存的解析结果，不存在时返回None
+        """
+        data = self._pending.get(content_hash)
+        if data is None:
+            row = self.conn.execute("SELECT data FROM results WHERE hash = ? AND version = ?",
+                                    (content_hash, self.version)).fetchone()
+            if row is None:
+                return None
+            data = row[0]
+        self._touched.add(content_hash)
+        return marshal.loads(zlib.decompress(data))
+
+    def put(self, content_hash, value):
+        self._pending[content_hash] = zlib.compress(marshal.dumps(value))
+
+    def touch(self, content_hash):
+        """
+        记录子进程中的一次命中，使其在LRU中保留更久（get命中时会自动记录）
+        """
+        self._touched.add(content_hash)
+
+    def flush(self):
+        """
+        写入put和touch的结果，并淘汰超出上限的最久未使用的结果
+        """
+        if not self._pending and not self._touched:
+            return
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO results (hash, version, data, last_used) VALUES (?, ?, ?, ?)",
+                [(content_hash, self.version, data, now) for content_hash, data in self._pending.items()])
+            self.conn.executemany(
+                "UPDATE results SET last_used = ? WHERE hash = ? AND version = ?",
+                [(now, content_hash, self.version) for content_hash in self._touched])
+            self._evict()
+        self._pending.clear()
+        self._touched.clear()
+
+    def _evict(self):
+        total = self.conn.execute("SELECT COALESCE(SUM(LENGTH(data)), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for content_hash, version, size in self.conn.execute(
+                "SELECT hash, version, LENGTH(data) FROM results ORDER BY last_used"):
+            if total <= self.max_bytes:
+                break
+            evicted.append((content_hash, version))
+            total -= size
+        self.conn.executemany("DELETE FROM results WHERE hash = ? AND version = ?", evicted)
+
+    def stats(self):
+        """
+        缓存的结果数和压缩后的总字节数（所有版本）
+        """
+        entries, size = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM results").fetchone()
+        return {'entries': entries, 'bytes': size}
+
+# 按 (进程号, 路径, 版本) 复用已打开的缓存；fork出的子进程不能使用父进程的SQLite连接
+_open_caches = {}
+
+def open_cache(path, version):
+    """
+    在当前进程中打开（或复用）缓存，供进程池中的解析函数使用；path为None时返回None
+    """
+    if path is None:
+        return None
+    key = (os.getpid(), path, version)
+    if key not in _open_caches:
+        _open_caches[key] = ParseCache(path, version)
+    return _open_caches[key]
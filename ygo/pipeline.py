@@ -0,0 +1,56 @@
+"""
+流水线：下载、解析、写出三个阶段同时进行，阶段之间用有界队列连接；
+下游处理不过来时上游的put会等待（背压），排队的页面数量不超过队列长度
+"""
+import asyncio
+
+# 队列结束标记
+_DONE = object()
+
+async def run_pipeline(produce, parse, sink, workers=2, queue_size=16, executor=None):
+    """
+    运行 产生 -> 解析 -> 写出 流水线，返回 (produce的返回值, 写出的项目数)
+
+    produce(put): 协程，每得到一个待解析的项目就 await put(项目)，队列满时等待
+    parse(项目): 普通函数，由workers个任务在executor（如进程池）中并行执行
+    sink(项目, 解析结果): 普通函数，在事件循环线程中按解析完成的顺序依次调用
+    """
+    loop = asyncio.get_running_loop()
+    parse_queue = asyncio.Queue(queue_size)
+    sink_queue = asyncio.Queue(queue_size)
+
+    async def parser():
+        while True:
+            item = await parse_queue.get()
+            if item is _DONE:
+                return
+            result = await loop.run_in_executor(executor, parse, item)
+            await sink_queue.put((item, result))
+
+    async def writer():
+        count = 0
+        while True:
+            entry = await sink_queue.get()
+            if entry is _DONE:
+                return count
+            sink(*entry)
+            count += 1
+
+    async def producer():
+        produced = await produce(parse_queue.put)
+        for _ in range(workers):
+            await parse_queue.put(_DONE)
+        return produced
+
+    async def parsers():
+        await asyncio.gather(*(parser() for _ in range(workers)))
+        await sink_queue.put(_DONE)
+
+    tasks = [asyncio.ensure_future(producer()), asyncio.ensure_future(parsers()), asyncio.ensure_future(writer())]
+    try:
+        produced, _, count = await asyncio.gather(*tasks)
+    finally:
+        # 任一阶段出错时停止其余阶段，避免另一端在满队列上永远等待
+        for task in tasks:
+            task.cancel()
+    return produced, count
@@ -0,0 +1,171 @@
+"""
+流水线的计时与性能报告：各阶段、各文件的耗时、字节数、行数和内存峰值，输出JSON；
+另可用cProfile/pyinstrument记录函数级的性能数据
+"""
+import os
+import sys
+import json
+import time
+import cProfile
+import contextlib
+
+try:
+    import resource
+except ImportError:
+    # Windows没有resource模块
+    resource = None
+
+def peak_rss(who='self'):
+    """
+    进程的内存峰值（字节），who为'children'时是已结束的子进程中的最大值，无法获取时返回None
+    """
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if who == 'children' else resource.RUSAGE_SELF)
+    # Linux的单位为KB，macOS为字节
+    return usage.ru_maxrss if sys.platform == 'darwin' else usage.ru_maxrss * 1024
+
+class StageTimer:
+    """
+    按阶段（如read/decode/parse/write）累计耗时、字节数和行数，同时记录每个文件在各阶段的耗时
+    """
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.files = {}
+
+    def add(self, stage, seconds, path=None, size=0, rows=0):
+        total = self.stages.setdefault(stage, {'seconds': 0.0, 'count': 0, 'bytes': 0, 'rows': 0})
+        total['seconds'] += seconds
+        total['count'] += 1
+        total['bytes'] += size
+        total['rows'] += rows
+        if path is not None:
+            entry = self.files.setdefault(path, {'seconds': 0.0, 'bytes': 0, 'rows': 0})
+            entry[stage] = entry.get(stage, 0.0) + seconds
+            entry['seconds'] += seconds
+            entry['bytes'] += size
+            entry['rows'] += rows
+
+    def add_stages(self, path, timings, size=0):
+        """
+        登记一个文件在各阶段的耗时（如在子进程中测得的 {'read': 秒, 'parse': 秒}），字节数计入第一个阶段
+        """
+        for stage, seconds in timings.items():
+            self.add(stage, seconds, path, size)
+            size = 0
+
+    @contextlib.contextmanager
+    def stage(self, stage, path=None, size=0, rows=0):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start, path, size, rows)
+
+    def report(self, slowest=20):
+        """
+        汇总为可写入JSON的字典，slowest为列出的最慢文件个数
+        """
+        wall = time.perf_counter() - self.started
+        stages = {}
+        for stage, total in self.stages.items():
+            stages[stage] = dict(total, share=total['seconds'] / wall if wall else 0.0)
+        files = sorted(self.files.items(), key=lambda item: item[1]['seconds'], reverse=True)
+        return {
+            'name': self.name,
+            'argv': sys.argv,
+            'finished_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'wall_seconds': wall,
+            'files': len(self.files),
+            'bytes': sum(entry['bytes'] for entry in self.files.values()),
+            'rows': sum(entry['rows'] for entry in self.files.values()),
+            'peak_rss': peak_rss(),
+            'peak_rss_children': peak_rss('children'),
+            'stages': stages,
+            'slowest_files': [dict(entry, path=path) for path, entry in files[:slowest]],
+        }
+
+    def write(self, path, slowest=20):
+        report = self.report(slowest)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, path)
+        return report
+
+def summary(report):
+    """
+    报告的一行摘要
+    """
+    stages = ', '.join(f"{stage} {total['seconds']:.2f}s" for stage, total in report['stages'].items())
+    line = f"[{report['name']}] {report['files']} 个文件, {report['rows']} 行, 共 {report['wall_seconds']:.2f}s ({stages})"
+    if report['peak_rss']:
+        line += f", 内存峰值 {report['peak_rss'] / 1024 / 1024:.1f} MB"
+    return line
+
+@contextlib.contextmanager
+def profiled(path):
+    """
+    在with块内记录函数级性能数据：path为None时不记录；以.html结尾时使用pyinstrument
+    （需要安装），否则用cProfile保存为pstats文件，可用 python -m pstats 查看
+    """
+    if not path:
+        yield
+        return
+
+    if path.endswith('.html'):
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            print("pyinstrument库未安装，改用cProfile，请安装pyinstrument: pip install pyinstrument")
+            path = os.path.splitext(path)[0] + '.prof'
+        else:
+            profiler = Profiler()
+            profiler.start()
+            try:
+                yield
+            finally:
+                profiler.stop()
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(profiler.output_html())
+                print(f"性能数据已保存到 {path}")
+            return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        print(f"性能数据已保存到 {path}")
+
+class Progress:
+    """
+    进度输出：默认每隔interval秒输出一行汇总，verbose时逐个文件输出；警告和错误总是输出
+    """
+    def __init__(self, total, verbose=False, interval=2.0):
+        self.total = total
+        self.verbose = verbose
+        self.interval = interval
+        self.done = 0
+        self.last = time.monotonic()
+
+    def log(self, message):
+        if self.verbose:
+            print(message)
+
+    def warn(self, message):
+        print(message)
+
+    def advance(self, count=1):
+        self.done += count
+        if self.verbose:
+            return
+        now = time.monotonic()
+        if now - self.last >= self.interval or self.done == self.total:
+            self.last = now
+            print(f"进度: {self.done}/{self.total} ({self.done / self.total:.0%})" if self.total else f"进度: {self.done}",
+                  flush=True)
@@ -0,0 +1,141 @@
+"""
+自适应的请求调度：按AIMD调整并发数，遵守429/503和Retry-After，并统计请求速度、延迟和错误率
+"""
+import time
+import asyncio
+import email.utils
+from collections import deque
+
+# 表示服务器过载、需要降低请求速度的状态码
+THROTTLE_STATUSES = (429, 503)
+
+def parse_retry_after(value):
+    """
+    解析Retry-After头（秒数或HTTP日期），返回需要等待的秒数，无法解析时返回None
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    return max(when.timestamp() - time.time(), 0.0)
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+class AdaptiveScheduler:
+    """
+    用AIMD控制同时进行的请求数：
+
+    - 请求成功且延迟不超过target_latency时加性增加，每完成约limit个请求并发数加1
+    - 延迟超过target_latency时乘以0.75，收到429/503或超时时减半
+    - 有Retry-After时在此期间暂停发起新请求
+
+    超时时间随最近请求的p95延迟调整，限制在[min_timeout, max_timeout]之间
+    """
+    def __init__(self, initial=2, minimum=1, maximum=8, target_latency=2.0,
+                 min_timeout=5.0, max_timeout=60.0, window=200):
+        self.limit = float(max(min(initial, maximum), minimum))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.started = time.monotonic()
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        # 最近window个请求的 (完成时间, 延迟, 是否出错)
+        self.recent = deque(maxlen=window)
+        self._changed = None
+
+    @property
+    def timeout(self):
+        latencies = [latency for _, latency, _ in self.recent]
+        if len(latencies) < 10:
+            return self.max_timeout / 2
+        return min(max(percentile(latencies, 0.95) * 4, self.min_timeout), self.max_timeout)
+
+    async def acquire(self):
+        """
+        等到有空闲的并发名额、且不在Retry-After暂停期内，返回开始时间
+        """
+        if self._changed is None:
+            self._changed = asyncio.Condition()
+        async with self._changed:
+            while True:
+                wait = self.paused_until - time.monotonic()
+                if wait > 0:
+                    try:
+                        await asyncio.wait_for(self._changed.wait(), wait)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                if self.in_flight < int(self.limit):
+                    break
+                await self._changed.wait()
+            self.in_flight += 1
+        return time.monotonic()
+
+    async def release(self, started, status=None, retry_after=None, error=False):
+        """
+        记录一个请求的结果并调整并发数；status为None且error为True表示请求异常（如超时）
+        """
+        now = time.monotonic()
+        latency = now - started
+        throttled = status in THROTTLE_STATUSES
+        failed = error or throttled or (status is not None and status >= 500)
+
+        self.requests += 1
+        self.errors += failed
+        self.recent.append((now, latency, failed))
+
+        if throttled or error:
+            self.throttled += throttled
+            self.limit = max(self.limit / 2, self.minimum)
+        elif latency > self.target_latency:
+            self.limit = max(self.limit * 0.75, self.minimum)
+        else:
+            self.limit = min(self.limit + 1 / self.limit, self.maximum)
+
+        if retry_after:
+            self.paused_until = max(self.paused_until, now + retry_after)
+
+        async with self._changed:
+            self.in_flight -= 1
+            self._changed.notify_all()
+
+    def stats(self):
+        """
+        返回统计：总请求数、最近的请求/秒、p50/p95延迟、错误率、当前并发上限
+        """
+        now = time.monotonic()
+        recent = [entry for entry in self.recent if now - entry[0] <= 30]
+        span = min(now - self.started, 30) or 1e-9
+        latencies = [latency for _, latency, _ in recent]
+        return {
+            'requests': self.requests,
+            'rps': len(recent) / span,
+            'p50': percentile(latencies, 0.5),
+            'p95': percentile(latencies, 0.95),
+            'error_rate': sum(failed for _, _, failed in recent) / len(recent) if recent else 0.0,
+            'throttled': self.throttled,
+            'limit': int(self.limit),
+        }
+
+    def format_stats(self):
+        stats = self.stats()
+        return (f"[统计] {stats['requests']} 个请求, {stats['rps']:.1f} 请求/秒, "
+                f"p50 {stats['p50']:.2f}s, p95 {stats['p95']:.2f}s, 错误率 {stats['error_rate']:.1%}, "
+                f"限流 {stats['throttled']} 次, 并发 {stats['limit']}")
@@ -0,0 +1,236 @@
+"""
+按内容寻址的页面快照库：保存目录页和每个卡包页面下载过的每个版本，可以取出任意日期的语料
+
+页面在标签结束处按内容切块（切点只取决于附近的内容，页面中间插入一行只影响附近的块），
+块以SHA-1为键、zlib压缩后只保存一份；同一页面的相邻版本、不同卡包的公共页头页尾都共用块
+
+用法:
+    python -m ygo.snapshots import menu_202002.html --name menu.html --date 2020-02-01
+    python -m ygo.snapshots import html --name ygo_packages --date 2020-03-01
+    python -m ygo.snapshots checkout 2020-02 snapshot_202002
+    python -m ygo.snapshots log menu.html
+    python -m ygo.snapshots stats
+"""
+import os
+import sys
+import time
+import zlib
+import sqlite3
+import hashlib
+import argparse
+from ygo import html_store
+
+# 卡包页面在快照库中的名称前缀，与下载目录一致
+PACKS_PREFIX = 'ygo_packages/'
+MENU_NAME = 'menu.html'
+
+# 切块参数：只在「>」之后切开；块不小于MIN_CHUNK，此后在切点前WINDOW字节的CRC32
+# 低位为0时切开（平均每CUT_MASK+1个候选切一次），超过MAX_CHUNK时在下一个候选处强制切开
+MIN_CHUNK = 1024
+MAX_CHUNK = 32 * 1024
+WINDOW = 48
+CUT_MASK = 0xF
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    hash BLOB PRIMARY KEY,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    chunks BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS versions (
+    name TEXT NOT NULL,
+    fetched_at TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    PRIMARY KEY (name, fetched_at)
+);
+"""
+
+def split_chunks(content):
+    """
+    按内容切块，返回块列表，拼接后等于content
+    """
+    chunks = []
+    start = 0
+    pos = content.find(b'>', MIN_CHUNK)
+    while pos != -1:
+        end = pos + 1
+        if end - start >= MAX_CHUNK or not zlib.crc32(content[end - WINDOW:end]) & CUT_MASK:
+            chunks.append(content[start:end])
+            start = end
+            pos = content.find(b'>', start + MIN_CHUNK)
+        else:
+            pos = content.find(b'>', end)
+    if start < len(content) or not chunks:
+        chunks.append(content[start:])
+    return chunks
+
+def snapshot_time(when=None):
+    """
+    快照时间的字符串形式，按字符串比较即按时间先后
+    """
+    return when or time.strftime('%Y-%m-%d %H:%M:%S')
+
+class SnapshotStore:
+    """
+    versions: 名称（相对路径，如 menu.html、ygo_packages/分类/系列/卡包.html）和时间 -> 页面哈希
+    blobs: 页面哈希 -> 大小、按顺序排列的块哈希
+    chunks: 块哈希 -> zlib压缩的块内容
+    """
+    def __init__(self, path='ygo_snapshots.sqlite'):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def put(self, name, content, fetched_at=None):
+        """
+        保存页面的一个版本，返回 (页面哈希, 是否为新版本)；与该名称最近一个版本相同时不记录
+        """
+        digest = hashlib.sha1(content).hexdigest()
+        row = self.conn.execute(
+            "SELECT hash FROM versions WHERE name = ? ORDER BY fetched_at DESC LIMIT 1", (name,)).fetchone()
+        if row and row[0] == digest:
+            return digest, False
+
+        with self.conn:
+            if not self.conn.execute("SELECT 1 FROM blobs WHERE hash = ?", (digest,)).fetchone():
+                hashes = []
+                for chunk in split_chunks(content):
+                    chunk_hash = hashlib.sha1(chunk).digest()
+                    hashes.append(chunk_hash)
+                    if not self.conn.execute("SELECT 1 FROM chunks WHERE hash = ?", (chunk_hash,)).fetchone():
+                        self.conn.execute("INSERT INTO chunks (hash, data) VALUES (?, ?)",
+                                          (chunk_hash, zlib.compress(chunk, 9)))
+                self.conn.execute("INSERT INTO blobs (hash, size, chunks) VALUES (?, ?, ?)",
+                                  (digest, len(content), b''.join(hashes)))
+            self.conn.execute("INSERT OR REPLACE INTO versions (name, fetched_at, hash) VALUES (?, ?, ?)",
+                              (name, snapshot_time(fetched_at), digest))
+        return digest, True
+
+    def get(self, digest):
+        """
+        按页面哈希取出内容，不存在时返回None
+        """
+        row = self.conn.execute("SELECT chunks FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        if row is None:
+            return None
+        hashes = row[0]
+        parts = []
+        for offset in range(0, len(hashes), 20):
+            (data,) = self.conn.execute("SELECT data FROM chunks WHERE hash = ?",
+                                        (hashes[offset:offset + 20],)).fetchone()
+            parts.append(zlib.decompress(data))
+        content = b''.join(parts)
+        if hashlib.sha1(content).hexdigest() != digest:
+            raise ValueError(f"快照内容损坏: {digest}")
+        return content
+
+    def versions(self, name):
+        """
+        页面的所有版本 [(时间, 页面哈希, 大小)]，按时间排序
+        """
+        return self.conn.execute(
+            "SELECT fetched_at, versions.hash, size FROM versions JOIN blobs USING (hash) "
+            "WHERE name = ? ORDER BY fetched_at", (name,)).fetchall()
+
+    def as_of(self, when, prefix=''):
+        """
+        每个名称在when时的版本 {名称: 页面哈希}；when按前缀比较，'2020-03' 包括整个3月
+        """
+        rows = self.conn.execute(
+            "SELECT name, hash, MAX(fetched_at) FROM versions "
+            "WHERE fetched_at <= ? AND name >= ? AND name < ? GROUP BY name",
+            (when + '\uffff', prefix, prefix + '\uffff'))
+        return {name: digest for name, digest, _ in rows}
+
+    def checkout(self, when, target_dir, prefix=''):
+        """
+        将when时的所有页面按名称写到target_dir下，返回写出的文件数
+        """
+        count = 0
+        for name, digest in sorted(self.as_of(when, prefix).items()):
+            path = os.path.join(target_dir, *name.split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(self.get(digest))
+            count += 1
+        return count
+
+    def stats(self):
+        """
+        名称数、版本数、不同页面数、块数、所有版本的原始总字节数和实际保存的字节数
+        """
+        names, versions = self.conn.execute("SELECT COUNT(DISTINCT name), COUNT(*) FROM versions").fetchone()
+        logical = self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM versions JOIN blobs USING (hash)").fetchone()[0]
+        blobs = self.conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+        chunks, stored = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM chunks").fetchone()
+        return {'names': names, 'versions': versions, 'blobs': blobs, 'chunks': chunks,
+                'logical_bytes': logical, 'stored_bytes': stored}
+
+def pack_name(base_path, filepath):
+    """
+    下载目录中卡包页面的快照名称
+    """
+    return PACKS_PREFIX + os.path.relpath(filepath, base_path).replace(os.sep, '/')
+
+def import_path(store, path, name, fetched_at=None):
+    """
+    导入一个文件，或目录下的所有页面（名称为 name/相对路径），返回新版本数
+    """
+    if not os.path.isdir(path):
+        return int(store.put(name, html_store.read_html_bytes(path), fetched_at)[1])
+    added = 0
+    for root, dirs, files in os.walk(path):
+        for file in html_store.unique_html_files(sorted(files)):
+            if html_store.is_html_file(file):
+                file_path = os.path.join(root, file)
+                relative_path = html_store.logical_path(os.path.relpath(file_path, path)).replace(os.sep, '/')
+                added += store.put(f"{name}/{relative_path}", html_store.read_html_bytes(file_path), fetched_at)[1]
+    return added
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m ygo.snapshots', description="页面快照库")
+    parser.add_argument('--store', default='ygo_snapshots.sqlite', help="快照库文件")
+    commands = parser.add_subparsers(dest='command', required=True)
+    command = commands.add_parser('import', help="导入已有的页面文件或目录")
+    command.add_argument('path')
+    command.add_argument('--name', required=True, help="文件的快照名称，或目录下页面的名称前缀")
+    command.add_argument('--date', default=None, help="快照时间，如 2020-02-01，默认为当前时间")
+    command = commands.add_parser('checkout', help="取出某一时间的所有页面")
+    command.add_argument('date', help="时间，按前缀比较，如 2020-02 表示2020年2月底")
+    command.add_argument('target', help="输出目录")
+    command.add_argument('--prefix', default='', help="只取出名称以此开头的页面，如 ygo_packages/")
+    command = commands.add_parser('log', help="列出一个页面的所有版本")
+    command.add_argument('name')
+    commands.add_parser('stats', help="统计快照库的大小")
+    args = parser.parse_args(argv)
+
+    store = SnapshotStore(args.store)
+    try:
+        if args.command == 'import':
+            added = import_path(store, args.path, args.name.rstrip('/'), args.date)
+            print(f"已导入 {added} 个新版本")
+        elif args.command == 'checkout':
+            count = store.checkout(args.date, args.target, args.prefix)
+            print(f"已取出 {count} 个页面到 {args.target}")
+        elif args.command == 'log':
+            for fetched_at, digest, size in store.versions(args.name):
+                print(f"{fetched_at}  {digest}  {size} 字节")
+        else:
+            stats = store.stats()
+            print(f"{stats['names']} 个页面, {stats['versions']} 个版本, {stats['chunks']} 个块")
+            print(f"原始大小 {stats['logical_bytes'] / 1024 / 1024:.1f} MB, "
+                  f"实际保存 {stats['stored_bytes'] / 1024 / 1024:.1f} MB")
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    sys.exit(main())